@@ -1,6 +1,10 @@
+import os
+
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
+from utils.coalescencia import almacen_pestana
+from utils.servidor import iniciar_hilos, instalar_instrumentacion, instalar_salud
 
 
 mathjax_script = ['https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.7/MathJax.js?config=TeX-MML-AM_CHTML']
@@ -8,7 +12,17 @@ app = dash.Dash(__name__, use_pages=True,
                 external_stylesheets=[dbc.themes.FLATLY],
                 external_scripts=[mathjax_script])
 
-app.layout = html.Div([
+# WSGI para producción: gunicorn app:server (ver gunicorn.conf.py y utils/servidor.py)
+server = app.server
+instalar_salud(server)
+# Server-Timing por callback, /metrics (Prometheus) y /perfil (utils/instrumentacion.py)
+instalar_instrumentacion(server)
+
+# El layout es una función para que cada carga de página (cada pestaña) tenga
+# su propio id: los callbacks pesados resuelven solo el último valor de cada
+# pestaña (utils/coalescencia.py)
+app.layout = lambda: html.Div([
+    almacen_pestana(),
     html.H1("Tecnicas de modelamiento Matematico", className='app-header'),
     html.Div([
         html.Div([
@@ -19,8 +33,12 @@ app.layout = html.Div([
         ], className='nav-links'),
     ], className='Navigation'),
     dash.page_container
-], className='app-container'),
+], className='app-container')
 
 
 if __name__ == "__main__":
+    # Con debug=True Werkzeug relanza este script en un hijo (WERKZEUG_RUN_MAIN)
+    # y es ese hijo el que atiende: ahí van los hilos de fondo
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        iniciar_hilos()
     app.run(debug=True)
\ No newline at end of file
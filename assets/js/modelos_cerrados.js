@@ -0,0 +1,118 @@
+/*
+ * Modelos con solución cerrada evaluados en el navegador.
+ *
+ * actualizar_exponencial (pages/clase1.py) y actualizar_logistica
+ * (pages/pagina3.py) solo evalúan fórmulas: no hace falta ir al servidor en
+ * cada movimiento del slider. Estas funciones reproducen EXACTAMENTE lo que
+ * hacen las versiones en Python (que siguen siendo la referencia y el plan B
+ * con CALLBACKS_EN_CLIENTE=0).
+ *
+ * El layout (con la plantilla plotly_white ya expandida) viene de la figura
+ * que el servidor dibujó al cargar la página; aquí solo se regeneran los datos.
+ */
+(function () {
+    'use strict';
+
+    // --- utilidades numéricas (equivalentes a NumPy) ---
+    function linspace(inicio, fin, n) {
+        var paso = (fin - inicio) / (n - 1);
+        var salida = new Array(n);
+        for (var i = 0; i < n; i++) {
+            salida[i] = inicio + i * paso;
+        }
+        salida[n - 1] = fin;
+        return salida;
+    }
+
+    function mapear(xs, f) {
+        var salida = new Array(xs.length);
+        for (var i = 0; i < xs.length; i++) {
+            salida[i] = f(xs[i]);
+        }
+        return salida;
+    }
+
+    function maximo(xs) {
+        var m = -Infinity;
+        for (var i = 0; i < xs.length; i++) {
+            if (xs[i] > m) { m = xs[i]; }
+        }
+        return m;
+    }
+
+    // Copia del layout anterior con los ejes en autorange (cambia t_max, K...)
+    function layoutBase(figura) {
+        var layout = Object.assign({}, (figura && figura.layout) || {});
+        layout.xaxis = Object.assign({}, layout.xaxis, {autorange: true});
+        layout.yaxis = Object.assign({}, layout.yaxis, {autorange: true});
+        return layout;
+    }
+
+    var modelos = {
+        // --- pages/clase1.py: P(t) = P0 e^{rt} vs crecimiento lineal ---
+        exponencial: function (P0, r, t_max, figura) {
+            var t = linspace(0, t_max, 100);
+            var P_exp = mapear(t, function (ti) { return P0 * Math.exp(r * ti); });
+            var P_lin = mapear(t, function (ti) { return P0 + (P0 * r) * ti; });
+
+            var kpi_text = r > 0
+                ? (Math.log(2) / r).toFixed(1) + ' unidades de tiempo'
+                : 'Infinito (r=0)';
+
+            var data = [
+                {
+                    type: 'scatter', x: t, y: P_exp, mode: 'lines', name: 'Crecimiento Exponencial',
+                    line: {color: '#2563eb', width: 4},
+                    fill: 'tozeroy', fillcolor: 'rgba(37, 99, 235, 0.1)'
+                },
+                {
+                    type: 'scatter', x: t, y: P_lin, mode: 'lines', name: 'Comparación Lineal',
+                    line: {color: 'gray', width: 2, dash: 'dot'},
+                    hovertemplate: 'Si fuera lineal: %{y:.1f}<extra></extra>'
+                }
+            ];
+            return [{data: data, layout: layoutBase(figura)}, kpi_text];
+        },
+
+        // --- pages/pagina3.py: solución logística y parábola dP/dt ---
+        logistica: function (P0, r, K, t_max, figura1, figura2) {
+            var t = linspace(0, t_max, 200);
+            var P = mapear(t, function (ti) {
+                var e = Math.exp(r * ti);
+                return (K * P0 * e) / (K + P0 * (e - 1));
+            });
+
+            var P_fase = linspace(0, K * 1.1, 100);
+            var dP_dt = mapear(P_fase, function (p) { return r * p * (1 - p / K); });
+
+            var data1 = [
+                {
+                    type: 'scatter', x: t, y: P, mode: 'lines', name: 'Población',
+                    line: {color: '#10b981', width: 3}
+                },
+                {
+                    type: 'scatter', x: [0, t_max], y: [K, K], mode: 'lines', name: 'Capacidad (K)',
+                    line: {color: 'red', dash: 'dash'}
+                }
+            ];
+
+            var data2 = [
+                {
+                    type: 'scatter', x: P_fase, y: dP_dt, mode: 'lines', name: 'Velocidad',
+                    fill: 'tozeroy', line: {color: '#3b82f6'}
+                }
+            ];
+            var layout2 = layoutBase(figura2);
+            layout2.annotations = [{
+                x: K / 2, y: maximo(dP_dt), text: 'Máx Crecimiento (K/2)',
+                showarrow: true, arrowhead: 1
+            }];
+
+            return [{data: data1, layout: layoutBase(figura1)}, {data: data2, layout: layout2}];
+        }
+    };
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        modelos: modelos
+    });
+})();
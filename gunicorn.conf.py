@@ -0,0 +1,46 @@
+import os
+
+# --- GUNICORN (producción) ---
+#   pip install gunicorn
+#   gunicorn app:server
+# gunicorn lee este archivo solo si se lanza desde la raíz del repo.
+#
+# Por defecto: UN worker con varios hilos. Los caches, la coalescencia de
+# sliders y el pool de EJECUTOR viven en la memoria de cada proceso, así que
+# un solo worker los aprovecha mejor. Modo multi-worker (más núcleos, más
+# memoria, caches por worker):
+#   WEB_CONCURRENCY=4 gunicorn app:server
+# Si además se usa SIM_EJECUTOR=procesos, cada worker tiene su propio pool:
+# conviene bajar SIM_PROCESOS para no pasar del número de núcleos.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+# La app se importa una vez en el maestro y los workers la heredan
+preload_app = True
+
+# Lo más largo que corre en línea es ~COSTO_EN_LINEA s; lo demás va en
+# segundo plano (utils/trabajos.py)
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers cada tantas peticiones (0 = nunca); con preload el
+# reemplazo nace ya caliente
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+
+
+def when_ready(server):
+    # Maestro, con la app ya importada (preload_app) y antes de crear workers
+    from utils.servidor import precalentar
+    precalentar(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    from utils.servidor import despues_de_fork
+    despues_de_fork()
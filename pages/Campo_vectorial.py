@@ -2,6 +2,10 @@ import dash
 from dash import html, dcc, Input, Output, State, callback
 import numpy as np
 import plotly.graph_objs as go
+from utils.funciones import trazas_campo_vectorial
+from utils.expresiones import evaluar_campo
+from utils.config import LIMITE_MALLA
+from utils.instrumentacion import instrumentar
 
 dash.register_page(__name__, path='/campo_vectorial', name='Campo Vectorial', order=2)
 
@@ -61,7 +65,15 @@ layout = html.Div([
     State("input-n", "value"),
     prevent_initial_call=False
 )
+@instrumentar
 def graficar_campo(n_clicks, fx_str, fy_str, xmax, ymax, n):
+
+    # Límite de la malla antes de calcular: con n = 300 son 90000 flechas y
+    # ~12 MB de JSON que el navegador no alcanza a dibujar con fluidez
+    aviso = ''
+    if n > LIMITE_MALLA:
+        n = LIMITE_MALLA
+        aviso = f'<br><sup>Malla limitada a {LIMITE_MALLA} x {LIMITE_MALLA}</sup>'
     
     # Malla
     x = np.linspace(-xmax, xmax, n)
@@ -69,25 +81,8 @@ def graficar_campo(n_clicks, fx_str, fy_str, xmax, ymax, n):
     X, Y = np.meshgrid(x, y)
 
     try:
-        diccionario = {
-            'X': X,
-            'Y': Y,
-            'np': np,
-            'sin': np.sin,
-            'cos': np.cos,
-            'tan': np.tan,
-            'sqrt': np.sqrt,
-            'exp': np.exp,
-            'pi': np.pi,
-            'e': np.e
-        }
-
-        fx = eval(fx_str, locals= diccionario)
-        fy = eval(fy_str, locals= diccionario)
-
-        mag_max = np.max(np.sqrt(fx**2 + fy**2))
-        mag_min = np.min(np.sqrt(fx**2 + fy**2))
-
+        # Expresión validada y compilada una sola vez (ver utils/expresiones.py)
+        fx, fy = evaluar_campo(fx_str, fy_str, X, Y)
 
     except Exception as e:
         fx = np.zeros_like(X)
@@ -96,25 +91,12 @@ def graficar_campo(n_clicks, fx_str, fy_str, xmax, ymax, n):
 
     fig = go.Figure()
 
-    # Dibujar vectores
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            x0, y0 = X[i, j], Y[i, j]
-            x1, y1 = x0 + fx[i, j], y0 + fy[i, j]
-        
-            fig.add_trace(go.Scatter(
-                x=[x0, x1],
-                y=[y0, y1],
-                mode='lines+markers',
-                line=dict(color='blue', width=2),
-                marker=dict(size=[3,5], color=['blue','red']),
-                showlegend=False,
-                hovertemplate=f"Punto:({x0:.1f}, {y0:.1f})<br>Vector:({fx[i,j]:.2f}, {fy[i,j]:.2f})<extra></extra>"
-            ))
+    # Dibujar vectores (una traza de flechas y una de orígenes para el hover)
+    fig.add_traces(trazas_campo_vectorial(X, Y, fx, fy))
 
     fig.update_layout(
         title=dict(
-            text=f'<b>Campo Vectorial: dx/dt={fx_str}, dy/dt={fy_str}</b>',
+            text=f'<b>Campo Vectorial: dx/dt={fx_str}, dy/dt={fy_str}</b>{aviso}',
             x=0.5,
             font=dict(size=16, color='green')
         ),
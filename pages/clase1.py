@@ -1,10 +1,76 @@
 import dash
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, State, callback, clientside_callback, ClientsideFunction
 import plotly.graph_objs as go
 import numpy as np
 
+from utils.config import CALLBACKS_EN_CLIENTE
+from utils.coalescencia import PESTANA, solo_el_ultimo
+from utils.instrumentacion import instrumentar
+
 dash.register_page(__name__, path='/pagina1', name='Modelo Exponencial',order =1)
 
+
+def actualizar_exponencial(P0, r, t_max):
+    # 1. Cálculos matemáticos
+    t = np.linspace(0, t_max, 100)
+    
+    # Modelo Exponencial
+    P_exp = P0 * np.exp(r * t)
+    
+    # Modelo Lineal (para comparar y mostrar por qué el exp es "explosivo")
+    # Asumimos crecimiento constante basado en la tasa inicial
+    P_lin = P0 + (P0 * r) * t 
+
+    # Cálculo del Tiempo de Duplicación: Td = ln(2) / r
+    if r > 0:
+        td = np.log(2) / r
+        kpi_text = f"{td:.1f} unidades de tiempo"
+    else:
+        kpi_text = "Infinito (r=0)"
+
+    # 2. Crear la Gráfica
+    fig = go.Figure()
+
+    # Traza Exponencial (La principal)
+    fig.add_trace(go.Scatter(
+        x=t, y=P_exp, mode='lines', name='Crecimiento Exponencial',
+        line=dict(color='#2563eb', width=4),
+        fill='tozeroy', # Relleno suave debajo
+        fillcolor='rgba(37, 99, 235, 0.1)' 
+    ))
+
+    # Traza Lineal (Comparación)
+    fig.add_trace(go.Scatter(
+        x=t, y=P_lin, mode='lines', name='Comparación Lineal',
+        line=dict(color='gray', width=2, dash='dot'),
+        hovertemplate='Si fuera lineal: %{y:.1f}<extra></extra>'
+    ))
+
+    # Layout limpio
+    fig.update_layout(
+        title=dict(text="<b>Curva Exponencial vs Lineal</b>", x=0.5, y=0.95, xanchor='center'),
+        xaxis_title="Tiempo (t)",
+        yaxis_title="Población P(t)",
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=40, r=40, t=60, b=80), # Márgenes corregidos
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        )
+    )
+
+    return fig, kpi_text
+
+
+# La página abre ya dibujada con los valores iniciales de los sliders; el
+# layout de esta figura (con la plantilla expandida) lo reutiliza el navegador.
+FIGURA_INICIAL, KPI_INICIAL = actualizar_exponencial(100, 0.03, 100)
+
+
 layout = html.Div([
     # --- CONTENEDOR IZQUIERDO: TEORÍA Y CONTROLES ---
     html.Div([
@@ -54,77 +120,37 @@ layout = html.Div([
         # KPI: Tiempo de Duplicación
         html.Div([
             html.H5("Tiempo de Duplicación", style={'margin': '0', 'color': '#064e3b'}),
-            html.H2(id='kpi-doubling-time', children="0 años", style={'margin': '0', 'color': '#10b981'}),
+            html.H2(id='kpi-doubling-time', children=KPI_INICIAL, style={'margin': '0', 'color': '#10b981'}),
             html.P("Tiempo necesario para que la población se multiplique por 2.", style={'fontSize': '12px', 'color': 'gray'})
         ], style={'backgroundColor': '#ecfdf5', 'padding': '15px', 'borderRadius': '10px', 'marginBottom': '20px', 'textAlign': 'center', 'border': '1px solid #a7f3d0'}),
 
         # Gráfica
         html.H3("Proyección Visual", className="title"),
-        dcc.Graph(id='graph-exponential', style={'height': '400px'})
+        dcc.Graph(id='graph-exponential', figure=FIGURA_INICIAL, style={'height': '400px'})
         
     ], className="content right", style={'width': '65%'})
 
 ], className="page-container", style={'flexDirection': 'row', 'alignItems': 'flex-start'})
 
 
-@callback(
-    [Output("graph-exponential", "figure"),
-     Output("kpi-doubling-time", "children")],
-    [Input("exp-p0", "value"),
-     Input("exp-r", "value"),
-     Input("exp-t", "value")]
-)
-def actualizar_exponencial(P0, r, t_max):
-    # 1. Cálculos matemáticos
-    t = np.linspace(0, t_max, 100)
-    
-    # Modelo Exponencial
-    P_exp = P0 * np.exp(r * t)
-    
-    # Modelo Lineal (para comparar y mostrar por qué el exp es "explosivo")
-    # Asumimos crecimiento constante basado en la tasa inicial
-    P_lin = P0 + (P0 * r) * t 
-
-    # Cálculo del Tiempo de Duplicación: Td = ln(2) / r
-    if r > 0:
-        td = np.log(2) / r
-        kpi_text = f"{td:.1f} unidades de tiempo"
-    else:
-        kpi_text = "Infinito (r=0)"
-
-    # 2. Crear la Gráfica
-    fig = go.Figure()
-
-    # Traza Exponencial (La principal)
-    fig.add_trace(go.Scatter(
-        x=t, y=P_exp, mode='lines', name='Crecimiento Exponencial',
-        line=dict(color='#2563eb', width=4),
-        fill='tozeroy', # Relleno suave debajo
-        fillcolor='rgba(37, 99, 235, 0.1)' 
-    ))
-
-    # Traza Lineal (Comparación)
-    fig.add_trace(go.Scatter(
-        x=t, y=P_lin, mode='lines', name='Comparación Lineal',
-        line=dict(color='gray', width=2, dash='dot'),
-        hovertemplate='Si fuera lineal: %{y:.1f}<extra></extra>'
-    ))
-
-    # Layout limpio
-    fig.update_layout(
-        title=dict(text="<b>Curva Exponencial vs Lineal</b>", x=0.5, y=0.95, xanchor='center'),
-        xaxis_title="Tiempo (t)",
-        yaxis_title="Población P(t)",
-        template="plotly_white",
-        hovermode="x unified",
-        margin=dict(l=40, r=40, t=60, b=80), # Márgenes corregidos
-        legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
-        )
+# Los sliders se evalúan en el navegador (assets/js/modelos_cerrados.js);
+# con CALLBACKS_EN_CLIENTE=0 se usa la versión en Python de arriba.
+if CALLBACKS_EN_CLIENTE:
+    clientside_callback(
+        ClientsideFunction(namespace='modelos', function_name='exponencial'),
+        [Output("graph-exponential", "figure"),
+         Output("kpi-doubling-time", "children")],
+        [Input("exp-p0", "value"),
+         Input("exp-r", "value"),
+         Input("exp-t", "value")],
+        State("graph-exponential", "figure")
     )
-
-    return fig, kpi_text
\ No newline at end of file
+else:
+    callback(
+        [Output("graph-exponential", "figure"),
+         Output("kpi-doubling-time", "children")],
+        [Input("exp-p0", "value"),
+         Input("exp-r", "value"),
+         Input("exp-t", "value")],
+        PESTANA
+    )(solo_el_ultimo(instrumentar(actualizar_exponencial)))
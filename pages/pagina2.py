@@ -1,11 +1,52 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, Input, Output, State, callback, no_update
 import plotly.graph_objs as go
-import numpy as np
-from scipy.integrate import odeint
+from utils.bifurcacion import A_MAX, desenlace_allee, diagrama_allee
+from utils.simulacion import simular_trayectoria
+from utils.figuras import parche_series
+from utils.funciones import figura_bifurcacion_base, parche_bifurcacion
+from utils.coalescencia import PESTANA, solo_el_ultimo
+from utils.instrumentacion import instrumentar
 
 dash.register_page(__name__, path='/pagina2', name='Modelo Logistico',order = 3)
 
+# Horizonte fijo de la simulación
+T_MAX = 50
+
+
+def figura_base():
+    # Todo lo que no depende de los sliders; se construye una vez al importar
+    fig = go.Figure()
+
+    # Curva de Población
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Población', line=dict(color='#10b981', width=4)))
+    
+    # Línea de Capacidad (K)
+    fig.add_trace(go.Scatter(x=[0, T_MAX], y=[], mode='lines', name='Capacidad (K)', 
+                             line=dict(color='gray', dash='dash')))
+    
+    # Línea de Umbral (A) - ¡La parte importante!
+    fig.add_trace(go.Scatter(x=[0, T_MAX], y=[], mode='lines', name='Umbral Crítico (A)', 
+                             line=dict(color='orange', dash='dot', width=2)))
+
+    # Área de peligro (Relleno rojo debajo de A); el callback ajusta su altura
+    fig.add_hrect(y0=0, y1=0, line_width=0, fillcolor="red", opacity=0.1, annotation_text="Zona de Extinción")
+
+    fig.update_layout(
+        title=dict(text='', x=0.5, xanchor='center'),
+        xaxis_title="Tiempo",
+        yaxis_title="Población",
+        template="plotly_white",
+        margin=dict(l=40, r=40, t=60, b=80),
+        legend=dict(orientation="h", y=-0.2, x=0.5, xanchor='center')
+    )
+    return fig
+
+
+# Figura base serializada una sola vez; los callbacks solo envían un Patch
+FIGURA_BASE = figura_base().to_dict()
+FIGURA_BIFURCACION = figura_bifurcacion_base("Umbral de extinción (A)").to_dict()
+
 layout = html.Div([
     # --- ENCABEZADO ---
     html.Div([
@@ -26,27 +67,29 @@ layout = html.Div([
         # --- CONTROLES ---
         html.Div([
             html.H4("Parámetros", className="title", style={'fontSize':'18px'}),
+            # Cada slider manda su valor al soltarlo (updatemode='mouseup'); si aun
+            # así llegan varios seguidos, el callback solo resuelve el último.
             
             html.Label("Población Inicial (P0) - ¡Prueba debajo de A!"),
-            dcc.Slider(min=0, max=100, step=5, value=30, id='allee-p0',
+            dcc.Slider(min=0, max=100, step=5, value=30, id='allee-p0', updatemode='mouseup',
                        marks={0:'0', 100:'100'}, 
                        tooltip={"placement": "bottom", "always_visible": True}),
             
             html.Br(),
             html.Label("Umbral de Extinción (A)"),
-            dcc.Slider(min=0, max=50, step=5, value=20, id='allee-a',
+            dcc.Slider(min=0, max=50, step=5, value=20, id='allee-a', updatemode='mouseup',
                        marks={0:'0', 20:'20', 50:'50'}, 
                        tooltip={"placement": "bottom", "always_visible": True}),
             
             html.Br(),
             html.Label("Capacidad de Carga (K)"),
-            dcc.Slider(min=100, max=500, step=50, value=300, id='allee-k',
+            dcc.Slider(min=100, max=500, step=50, value=300, id='allee-k', updatemode='mouseup',
                        marks={100:'100', 500:'500'}, 
                        tooltip={"placement": "bottom", "always_visible": True}),
             
             html.Br(),
             html.Label("Tasa de Crecimiento (r)"),
-            dcc.Slider(min=0.1, max=1.0, step=0.1, value=0.5, id='allee-r',
+            dcc.Slider(min=0.1, max=1.0, step=0.1, value=0.5, id='allee-r', updatemode='mouseup',
                        marks={0.1:'0.1', 1.0:'1.0'}, 
                        tooltip={"placement": "bottom", "always_visible": True}),
 
@@ -55,39 +98,32 @@ layout = html.Div([
         # --- GRÁFICA ---
         html.Div([
             html.H3("Dinámica Poblacional", className="title"),
-            dcc.Graph(id='grafica-allee', style={'height': '400px'}),
-            html.Div(id='mensaje-allee', style={'textAlign': 'center', 'marginTop': '10px', 'fontWeight': 'bold'})
+            dcc.Graph(id='grafica-allee', figure=FIGURA_BASE, style={'height': '400px'}),
+            html.Div(id='mensaje-allee', style={'textAlign': 'center', 'marginTop': '10px', 'fontWeight': 'bold'}),
+            dcc.Graph(id='bifurcacion-allee', figure=FIGURA_BIFURCACION, style={'height': '400px'}),
+            html.P("Los equilibrios son 0 y K (estables) y A (el umbral, inestable): quien empieza bajo "
+                   "la línea roja se extingue. Si A supera a K intercambian papeles (bifurcación transcrítica).",
+                   style={'textAlign': 'center', 'fontSize': '14px', 'color': 'gray'})
         ], className="content right", style={'width': '70%'})
 
     ], className="page-container", style={'flexDirection': 'row', 'alignItems': 'flex-start'})
 ])
 
-# Ecuación Diferencial del Efecto Allee
-def modelo_allee(P, t, r, K, A):
-    # dP/dt = r * P * (1 - P/K) * (P/A - 1)
-    return r * P * (1 - P/K) * (P/A - 1)
-
-@callback(
-    [Output("grafica-allee", "figure"),
-     Output("mensaje-allee", "children"),
-     Output("mensaje-allee", "style")],
-    [Input("allee-p0", "value"),
-     Input("allee-a", "value"),
-     Input("allee-k", "value"),
-     Input("allee-r", "value")]
-)
 def actualizar_allee(P0, A, K, r):
-    t = np.linspace(0, 50, 200)
-    
-    # Resolver EDO
-    P = odeint(modelo_allee, P0, t, args=(r, K, A))
+    # Resolver EDO (modelo 'allee' del registro en utils/modelos.py)
+    t, P = simular_trayectoria('allee', [P0], T_MAX, {'r': r, 'K': K, 'A': A})
     P = P.flatten()
     
-    # Análisis del resultado
-    final_p = P[-1]
-    
+    # Análisis del resultado: el desenlace sale de la tabla de equilibrios
+    # (utils/bifurcacion.py), no de dónde quedó P en T_MAX
+    d = desenlace_allee(P0, r, K, A)
+
     # Lógica de colores y mensajes
-    if final_p < 1: # Extinción
+    if d is None: # La EDO no tiene sentido (p.ej. A = 0: P/A explota)
+        color_linea = '#6b7280' # Gris
+        msg = " No se puede simular con estos parámetros: el umbral A debe ser mayor que 0."
+        msg_style = {'color': '#6b7280', 'fontSize': '16px'}
+    elif d['se_extingue']: # Extinción
         color_linea = '#ef4444' # Rojo
         msg = " La población se extinguió (P0 < A). No hubo suficientes individuos para reproducirse."
         msg_style = {'color': '#ef4444', 'fontSize': '16px'}
@@ -96,30 +132,42 @@ def actualizar_allee(P0, A, K, r):
         msg = " La población prosperó y alcanzó su capacidad de carga (P0 > A)."
         msg_style = {'color': '#10b981', 'fontSize': '16px'}
 
-    # Graficar
-    fig = go.Figure()
+    # Graficar: solo lo que depende de los sliders (el resto está en FIGURA_BASE)
+    fig = parche_series(t, P)
+    fig['data'][0]['line']['color'] = color_linea
+    fig['data'][1]['y'] = [K, K]
+    fig['data'][2]['y'] = [A, A]
+    # Área de peligro y su etiqueta suben con A
+    fig['layout']['shapes'][0]['y1'] = A
+    fig['layout']['annotations'][0]['y'] = A
+    fig['layout']['title']['text'] = f'<b>Población Inicial: {P0} vs Umbral: {A}</b>'
 
-    # Curva de Población
-    fig.add_trace(go.Scatter(x=t, y=P, mode='lines', name='Población', line=dict(color=color_linea, width=4)))
-    
-    # Línea de Capacidad (K)
-    fig.add_trace(go.Scatter(x=[0, 50], y=[K, K], mode='lines', name='Capacidad (K)', 
-                             line=dict(color='gray', dash='dash')))
-    
-    # Línea de Umbral (A) - ¡La parte importante!
-    fig.add_trace(go.Scatter(x=[0, 50], y=[A, A], mode='lines', name='Umbral Crítico (A)', 
-                             line=dict(color='orange', dash='dot', width=2)))
+    return fig, msg, msg_style
 
-    # Área de peligro (Relleno rojo debajo de A)
-    fig.add_hrect(y0=0, y1=A, line_width=0, fillcolor="red", opacity=0.1, annotation_text="Zona de Extinción")
 
-    fig.update_layout(
-        title=dict(text=f'<b>Población Inicial: {P0} vs Umbral: {A}</b>', x=0.5, xanchor='center'),
-        xaxis_title="Tiempo",
-        yaxis_title="Población",
-        template="plotly_white",
-        margin=dict(l=40, r=40, t=60, b=80),
-        legend=dict(orientation="h", y=-0.2, x=0.5, xanchor='center')
-    )
+# Si el slider se mueve a saltos, solo se resuelve el último valor de cada pestaña
+callback(
+    [Output("grafica-allee", "figure"),
+     Output("mensaje-allee", "children"),
+     Output("mensaje-allee", "style")],
+    [Input("allee-p0", "value"),
+     Input("allee-a", "value"),
+     Input("allee-k", "value"),
+     Input("allee-r", "value")],
+    PESTANA
+)(solo_el_ultimo(instrumentar(actualizar_allee)))
 
-    return fig, msg, msg_style
\ No newline at end of file
+
+@callback(
+    Output("bifurcacion-allee", "figure"),
+    [Input("allee-p0", "value"),
+     Input("allee-a", "value"),
+     Input("allee-k", "value")]
+)
+@instrumentar
+def actualizar_bifurcacion_allee(P0, A, K):
+    # Los equilibrios no dependen de r (solo fija la rapidez): alcanza con A y K
+    if not A or not K:
+        return no_update
+    marcas = [(A, A, f"umbral A = {A:g}"), (K, K, "A = K")]
+    return parche_bifurcacion(diagrama_allee(), K, K, A, P0, marcas, A_MAX * K)
@@ -1,10 +1,82 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, Input, Output, State, callback, clientside_callback, ClientsideFunction
 import numpy as np
 import plotly.graph_objs as go
 
+from utils.config import CALLBACKS_EN_CLIENTE
+from utils.figuras import compactar, parche_series
+from utils.coalescencia import PESTANA, solo_el_ultimo
+from utils.instrumentacion import instrumentar
+
 dash.register_page(__name__, path='/pagina3', name='Modelo Logístico', order =4)
 
+
+def curvas_logistica(P0, r, K, t_max):
+
+    t = np.linspace(0, t_max, 200)
+
+    P = (K * P0 * np.exp(r * t)) / (K + P0 * (np.exp(r * t) - 1))
+    
+
+    P_fase = np.linspace(0, K * 1.1, 100) 
+    dP_dt = r * P_fase * (1 - P_fase / K)
+    return t, P, P_fase, dP_dt
+
+
+def actualizar_logistica(P0, r, K, t_max):
+    t, P, P_fase, dP_dt = (compactar(v) for v in curvas_logistica(P0, r, K, t_max))
+
+    fig1 = go.Figure()
+    fig1.add_trace(go.Scatter(x=t, y=P, mode='lines', name='Población', line=dict(color='#10b981', width=3)))
+    # Línea de capacidad de carga
+    fig1.add_trace(go.Scatter(x=[0, t_max], y=[K, K], mode='lines', name='Capacidad (K)', 
+                             line=dict(color='red', dash='dash')))
+    
+    fig1.update_layout(
+        title="Curva Sigmoidea (S)",
+        xaxis_title="Tiempo", yaxis_title="Población",
+        margin=dict(l=20, r=20, t=50, b=50),
+        template="plotly_white",
+        legend=dict(orientation="h", y=1.5 , x = 0.5, xanchor="center")
+    )
+
+
+    fig2 = go.Figure()
+    fig2.add_trace(go.Scatter(x=P_fase, y=dP_dt, mode='lines', name='Velocidad', 
+                             fill='tozeroy', line=dict(color='#3b82f6')))
+    
+    max_val = np.max(dP_dt)
+    fig2.add_annotation(x=K/2, y=max_val, text="Máx Crecimiento (K/2)", showarrow=True, arrowhead=1)
+
+    fig2.update_layout(
+        title="Espacio de Fase: Velocidad vs Población",
+        xaxis_title="Población (P)", yaxis_title="Velocidad (dP/dt)",
+        margin=dict(l=20, r=20, t=50, b=50),
+        template="plotly_white"
+    )
+
+    return fig1, fig2
+
+
+def parche_logistica(P0, r, K, t_max):
+    # Versión del servidor con Patch: sobre las figuras iniciales solo cambian
+    # los datos, la línea K y la anotación del máximo
+    t, P, P_fase, dP_dt = curvas_logistica(P0, r, K, t_max)
+
+    fig1 = parche_series(t, P)
+    fig1['data'][1]['x'] = [0, t_max]
+    fig1['data'][1]['y'] = [K, K]
+
+    fig2 = parche_series(P_fase, dP_dt)
+    fig2['layout']['annotations'][0]['x'] = K / 2
+    fig2['layout']['annotations'][0]['y'] = float(np.max(dP_dt))
+    return fig1, fig2
+
+
+# Figuras iniciales dibujadas en el servidor (el navegador reutiliza su layout)
+FIGURA_TIEMPO_INICIAL, FIGURA_FASE_INICIAL = actualizar_logistica(50, 0.1, 800, 100)
+
+
 layout = html.Div([
     # --- ENCABEZADO CON ECUACIÓN (MathJax) ---
     html.Div([
@@ -48,12 +120,12 @@ layout = html.Div([
         html.Div([
             dcc.Tabs([
                 dcc.Tab(label='Población vs Tiempo', children=[
-                    dcc.Graph(id='grafica-logistica-tiempo')
+                    dcc.Graph(id='grafica-logistica-tiempo', figure=FIGURA_TIEMPO_INICIAL)
                 ]),
                 dcc.Tab(label='Velocidad de Crecimiento (dP/dt)', children=[
                      html.P("Esta parábola muestra que el crecimiento es máximo cuando P = K/2", 
                             style={'textAlign':'center', 'fontSize':'12px', 'color':'gray', 'marginTop':'10px'}),
-                    dcc.Graph(id='grafica-logistica-fase')
+                    dcc.Graph(id='grafica-logistica-fase', figure=FIGURA_FASE_INICIAL)
                 ]),
             ])
         ], className="content right", style={'width': '70%'})
@@ -61,52 +133,28 @@ layout = html.Div([
     ], className="page-container", style={'flexDirection': 'row', 'alignItems': 'flex-start'})
 ])
 
-@callback(
-    [Output("grafica-logistica-tiempo", "figure"),
-     Output("grafica-logistica-fase", "figure")],
-    [Input("slider-p0", "value"),
-     Input("slider-r", "value"),
-     Input("slider-k", "value"),
-     Input("slider-t", "value")]
-)
-def actualizar_logistica(P0, r, K, t_max):
-
-    t = np.linspace(0, t_max, 200)
-
-    P = (K * P0 * np.exp(r * t)) / (K + P0 * (np.exp(r * t) - 1))
-    
-
-    P_fase = np.linspace(0, K * 1.1, 100) 
-    dP_dt = r * P_fase * (1 - P_fase / K)
-
-
-    fig1 = go.Figure()
-    fig1.add_trace(go.Scatter(x=t, y=P, mode='lines', name='Población', line=dict(color='#10b981', width=3)))
-    # Línea de capacidad de carga
-    fig1.add_trace(go.Scatter(x=[0, t_max], y=[K, K], mode='lines', name='Capacidad (K)', 
-                             line=dict(color='red', dash='dash')))
-    
-    fig1.update_layout(
-        title="Curva Sigmoidea (S)",
-        xaxis_title="Tiempo", yaxis_title="Población",
-        margin=dict(l=20, r=20, t=50, b=50),
-        template="plotly_white",
-        legend=dict(orientation="h", y=1.5 , x = 0.5, xanchor="center")
-    )
-
-
-    fig2 = go.Figure()
-    fig2.add_trace(go.Scatter(x=P_fase, y=dP_dt, mode='lines', name='Velocidad', 
-                             fill='tozeroy', line=dict(color='#3b82f6')))
-    
-    max_val = np.max(dP_dt)
-    fig2.add_annotation(x=K/2, y=max_val, text="Máx Crecimiento (K/2)", showarrow=True, arrowhead=1)
 
-    fig2.update_layout(
-        title="Espacio de Fase: Velocidad vs Población",
-        xaxis_title="Población (P)", yaxis_title="Velocidad (dP/dt)",
-        margin=dict(l=20, r=20, t=50, b=50),
-        template="plotly_white"
+# Los sliders se evalúan en el navegador (assets/js/modelos_cerrados.js);
+# con CALLBACKS_EN_CLIENTE=0 se usa la versión en Python (con Patch).
+if CALLBACKS_EN_CLIENTE:
+    clientside_callback(
+        ClientsideFunction(namespace='modelos', function_name='logistica'),
+        [Output("grafica-logistica-tiempo", "figure"),
+         Output("grafica-logistica-fase", "figure")],
+        [Input("slider-p0", "value"),
+         Input("slider-r", "value"),
+         Input("slider-k", "value"),
+         Input("slider-t", "value")],
+        [State("grafica-logistica-tiempo", "figure"),
+         State("grafica-logistica-fase", "figure")]
     )
-
-    return fig1, fig2
\ No newline at end of file
+else:
+    callback(
+        [Output("grafica-logistica-tiempo", "figure"),
+         Output("grafica-logistica-fase", "figure")],
+        [Input("slider-p0", "value"),
+         Input("slider-r", "value"),
+         Input("slider-k", "value"),
+         Input("slider-t", "value")],
+        PESTANA
+    )(solo_el_ultimo(instrumentar(parche_logistica)))
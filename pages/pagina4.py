@@ -1,10 +1,16 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, Input, Output, State, callback, no_update
 # Importamos la nueva función desde tu archivo utils
-from utils.funciones import funcion_grafica_cosecha 
+from utils.bifurcacion import ETA_MAX, desenlace_cosecha, diagrama_cosecha
+from utils.funciones import figura_bifurcacion_base, figura_cosecha_base, parche_bifurcacion, parche_cosecha
+from utils.instrumentacion import instrumentar
 
 dash.register_page(__name__, path='/pagina4', name='Modelo Cosecha' , order=5)
 
+# Figura base serializada una sola vez; el callback solo envía un Patch
+FIGURA_BASE = figura_cosecha_base().to_dict()
+FIGURA_BIFURCACION = figura_bifurcacion_base("Tasa de cosecha (h)").to_dict()
+
 layout = html.Div([
     # --- ENCABEZADO ---
     html.Div([
@@ -59,11 +65,23 @@ layout = html.Div([
             html.H3("Simulación", className="title"),
             dcc.Graph(
                 id='grafica-poblacion-cosecha',
+                figure=FIGURA_BASE,
                 style={'height': '450px', 'width': '100%'}
             ),
             # Mensaje explicativo
             html.P("Si la línea se vuelve ROJA, significa que la cosecha es excesiva y la población se extingue.", 
-                   style={'textAlign':'center', 'fontSize':'14px', 'marginTop':'10px', 'color':'gray'})
+                   style={'textAlign':'center', 'fontSize':'14px', 'marginTop':'10px', 'color':'gray'}),
+
+            # Veredicto sin integrar (tabla precalculada) y diagrama de bifurcación
+            html.Div(id='veredicto-cosecha', style={'textAlign': 'center', 'marginTop': '10px', 'fontWeight': 'bold'}),
+            dcc.Graph(
+                id='bifurcacion-cosecha',
+                figure=FIGURA_BIFURCACION,
+                style={'height': '400px', 'width': '100%'}
+            ),
+            html.P("Cada h tiene dos equilibrios: el verde (estable) y el rojo (umbral). Al llegar a h* = rK/4 "
+                   "chocan y desaparecen: con más cosecha la población se extingue desde cualquier P(0).",
+                   style={'textAlign':'center', 'fontSize':'14px', 'color':'gray'})
 
         ], className="content right", style={'width':'65%'})
         
@@ -81,6 +99,7 @@ layout = html.Div([
     State("input-t", "value"),
     prevent_initial_call=False
 )
+@instrumentar
 def actualizar_grafica_cosecha(n_clicks, h, P0, r, K, t_max):
     # Convertimos a float por seguridad
     h = float(h) if h else 0
@@ -89,7 +108,43 @@ def actualizar_grafica_cosecha(n_clicks, h, P0, r, K, t_max):
     K = float(K)
     t_max = float(t_max)
 
-    # Llamamos a la función que está en utils/funciones.py
-    fig = funcion_grafica_cosecha(n_clicks, P0, r, K, t_max, h)
-    
-    return fig
\ No newline at end of file
+    # Llamamos a la función que está en utils/funciones.py (Patch sobre FIGURA_BASE)
+    return parche_cosecha(P0, r, K, t_max, h)
+
+
+@callback(
+    Output("bifurcacion-cosecha", "figure"),
+    Output("veredicto-cosecha", "children"),
+    Output("veredicto-cosecha", "style"),
+    Input("btn-cosecha", "n_clicks"),
+    Input("slider-h", "value"),
+    State("input-p0", "value"),
+    State("input-r", "value"),
+    State("input-k", "value"),
+    State("input-t", "value"),
+    prevent_initial_call=False
+)
+@instrumentar
+def actualizar_bifurcacion_cosecha(n_clicks, h, P0, r, K, t_max):
+    # "¿Se extingue?" sale de la tabla de utils/bifurcacion.py en O(1), sin
+    # esperar a la integración de la otra gráfica
+    h = float(h) if h else 0
+    d = desenlace_cosecha(P0, r, K, h)
+    if d is None:
+        return (no_update, "Para el diagrama hacen falta r > 0, K > 0 y P(0) >= 0.",
+                {'color': '#6b7280', 'fontSize': '16px'})
+
+    marcas = [(d['h_critico'], K / 2, f"h* = rK/4 = {d['h_critico']:.4g}")]
+    fig = parche_bifurcacion(diagrama_cosecha(), r * K, K, h, P0, marcas, ETA_MAX * r * K)
+
+    if d['se_extingue']:
+        if h > d['h_critico']:
+            causa = f"la cosecha supera el máximo sostenible h* = {d['h_critico']:.4g}"
+        else:
+            causa = f"P(0) está por debajo del umbral {d['umbral']:.1f}"
+        cuando = f"hacia el día {d['dia']:.1f}" if t_max is None or d['dia'] <= t_max else \
+            f"hacia el día {d['dia']:.1f}, después del horizonte t = {t_max:g}"
+        return fig, f"Se extingue {cuando}: {causa}.", {'color': '#ef4444', 'fontSize': '16px'}
+    # El equilibrio estable es el simétrico del umbral respecto de K/2
+    return (fig, f"Sobrevive y tiende a P* = {K - d['umbral']:.1f} (h = {h:g} < h* = {d['h_critico']:.4g}).",
+            {'color': '#10b981', 'fontSize': '16px'})
@@ -2,10 +2,78 @@ import dash
 from dash import html, dcc, Input, Output, State, callback
 import numpy as np
 import plotly.graph_objs as go
-from scipy.integrate import odeint 
+from utils.simulacion import simular_trayectoria
+from utils.estocastico import banda, simular_estocastico
+from utils.figuras import parche_series, parche_vacio, trazas_banda
+from utils.config import LIMITE_DIAS
+from utils.instrumentacion import instrumentar
 
 dash.register_page(__name__, path='/Pagina6', name='Modelo SIR',order =6)
 
+def figura_base():
+    # Layout, colores y ejes fijos: se construye una vez al importar la página
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=[], y=[], mode='lines', name='Susceptibles (S)', 
+        line=dict(color='blue', width=2), 
+        hovertemplate='Día: %{x:.1f}<br>Susceptibles: %{y:.0f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[], y=[], mode='lines', name='Infectados (I)', 
+        line=dict(color='red', width=2),
+        hovertemplate='Día: %{x:.1f}<br>Infectados: %{y:.0f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[], y=[], mode='lines', name='Recuperados (R)', 
+        line=dict(color='green', width=2),
+        hovertemplate='Día: %{x:.1f}<br>Recuperados: %{y:.0f}<extra></extra>'
+    ))
+    # Banda estocástica de los infectados (vacía si no se pide)
+    fig.add_traces(trazas_banda('Infectados estocástico', 'red', 'rgba(255, 0, 0, 0.15)'))
+    
+    fig.update_layout(
+        title=dict(
+            text='<b>Evolución del Modelo SIR</b>',
+            x=0.5,
+            font=dict(size=16, color='darkblue')
+        ),
+        xaxis_title="Tiempo (días)",
+        yaxis_title="Número de personas",
+        plot_bgcolor='white',
+        margin=dict(l=40, r=40, t=80, b=40),  # más espacio arriba
+        paper_bgcolor='lightcyan',
+        font=dict(family="Outfit", size=12, color='black'),
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=-0.15,          # leyenda debajo de la gráfica
+            xanchor="center",
+            x=0.5
+        )
+    )
+
+    fig.update_yaxes(
+        showgrid=True, 
+        gridwidth=1, 
+        gridcolor='Lightgrey',
+        zeroline=True, 
+        zerolinewidth=2, 
+        zerolinecolor='grey'
+    )
+    fig.update_xaxes(
+        showgrid=True, 
+        gridwidth=1, 
+        gridcolor='Lightgrey',
+        zeroline=True, 
+        zerolinewidth=2, 
+        zerolinecolor='grey'
+    )   
+    return fig
+
+
+# Figura base serializada una sola vez; el callback solo envía un Patch
+FIGURA_BASE = figura_base().to_dict()
+
 layout = html.Div([
     html.Div([
         html.H4("Modelo SIR - Epidemiología", className="title"),
@@ -35,26 +103,23 @@ layout = html.Div([
             dcc.Input(id="input-tiempo", type="number", value=160, className="input-field")
         ], className="input-group"),
 
+        dcc.Checklist(
+            id="input-estocastico-sir",
+            options=[{'label': ' Simulación estocástica (1000 realizaciones)', 'value': 'si'}],
+            value=[]
+        ),
+
         html.Button("Simular epidemia", id="btn-simular", className="btn-generar"),
         
     ], className="content left"),
 
     html.Div([
         html.H3("Evolución de la epidemia", className="title"),
-        dcc.Graph(id="graph-SIR", style={'height': '450px', 'width': '100%'})
+        dcc.Graph(id="graph-SIR", figure=FIGURA_BASE, style={'height': '450px', 'width': '100%'})
     ], className="content right"),
 ], className="page-container")
 
 
-# Función del sistema de ecuaciones diferenciales SIR
-def ecuaciones_SIR(y, t, N, beta, gamma):
-    S, I, R = y
-    dSdt = -beta * S * I / N
-    dIdt = beta * S * I / N - gamma * I
-    dRdt = gamma * I
-    return dSdt, dIdt, dRdt
-
-
 @callback(
     Output("graph-SIR", "figure"),
     Input("btn-simular", "n_clicks"),
@@ -63,12 +128,14 @@ def ecuaciones_SIR(y, t, N, beta, gamma):
     State("input-gamma", "value"),
     State("input-I0", "value"),
     State("input-tiempo", "value"),
+    State("input-estocastico-sir", "value"),
     prevent_initial_call=False
 )
-def actualizar_grafica_SIR(n_clicks, N, beta, gamma, I0, tiempo_max):
-    # Validar inputs
+@instrumentar
+def actualizar_grafica_SIR(n_clicks, N, beta, gamma, I0, tiempo_max, estocastico=None):
+    # Validar inputs (se vacían las curvas pero se conserva el layout)
     if None in (N, beta, gamma, I0, tiempo_max) or N <= 0 or I0 < 0:
-        return go.Figure()
+        return parche_vacio(6)
     
     # Convertir a números
     N = float(N)
@@ -82,70 +149,30 @@ def actualizar_grafica_SIR(n_clicks, N, beta, gamma, I0, tiempo_max):
     R0_inicial = 0
     y0 = [S0, I0, R0_inicial]
     
-    # Vector de tiempo
-    t = np.linspace(0, tiempo_max, 300)
-    
     try:
-        # Resolver el sistema de ecuaciones diferenciales
-        solucion = odeint(ecuaciones_SIR, y0, t, args=(N, beta, gamma))
+        # Resolver el sistema de ecuaciones diferenciales (el vector de tiempo
+        # lo elige el integrador). beta*S*I/N es el SIR del registro con b = beta/N
+        t, solucion = simular_trayectoria('sir', y0, tiempo_max, {'b': beta / N, 'k': gamma})
         S, I, R = solucion.T
     except Exception as e:
+        t = np.array([0, tiempo_max])
         S = np.full_like(t, S0)
         I = np.full_like(t, I0)
         R = np.full_like(t, R0_inicial)
 
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=t, y=S, mode='lines', name='Susceptibles (S)', 
-        line=dict(color='blue', width=2), 
-        hovertemplate='Día: %{x:.1f}<br>Susceptibles: %{y:.0f}<extra></extra>'
-    ))
-    fig.add_trace(go.Scatter(
-        x=t, y=I, mode='lines', name='Infectados (I)', 
-        line=dict(color='red', width=2),
-        hovertemplate='Día: %{x:.1f}<br>Infectados: %{y:.0f}<extra></extra>'
-    ))
-    fig.add_trace(go.Scatter(
-        x=t, y=R, mode='lines', name='Recuperados (R)', 
-        line=dict(color='green', width=2),
-        hovertemplate='Día: %{x:.1f}<br>Recuperados: %{y:.0f}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        title=dict(
-            text='<b>Evolución del Modelo SIR</b>',
-            x=0.5,
-            font=dict(size=16, color='darkblue')
-        ),
-        xaxis_title="Tiempo (días)",
-        yaxis_title="Número de personas",
-        plot_bgcolor='white',
-        margin=dict(l=40, r=40, t=80, b=40),  # más espacio arriba
-        paper_bgcolor='lightcyan',
-        font=dict(family="Outfit", size=12, color='black'),
-        legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.15,          # leyenda debajo de la gráfica
-            xanchor="center",
-            x=0.5
-        )
-    )
+    # Solo viajan los datos de las tres curvas (el resto está en FIGURA_BASE)
+    fig = parche_series(t, S, I, R)
 
-    fig.update_yaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='Lightgrey',
-        zeroline=True, 
-        zerolinewidth=2, 
-        zerolinecolor='grey'
-    )
-    fig.update_xaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='Lightgrey',
-        zeroline=True, 
-        zerolinewidth=2, 
-        zerolinecolor='grey'
-    )   
-    return fig
\ No newline at end of file
+    # Con pocos infectados iniciales la epidemia se puede apagar por azar:
+    # banda 5-95 % de I y probabilidad de brote mayor (semilla fija, para que
+    # el mismo escenario dé la misma banda)
+    titulo = '<b>Evolución del Modelo SIR</b>'
+    if estocastico and 0 < tiempo_max <= LIMITE_DIAS:
+        res = simular_estocastico('sir', y0, tiempo_max, {'b': beta / N, 'k': gamma}, semilla=0)
+        parche_series(res['t'], *banda(res, 1), parche=fig, desde=3)
+        titulo += (f"<br><sup>{res['realizaciones']} realizaciones: P(brote mayor) = "
+                   f"{res['prob_brote']:.0%} (teórica {res['prob_brote_teorica']:.0%})</sup>")
+    else:
+        parche_vacio(3, parche=fig, desde=3)
+    fig['layout']['title']['text'] = titulo
+    return fig
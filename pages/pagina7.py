@@ -1,8 +1,12 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, Input, Output, State, Patch, callback
 import numpy as np
 import plotly.graph_objs as go
-from scipy.integrate import odeint 
+from utils.simulacion import simular_trayectoria
+from utils.estocastico import banda, simular_estocastico
+from utils.figuras import arreglo, parche_series, parche_vacio, trazas_banda
+from utils.config import LIMITE_DIAS
+from utils.instrumentacion import instrumentar
 
 dash.register_page(__name__, path='/Pagina7', name='Modelo SEIR',order = 7)
 
@@ -24,6 +28,79 @@ tab_selected_style = {
     'borderRadius': '10px 10px 0px 0px',
 }
 
+def figura_tiempo_base():
+    # --- FIGURA 1: Serie de Tiempo (La clásica) --- sin datos
+    fig_time = go.Figure()
+    fig_time.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Susceptibles', line=dict(color='#3b82f6')))
+    fig_time.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Expuestos', line=dict(color='#f59e0b', dash='dash')))
+    fig_time.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Infectados', line=dict(color='#ef4444', width=3)))
+    fig_time.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Recuperados', line=dict(color='#10b981')))
+    # Banda estocástica de los infectados (vacía si no se pide)
+    fig_time.add_traces(trazas_banda('Infectados estocástico', '#ef4444', 'rgba(239, 68, 68, 0.15)'))
+    
+    fig_time.update_layout(
+        title="Evolución en el Tiempo",
+        xaxis_title="Días",
+        yaxis_title="Población",
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=20, r=20, t=50, b=20),
+        legend=dict(orientation="h", y=1.15,x=0.5,xanchor="center")
+    )
+    return fig_time
+
+
+def figura_3d_base():
+    # --- FIGURA 2: Retrato de Fase 3D --- sin datos
+    # Mostramos Susceptibles vs Infectados vs Recuperados
+    fig_3d = go.Figure(data=[go.Scatter3d(
+        x=[],
+        y=[],
+        z=[],
+        mode='lines',
+        line=dict(
+            colorscale='Viridis',  # El color varía según el tiempo
+            width=5
+        ),
+        name='Trayectoria',
+        hovertemplate='S: %{x:.0f}<br>I: %{y:.0f}<br>R: %{z:.0f}<extra></extra>'
+    )])
+
+    # Agregamos punto de inicio y final para referencia
+    fig_3d.add_trace(go.Scatter3d(
+        x=[], y=[], z=[], mode='markers', name='Inicio', marker=dict(size=5, color='green')
+    ))
+    fig_3d.add_trace(go.Scatter3d(
+        x=[], y=[], z=[], mode='markers', name='Final', marker=dict(size=5, color='red')
+    ))
+
+    fig_3d.update_layout(
+        title="Espacio de Fase (S vs I vs R)",
+        scene=dict(
+            xaxis_title='Susceptibles',
+            yaxis_title='Infectados',
+            zaxis_title='Recuperados',
+            camera=dict(eye=dict(x=1.5, y=1.5, z=1.5)) # Perspectiva inicial
+        ),
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig_3d
+
+
+# Figuras base serializadas una sola vez; el callback solo envía Patches
+FIGURA_TIEMPO_BASE = figura_tiempo_base().to_dict()
+FIGURA_3D_BASE = figura_3d_base().to_dict()
+
+
+def parche_3d_vacio():
+    parche = Patch()
+    for i in range(3):
+        parche['data'][i]['x'] = []
+        parche['data'][i]['y'] = []
+        parche['data'][i]['z'] = []
+    return parche
+
+
 layout = html.Div([
     # --- CONTENEDOR IZQUIERDO: PARÁMETROS ---
     html.Div([
@@ -65,6 +142,12 @@ layout = html.Div([
             dcc.Input(id="input-tiempo-seir", type="number", value=160, className="input-field")
         ], className="input-group"),
 
+        dcc.Checklist(
+            id="input-estocastico-seir",
+            options=[{'label': ' Simulación estocástica (1000 realizaciones)', 'value': 'si'}],
+            value=[]
+        ),
+
         html.Button("Simular Escenarios", id="btn-simular-seir", className="btn-generar"),
         
     ], className="content left"),
@@ -76,12 +159,12 @@ layout = html.Div([
         # Agregamos Tabs para tener dos vistas diferentes
         dcc.Tabs([
             dcc.Tab(label='Serie de Tiempo (2D)', children=[
-                dcc.Graph(id="graph-SEIR-time", style={'height': '450px', 'width': '100%'})
+                dcc.Graph(id="graph-SEIR-time", figure=FIGURA_TIEMPO_BASE, style={'height': '450px', 'width': '100%'})
             ], style=tab_style, selected_style=tab_selected_style),
             
             dcc.Tab(label='Espacio de Fase (3D)', children=[
                 html.P("Trayectoria S-I-R: Visualiza cómo converge el sistema.", style={'textAlign':'center', 'fontSize':'12px', 'color':'gray'}),
-                dcc.Graph(id="graph-SEIR-3d", style={'height': '450px', 'width': '100%'})
+                dcc.Graph(id="graph-SEIR-3d", figure=FIGURA_3D_BASE, style={'height': '450px', 'width': '100%'})
             ], style=tab_style, selected_style=tab_selected_style),
         ])
         
@@ -89,16 +172,6 @@ layout = html.Div([
 ], className="page-container")
 
 
-# Función del sistema de ecuaciones diferenciales SEIR
-def ecuaciones_SEIR(y, t, N, beta, sigma, gamma):
-    S, E, I, R = y
-    dSdt = -beta * S * I / N
-    dEdt = beta * S * I / N - sigma * E
-    dIdt = sigma * E - gamma * I
-    dRdt = gamma * I
-    return dSdt, dEdt, dIdt, dRdt
-
-
 @callback(
     [Output("graph-SEIR-time", "figure"),
      Output("graph-SEIR-3d", "figure")],
@@ -110,80 +183,60 @@ def ecuaciones_SEIR(y, t, N, beta, sigma, gamma):
     State("input-E0", "value"),
     State("input-I0-seir", "value"),
     State("input-tiempo-seir", "value"),
+    State("input-estocastico-seir", "value"),
     prevent_initial_call=False
 )
-def actualizar_graficas_SEIR(n_clicks, N, beta, sigma, gamma, E0, I0, tiempo_max):
-    # Validar inputs básicos
+@instrumentar
+def actualizar_graficas_SEIR(n_clicks, N, beta, sigma, gamma, E0, I0, tiempo_max, estocastico=None):
+    # Validar inputs básicos (se vacían las curvas pero se conserva el layout)
     if None in (N, beta, sigma, gamma, E0, I0, tiempo_max):
-        return go.Figure(), go.Figure()
+        return parche_vacio(7), parche_3d_vacio()
     
     # Conversión segura
     N, beta, sigma, gamma = float(N), float(beta), float(sigma), float(gamma)
     E0, I0, tiempo_max = float(E0), float(I0), float(tiempo_max)
+
+    # Límite de horizonte antes de integrar (el integrador adaptativo es
+    # barato incluso a 100000 días, pero no se acepta cualquier valor)
+    if not 0 < tiempo_max <= LIMITE_DIAS:
+        fig_time = parche_vacio(7)
+        fig_time['layout']['title']['text'] = f"Los días a simular deben ser mayores que 0 y como máximo {LIMITE_DIAS:.0f}"
+        return fig_time, parche_3d_vacio()
     
     # Condiciones iniciales
     S0 = N - E0 - I0
     R0_inicial = 0
     y0 = [S0, E0, I0, R0_inicial]
     
-    t = np.linspace(0, tiempo_max, 300)
-    
     try:
-        solucion = odeint(ecuaciones_SEIR, y0, t, args=(N, beta, sigma, gamma))
+        # SEIR del registro con b = beta/N (pasos adaptativos del integrador)
+        t, solucion = simular_trayectoria('seir', y0, tiempo_max, {'b': beta / N, 'sigma': sigma, 'gamma': gamma})
         S, E, I, R = solucion.T
     except:
-        return go.Figure(), go.Figure()
-
-    # --- FIGURA 1: Serie de Tiempo (La clásica) ---
-    fig_time = go.Figure()
-    fig_time.add_trace(go.Scatter(x=t, y=S, mode='lines', name='Susceptibles', line=dict(color='#3b82f6')))
-    fig_time.add_trace(go.Scatter(x=t, y=E, mode='lines', name='Expuestos', line=dict(color='#f59e0b', dash='dash')))
-    fig_time.add_trace(go.Scatter(x=t, y=I, mode='lines', name='Infectados', line=dict(color='#ef4444', width=3)))
-    fig_time.add_trace(go.Scatter(x=t, y=R, mode='lines', name='Recuperados', line=dict(color='#10b981')))
-    
-    fig_time.update_layout(
-        title="Evolución en el Tiempo",
-        xaxis_title="Días",
-        yaxis_title="Población",
-        template="plotly_white",
-        hovermode="x unified",
-        margin=dict(l=20, r=20, t=50, b=20),
-        legend=dict(orientation="h", y=1.15,x=0.5,xanchor="center")
-    )
-
-    # --- FIGURA 2: Retrato de Fase 3D (LO NUEVO) ---
-    # Mostramos Susceptibles vs Infectados vs Recuperados
-    fig_3d = go.Figure(data=[go.Scatter3d(
-        x=S,
-        y=I,
-        z=R,
-        mode='lines',
-        line=dict(
-            color=t,        # El color varía según el tiempo
-            colorscale='Viridis',
-            width=5
-        ),
-        name='Trayectoria',
-        hovertemplate='S: %{x:.0f}<br>I: %{y:.0f}<br>R: %{z:.0f}<extra></extra>'
-    )])
-
-    # Agregamos punto de inicio y final para referencia
-    fig_3d.add_trace(go.Scatter3d(
-        x=[S[0]], y=[I[0]], z=[R[0]], mode='markers', name='Inicio', marker=dict(size=5, color='green')
-    ))
-    fig_3d.add_trace(go.Scatter3d(
-        x=[S[-1]], y=[I[-1]], z=[R[-1]], mode='markers', name='Final', marker=dict(size=5, color='red')
-    ))
-
-    fig_3d.update_layout(
-        title="Espacio de Fase (S vs I vs R)",
-        scene=dict(
-            xaxis_title='Susceptibles',
-            yaxis_title='Infectados',
-            zaxis_title='Recuperados',
-            camera=dict(eye=dict(x=1.5, y=1.5, z=1.5)) # Perspectiva inicial
-        ),
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-
-    return fig_time, fig_3d
\ No newline at end of file
+        return parche_vacio(7), parche_3d_vacio()
+
+    # --- FIGURA 1: solo los datos de las cuatro curvas ---
+    fig_time = parche_series(t, S, E, I, R)
+    titulo = "Evolución en el Tiempo"
+    # Banda 5-95 % de I y probabilidad de brote mayor (semilla fija)
+    if estocastico:
+        res = simular_estocastico('seir', y0, tiempo_max, {'b': beta / N, 'sigma': sigma, 'gamma': gamma}, semilla=0)
+        parche_series(res['t'], *banda(res, 2), parche=fig_time, desde=4)
+        titulo += (f"<br><sup>{res['realizaciones']} realizaciones: P(brote mayor) = "
+                   f"{res['prob_brote']:.0%} (teórica {res['prob_brote_teorica']:.0%})</sup>")
+    else:
+        parche_vacio(3, parche=fig_time, desde=4)
+    fig_time['layout']['title']['text'] = titulo
+
+    # --- FIGURA 2: trayectoria (color = tiempo) y puntos de inicio y final ---
+    fig_3d = Patch()
+    fig_3d['data'][0]['x'] = arreglo(S)
+    fig_3d['data'][0]['y'] = arreglo(I)
+    fig_3d['data'][0]['z'] = arreglo(R)
+    fig_3d['data'][0]['line']['color'] = arreglo(t)
+    for i, j in ((1, 0), (2, -1)):
+        fig_3d['data'][i]['x'] = [S[j]]
+        fig_3d['data'][i]['y'] = [I[j]]
+        fig_3d['data'][i]['z'] = [R[j]]
+
+    return fig_time, fig_3d
@@ -2,11 +2,52 @@ import dash
 from dash import html, dcc, Input, Output, callback
 import plotly.graph_objs as go
 import numpy as np
-from scipy.integrate import odeint
+from utils.simulacion import simular_trayectoria
+from utils.estocastico import banda, simular_estocastico
+from utils.figuras import parche_series, parche_vacio, trazas_banda
+from utils.metricas import formato_dia, metricas_sir
+from utils.instrumentacion import instrumentar
 from dash import html, dcc, Input, Output, State, callback
 
 dash.register_page(__name__, path='/caso_epidemia', name='Caso 1: Epidemia Estudiantil',order =9)
 
+
+def figura_base():
+    # Gráfica SIR sin datos: se construye una vez al importar la página
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Susceptibles', line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Infectados', line=dict(color='red', width=3)))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Recuperados', line=dict(color='green')))
+    # Banda estocástica de los infectados (vacía si no se pide)
+    fig.add_traces(trazas_banda('Infectados estocástico', 'red', 'rgba(255, 0, 0, 0.15)'))
+
+    fig.update_layout(
+        title={
+            'text': "Dinámica SIR (Estudiantes)",
+            'y': 0.95,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'
+        },
+        template="plotly_white",
+        hovermode="x unified",
+        # MÁRGENES AJUSTADOS: Menos espacio a los lados, más espacio abajo para la leyenda
+        margin=dict(l=10, r=10, t=50, b=100),
+        # LEYENDA ABAJO HORIZONTAL (Esto libera el ancho)
+        legend=dict(
+            orientation="h", 
+            yanchor="top", 
+            y=-0.2, 
+            xanchor="center", 
+            x=0.5
+        )
+    )
+    return fig
+
+
+# Figura base serializada una sola vez; el callback solo envía un Patch
+FIGURA_BASE = figura_base().to_dict()
+
 layout = html.Div([
     # --- ENCABEZADO CON TEXTO DEL PDF ---
     html.Div([
@@ -43,6 +84,12 @@ layout = html.Div([
             html.Label("Días a simular:"),
             dcc.Input(id="epi-tmax", type="number", value=40, className="input-field"),
             
+            dcc.Checklist(
+                id='epi-estocastico',
+                options=[{'label': ' Simulación estocástica (1000 realizaciones)', 'value': 'si'}],
+                value=[]
+            ),
+
             html.Br(),
             html.Button("Simular Brote", id='btn-epi', className='btn-generar')
 
@@ -75,7 +122,7 @@ layout = html.Div([
             }),
 
             # GRÁFICA
-            dcc.Graph(id='grafica-epi', style={'height': '350px'}),
+            dcc.Graph(id='grafica-epi', figure=FIGURA_BASE, style={'height': '350px'}),
             
             # CONCLUSIÓN AUTOMÁTICA (Responde a la Q8 del PDF)
             html.Div(id='conclusion-texto', style={'marginTop': '15px', 'padding': '10px', 'borderLeft': '4px solid #10b981', 'backgroundColor': '#f0fdf4'})
@@ -87,12 +134,7 @@ layout = html.Div([
 
 
 # --- LÓGICA MATEMÁTICA ---
-def sistema_sir(y, t, beta, k):
-    S, I, R = y
-    dSdt = -beta * S * I
-    dIdt = beta * S * I - k * I
-    dRdt = k * I
-    return [dSdt, dIdt, dRdt]
+# Las ecuaciones SIR están en el registro de modelos (utils/modelos.py)
 
 @callback(
     [Output('grafica-epi', 'figure'),
@@ -105,9 +147,11 @@ def sistema_sir(y, t, beta, k):
      State('epi-beta', 'value'),
      State('epi-k', 'value'),
      State('epi-I0', 'value'),
-     State('epi-tmax', 'value')]
+     State('epi-tmax', 'value'),
+     State('epi-estocastico', 'value')]
 )
-def simular_epidemia(n_clicks, N, beta, k, I0, t_max):
+@instrumentar
+def simular_epidemia(n_clicks, N, beta, k, I0, t_max, estocastico=None):
     # Conversión segura
     N, beta, k = float(N), float(beta), float(k)
     I0, t_max = float(I0), float(t_max)
@@ -115,48 +159,33 @@ def simular_epidemia(n_clicks, N, beta, k, I0, t_max):
     R0_init = 0
     S0 = N - I0 - R0_init
     y0 = [S0, I0, R0_init]
-    t = np.linspace(0, t_max, 200)
 
     # 2. Resolver EDO
-    sol = odeint(sistema_sir, y0, t, args=(beta, k))
+    t, sol = simular_trayectoria('sir', y0, t_max, {'b': beta, 'k': k})
     S, I, R = sol.T
 
-    r0_val = (beta * S0) / k 
-    
-    # Pico
-    idx_max = np.argmax(I)
-    max_infectados = I[idx_max]
-    dia_pico = t[idx_max]
-    
-    susceptibles_finales = S[-1]
-
-    # 4. Gráfica
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=t, y=S, mode='lines', name='Susceptibles', line=dict(color='blue')))
-    fig.add_trace(go.Scatter(x=t, y=I, mode='lines', name='Infectados', line=dict(color='red', width=3)))
-    fig.add_trace(go.Scatter(x=t, y=R, mode='lines', name='Recuperados', line=dict(color='green')))
-
-    fig.update_layout(
-        title={
-            'text': "Dinámica SIR (Estudiantes)",
-            'y': 0.95,
-            'x': 0.5,
-            'xanchor': 'center',
-            'yanchor': 'top'
-        },
-        template="plotly_white",
-        hovermode="x unified",
-        # MÁRGENES AJUSTADOS: Menos espacio a los lados, más espacio abajo para la leyenda
-        margin=dict(l=10, r=10, t=50, b=100),
-        # LEYENDA ABAJO HORIZONTAL (Esto libera el ancho)
-        legend=dict(
-            orientation="h", 
-            yanchor="top", 
-            y=-0.2, 
-            xanchor="center", 
-            x=0.5
-        )
-    )
+    # 3. KPIs exactos (utils/metricas.py): no dependen de la malla de tiempo
+    # ni de que t_max alcance el final de la epidemia
+    m = metricas_sir(beta, k, S0, I0, R0_init)
+    r0_val = m['R0']
+    max_infectados = m['pico']
+    dia_pico = m['dia_pico']
+    susceptibles_finales = m['susceptibles_finales']
+
+    # 4. Gráfica: solo viajan los datos de S, I, R (el resto está en FIGURA_BASE)
+    fig = parche_series(t, S, I, R)
+
+    # 4b. Con un solo paciente cero el brote se puede apagar por azar: banda
+    # 5-95 % de I y probabilidad de brote mayor (semilla fija)
+    estocastica = ''
+    if estocastico:
+        res = simular_estocastico('sir', y0, t_max, {'b': beta, 'k': k}, semilla=0)
+        parche_series(res['t'], *banda(res, 1), parche=fig, desde=3)
+        estocastica = (f"En {res['realizaciones']} simulaciones estocásticas el brote despegó en el "
+                       f"**{res['prob_brote'] * 100:.0f}%** de los casos (teoría: "
+                       f"{res['prob_brote_teorica'] * 100:.0f}%); en el resto se apagó por azar.")
+    else:
+        parche_vacio(3, parche=fig, desde=3)
 
     # 5. Texto de Conclusión (Basado en Q8 del PDF [cite: 124-128])
     conclusion = [
@@ -166,7 +195,10 @@ def simular_epidemia(n_clicks, N, beta, k, I0, t_max):
         
         Al final de la epidemia, quedaron aproximadamente **{int(susceptibles_finales)} estudiantes sanos** (Susceptibles).
         La epidemia se detuvo porque la población susceptible cayó por debajo del umbral crítico.
+        Con R0 = {r0_val:.2f}, la inmunidad de rebaño se alcanza con el **{m['umbral_inmunidad'] * 100:.1f}%** de la población inmune.
+
+        {estocastica}
         ''')
     ]
 
-    return fig, f"{r0_val:.2f}", f"Día {dia_pico:.1f}", f"{int(max_infectados)}", conclusion
\ No newline at end of file
+    return fig, f"{r0_val:.2f}", formato_dia(dia_pico).capitalize(), f"{int(max_infectados)}", conclusion
\ No newline at end of file
@@ -0,0 +1,191 @@
+import base64
+import functools
+
+import dash
+from dash import html, dcc, Input, Output, State, Patch, callback, no_update
+import numpy as np
+import plotly.graph_objs as go
+from utils.ajuste import MODELOS_AJUSTABLES, ajustar, leer_csv
+from utils.figuras import arreglo
+from utils.instrumentacion import instrumentar
+from utils.modelos import obtener_modelo
+from utils.simulacion import simular
+
+dash.register_page(__name__, path='/ajuste', name='Ajuste a Datos', order=12)
+
+ESTADOS = ('S', 'E', 'I', 'R')
+NOMBRES = {'S': 'Susceptibles', 'E': 'Expuestos', 'I': 'Infectados', 'R': 'Recuperados'}
+COLORES = {'S': '#3b82f6', 'E': '#f59e0b', 'I': '#ef4444', 'R': '#10b981'}
+# Nombre de cada parámetro en la tabla (b se muestra también como beta = b N)
+ETIQUETAS = {'b': 'b (por contacto)', 'k': 'k (recuperación)', 'sigma': 'sigma (incubación)',
+             'gamma': 'gamma (recuperación)', 'I0': 'I0 (infectados iniciales)'}
+
+
+@functools.lru_cache(maxsize=1)
+def datos_ejemplo():
+    # El brote estudiantil del caso 1 (N = 7138, beta = 1/7138, k = 0.40,
+    # un paciente cero) con ruido, un dato cada 0.5 días: el ajuste debería
+    # recuperar los parámetros del PDF
+    N = 7138
+    t = np.arange(0, 40.5, 0.5)
+    I = simular('sir', [N - 1, 1, 0], t, {'b': 1 / N, 'k': 0.4})[:, 1]
+    ruido = np.random.default_rng(0).normal(0, 0.03 * I.max(), t.size)
+    return t, {'I': np.maximum(np.round(I + ruido), 0)}
+
+
+def figura_base():
+    # Trazas 0-3: datos observados (S, E, I, R); 4-7: curvas ajustadas
+    fig = go.Figure()
+    for e in ESTADOS:
+        fig.add_trace(go.Scatter(x=[], y=[], mode='markers', name=f'{NOMBRES[e]} (datos)',
+                                 marker=dict(color=COLORES[e], size=5, opacity=0.6), visible=False))
+    for e in ESTADOS:
+        fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name=f'{NOMBRES[e]} (ajuste)',
+                                 line=dict(color=COLORES[e], width=3), visible=False))
+    fig.update_layout(
+        title=dict(text="Datos observados y modelo ajustado", x=0.5, xanchor='center'),
+        xaxis_title="Días",
+        yaxis_title="Personas",
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=10, r=10, t=50, b=100),
+        legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+# Figura base serializada una sola vez; el callback solo envía un Patch
+FIGURA_BASE = figura_base().to_dict()
+
+layout = html.Div([
+    html.Div([
+        html.H3("Ajuste de Parámetros a Datos Observados", className="title"),
+        dcc.Markdown(r'''
+        Sube un CSV con una columna de tiempo (`dia` o `t`) y una o más columnas de conteos
+        (`S`, `E`, `I`, `R`). Se estiman los parámetros del modelo y los infectados iniciales
+        $I_0$ por mínimos cuadrados, con intervalos de confianza del 95 %.
+        Sin archivo se usan datos de ejemplo (el brote estudiantil con ruido).
+        ''', mathjax=True, style={'color': '#444'})
+    ], style={'marginBottom': '20px'}),
+
+    html.Div([
+        # --- PANEL IZQUIERDO: DATOS Y CONTROLES ---
+        html.Div([
+            html.H4("Datos y Modelo", className="title"),
+            dcc.Upload(
+                id='ajuste-csv',
+                children=html.Div(["Arrastra o ", html.A("elige un CSV")]),
+                accept='.csv,text/csv',
+                style={'borderWidth': '1px', 'borderStyle': 'dashed', 'borderRadius': '8px',
+                       'textAlign': 'center', 'padding': '15px', 'marginBottom': '10px'}
+            ),
+            html.Div(id='ajuste-archivo', style={'fontSize': '12px', 'color': 'gray'}),
+
+            html.Label("Modelo:"),
+            dcc.Dropdown(id='ajuste-modelo', value='sir', clearable=False,
+                         options=[{'label': m.upper(), 'value': m} for m in MODELOS_AJUSTABLES]),
+
+            html.Label("Población Total (N):"),
+            dcc.Input(id='ajuste-N', type='number', value=7138, className='input-field'),
+
+            dcc.Checklist(
+                id='ajuste-continuar',
+                options=[{'label': ' Partir del ajuste anterior (datos que crecen)', 'value': 'si'}],
+                value=['si']
+            ),
+
+            html.Br(),
+            html.Button("Ajustar", id='btn-ajuste', className='btn-generar'),
+            html.Div(id='ajuste-mensaje', style={'fontSize': '13px', 'marginTop': '8px'}),
+            # Último ajuste: punto de partida del siguiente
+            dcc.Store(id='ajuste-previo')
+        ], className="content left", style={'width': '30%'}),
+
+        # --- PANEL DERECHO: GRÁFICA Y ESTIMACIONES ---
+        html.Div([
+            dcc.Graph(id='grafica-ajuste', figure=FIGURA_BASE, style={'height': '400px'}),
+            html.Div(id='tabla-ajuste', style={'marginTop': '15px'})
+        ], className="content right", style={'width': '70%'})
+
+    ], className="page-container", style={'flexDirection': 'row', 'alignItems': 'flex-start'})
+])
+
+
+@callback(
+    Output('ajuste-archivo', 'children'),
+    Input('ajuste-csv', 'filename')
+)
+def mostrar_archivo(nombre):
+    return f"Archivo: {nombre}" if nombre else "Sin archivo: datos de ejemplo."
+
+
+def tabla_estimaciones(r, N):
+    # Estimación e intervalo de cada valor, más beta = b N y R0
+    filas = []
+    for p, valor in r['parametros'].items():
+        bajo, alto = r['intervalos'][p]
+        filas.append(html.Tr([html.Td(ETIQUETAS.get(p, p)), html.Td(f"{valor:.4g}"),
+                              html.Td(f"[{bajo:.4g}, {alto:.4g}]")]))
+    b = r['parametros']['b']
+    recuperacion = r['parametros'].get('k', r['parametros'].get('gamma'))
+    lo_b, hi_b = r['intervalos']['b']
+    filas.append(html.Tr([html.Td("beta = b N"), html.Td(f"{b * N:.4g}"),
+                          html.Td(f"[{lo_b * N:.4g}, {hi_b * N:.4g}]")]))
+    filas.append(html.Tr([html.Td("R0 = b N / recuperación"), html.Td(f"{b * N / recuperacion:.3g}"), html.Td("")]))
+    return html.Table([
+        html.Thead(html.Tr([html.Th("Parámetro"), html.Th("Estimación"),
+                            html.Th(f"IC {r['nivel'] * 100:.0f} %")])),
+        html.Tbody(filas)
+    ], style={'width': '100%', 'fontSize': '14px'})
+
+
+@callback(
+    [Output('grafica-ajuste', 'figure'),
+     Output('tabla-ajuste', 'children'),
+     Output('ajuste-mensaje', 'children'),
+     Output('ajuste-previo', 'data')],
+    Input('btn-ajuste', 'n_clicks'),
+    [State('ajuste-csv', 'contents'),
+     State('ajuste-modelo', 'value'),
+     State('ajuste-N', 'value'),
+     State('ajuste-continuar', 'value'),
+     State('ajuste-previo', 'data')],
+    prevent_initial_call=True
+)
+@instrumentar
+def ajustar_datos(n_clicks, contenido, modelo, N, continuar, previo):
+    if modelo is None or N is None or N <= 0:
+        return no_update, no_update, "Elige un modelo y una población N > 0.", no_update
+    N = float(N)
+    try:
+        if contenido:
+            # "data:text/csv;base64,...."
+            texto = base64.b64decode(contenido.split(',', 1)[1]).decode('utf-8-sig', errors='replace')
+            t, observados = leer_csv(texto)
+        else:
+            t, observados = datos_ejemplo()
+        inicial = None
+        if continuar and previo and previo['modelo'] == modelo and previo['N'] == N:
+            inicial = previo['parametros']
+        r = ajustar(modelo, t, observados, N, inicial=inicial)
+    except ValueError as e:
+        return no_update, no_update, str(e), no_update
+
+    # Se muestran los datos que vinieron y todas las curvas del modelo
+    estados = obtener_modelo(modelo).estados
+    fig = Patch()
+    x = arreglo(t)
+    for j, e in enumerate(ESTADOS):
+        observado, en_modelo = e in observados, e in estados
+        fig['data'][j]['visible'] = observado
+        fig['data'][j]['x'] = x if observado else []
+        fig['data'][j]['y'] = arreglo(observados[e]) if observado else []
+        fig['data'][4 + j]['visible'] = en_modelo
+        fig['data'][4 + j]['x'] = x if en_modelo else []
+        fig['data'][4 + j]['y'] = arreglo(r['ajuste'][:, estados.index(e)]) if en_modelo else []
+
+    arranque = "desde el ajuste anterior" if inicial else f"{r['inicios']} arranques ({r['exitosos']} convergieron)"
+    errores = ", ".join(f"{e}: {v:.3g}" for e, v in r['rmse'].items())
+    mensaje = f"{t.size} puntos, {arranque}, {r['evaluaciones']} integraciones. Error típico (RMSE) {errores}."
+    return (fig, tabla_estimaciones(r, N), mensaje,
+            {'modelo': modelo, 'N': N, 'parametros': r['parametros']})
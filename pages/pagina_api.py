@@ -1,27 +1,173 @@
+import os
 import dash
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, State, Patch, callback, no_update
+import numpy as np
 import plotly.graph_objs as go
-import requests
-import pandas as pd
+from plotly.colors import sample_colorscale
+from utils.clima import CLIENTE
+from utils.config import LIMITE_DIAS
+from utils.instrumentacion import instrumentar
+from utils.metapoblacion import simular_metapoblacion
 
 dash.register_page(__name__, path='/api_clima', name='Mapa Climático Mundial',order = 8)
 
 # --- DICCIONARIO AMPLIADO (Para llenar el mapa) ---
+# pob: habitantes del área metropolitana (aprox.), para la epidemia entre ciudades
 ciudades = {
-    "Lima": {"lat": -12.0464, "lon": -77.0428},
-    "Buenos Aires": {"lat": -34.6037, "lon": -58.3816},
-    "Ciudad de México": {"lat": 19.4326, "lon": -99.1332},
-    "Nueva York": {"lat": 40.7128, "lon": -74.0060},
-    "Madrid": {"lat": 40.4168, "lon": -3.7038},
-    "Londres": {"lat": 51.5074, "lon": -0.1278},
-    "París": {"lat": 48.8566, "lon": 2.3522},
-    "Moscú": {"lat": 55.7558, "lon": 37.6173},
-    "Tokio": {"lat": 35.6762, "lon": 139.6503},
-    "Sídney": {"lat": -33.8688, "lon": 151.2093},
-    "Ciudad del Cabo": {"lat": -33.9249, "lon": 18.4241},
-    "El Cairo": {"lat": 30.0444, "lon": 31.2357}
+    "Lima": {"lat": -12.0464, "lon": -77.0428, "pob": 10.9e6},
+    "Buenos Aires": {"lat": -34.6037, "lon": -58.3816, "pob": 15.5e6},
+    "Ciudad de México": {"lat": 19.4326, "lon": -99.1332, "pob": 21.8e6},
+    "Nueva York": {"lat": 40.7128, "lon": -74.0060, "pob": 18.8e6},
+    "Madrid": {"lat": 40.4168, "lon": -3.7038, "pob": 6.7e6},
+    "Londres": {"lat": 51.5074, "lon": -0.1278, "pob": 9.6e6},
+    "París": {"lat": 48.8566, "lon": 2.3522, "pob": 11.1e6},
+    "Moscú": {"lat": 55.7558, "lon": 37.6173, "pob": 12.6e6},
+    "Tokio": {"lat": 35.6762, "lon": 139.6503, "pob": 37.2e6},
+    "Sídney": {"lat": -33.8688, "lon": 151.2093, "pob": 5.3e6},
+    "Ciudad del Cabo": {"lat": -33.9249, "lon": 18.4241, "pob": 4.8e6},
+    "El Cairo": {"lat": 30.0444, "lon": 31.2357, "pob": 21.3e6}
 }
 
+# Precarga de TODAS las ciudades en segundo plano (al arrancar el servidor y
+# luego cada hora), así el mapa se colorea completo y cambiar de ciudad no
+# espera a la red. Aquí solo se programa: el hilo lo arranca el proceso que
+# atiende (utils/servidor.py), no este import. Se desactiva con
+# CLIMA_PRECARGA=0 (p.ej. sin conexión).
+if os.environ.get('CLIMA_PRECARGA', '1') != '0':
+    CLIENTE.programar_precarga((v['lat'], v['lon']) for v in ciudades.values())
+
+# Escala fija de temperatura para colorear los marcadores
+TEMP_MIN, TEMP_MAX = -10, 40
+
+
+def temperaturas_actuales():
+    # Temperatura de cada ciudad según el cache (None si aún no llegó)
+    temps = []
+    for v in ciudades.values():
+        datos = CLIENTE.consultar(v['lat'], v['lon'])
+        try:
+            temps.append(float(datos['current_weather']['temperature']))
+        except (TypeError, KeyError, ValueError):
+            temps.append(None)
+    return temps
+
+
+def estilo_marcadores(idx_sel):
+    # Arreglos del marcador: color por temperatura (gris si la ciudad aún no
+    # se precargó) y la ciudad seleccionada más grande y con borde grueso
+    temps = temperaturas_actuales()
+    colores = [
+        sample_colorscale('RdYlBu_r', [min(max((tc - TEMP_MIN) / (TEMP_MAX - TEMP_MIN), 0.0), 1.0)])[0]
+        if tc is not None else 'lightgray'
+        for tc in temps
+    ]
+    textos = [f"{n}: {tc:.1f} °C" if tc is not None else n for n, tc in zip(ciudades, temps)]
+    tamano = [10] * len(ciudades)
+    borde = [1] * len(ciudades)
+    if idx_sel is not None:
+        tamano[idx_sel] = 16
+        borde[idx_sel] = 3
+    return colores, textos, tamano, borde
+
+
+GEO = dict(
+    projection_type = 'natural earth',
+    showland = True,
+    landcolor = "rgb(250, 250, 250)",
+    countrycolor = "rgb(200, 200, 200)",
+    coastlinecolor = "rgb(200, 200, 200)",
+)
+
+
+def figura_mapa_base():
+    # Se construye UNA vez al importar la página
+    colores, textos, tamano, borde = estilo_marcadores(None)
+    fig_map = go.Figure(go.Scattergeo(
+        lon = [v['lon'] for v in ciudades.values()],
+        lat = [v['lat'] for v in ciudades.values()],
+        text = textos,
+        hoverinfo = 'text',
+        mode = 'markers',
+        marker = dict(
+            size = tamano,
+            color = colores,
+            line = dict(width=borde, color='black')
+        )
+    ))
+
+    fig_map.update_layout(
+        geo = GEO,
+        margin = dict(l=0, r=0, t=0, b=0),
+        height = 300,
+        template="plotly_white"
+    )
+    return fig_map
+
+
+def parche_mapa(idx_sel):
+    # Lo único que cambia entre interacciones: unos pocos arreglos de 12 elementos
+    colores, textos, tamano, borde = estilo_marcadores(idx_sel)
+    parche = Patch()
+    parche['data'][0]['marker']['color'] = colores
+    parche['data'][0]['marker']['size'] = tamano
+    parche['data'][0]['marker']['line']['width'] = borde
+    parche['data'][0]['text'] = textos
+    return parche
+
+
+# --- EPIDEMIA ENTRE CIUDADES (SIR metapoblacional, utils/metapoblacion.py) ---
+# Un SIR por ciudad acoplado por la movilidad (modelo de gravedad con las
+# distancias entre ciudades). El resultado se anima sobre un mapa igual al de
+# arriba: cada cuadro es un día y el color es el % de infectados.
+LATITUDES = np.array([v['lat'] for v in ciudades.values()])
+LONGITUDES = np.array([v['lon'] for v in ciudades.values()])
+POBLACIONES = np.array([v['pob'] for v in ciudades.values()])
+CUADROS = 61
+
+
+def figura_epidemia_base():
+    # Mapa, barra de color, botones y deslizador fijos; los cuadros (frames)
+    # y los pasos del deslizador llegan con el Patch de propagar_epidemia
+    fig = go.Figure(go.Scattergeo(
+        lon=LONGITUDES, lat=LATITUDES, text=list(ciudades), hoverinfo='text', mode='markers',
+        marker=dict(
+            size=6 + 3 * np.sqrt(POBLACIONES / 1e6),
+            color=np.zeros(len(ciudades)),
+            colorscale='Reds', cmin=0, cmax=1,
+            colorbar=dict(title='% infectados', thickness=12),
+            line=dict(width=1, color='black')
+        )
+    ))
+    fig.update_layout(
+        geo=GEO,
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=350,
+        template="plotly_white",
+        updatemenus=[dict(
+            type='buttons', showactive=False, x=0.02, y=0.08, xanchor='left', yanchor='top',
+            buttons=[
+                dict(label='▶', method='animate',
+                     args=[None, dict(frame=dict(duration=150, redraw=True), fromcurrent=True)]),
+                dict(label='❚❚', method='animate',
+                     args=[[None], dict(mode='immediate', frame=dict(duration=0, redraw=False))]),
+            ]
+        )],
+        sliders=[dict(steps=[], x=0.12, len=0.85, y=0.08, yanchor='top',
+                      currentvalue=dict(prefix='Día ', font=dict(size=12)))]
+    )
+    return fig
+
+
+def textos_epidemia(fraccion, llegada):
+    # Texto del marcador: % de infectados y, si ya llegó, el día de llegada
+    return [f"{n}: {100 * f:.2f} % infectados" + (f" (llegó el día {d:.0f})" if np.isfinite(d) else "")
+            for n, f, d in zip(ciudades, fraccion, llegada)]
+
+
+# Figuras base serializadas una sola vez (dicts listos para JSON)
+MAPA_BASE = figura_mapa_base().to_dict()
+EPIDEMIA_BASE = figura_epidemia_base().to_dict()
+
 layout = html.Div([
     html.Div([
         html.H3("Monitor Climático Global", className="title"),
@@ -50,7 +196,22 @@ layout = html.Div([
             ], style={'flex': 1, 'textAlign': 'center'})
         ], style={'display': 'flex', 'backgroundColor': 'white', 'padding': '15px', 'borderRadius': '10px', 'boxShadow': '0 2px 5px rgba(0,0,0,0.05)', 'marginBottom': '20px'}),
 
-        html.Button("Actualizar API", id='btn-api', className='btn-generar')
+        html.Button("Actualizar API", id='btn-api', className='btn-generar'),
+
+        # --- EPIDEMIA ENTRE CIUDADES: arranca en la ciudad seleccionada ---
+        html.H5("Epidemia entre ciudades", style={'marginTop': '30px'}),
+        html.P("SIR en cada ciudad, conectadas por viajes (modelo de gravedad). El brote empieza en la ciudad seleccionada.",
+               className="text-muted", style={'fontSize': '12px'}),
+        html.Label("Tasa de transmisión (β):"),
+        dcc.Input(id='meta-beta', type='number', value=0.3, step=0.01, className='input-field'),
+        html.Label("Tasa de recuperación (γ):"),
+        dcc.Input(id='meta-gamma', type='number', value=0.1, step=0.01, className='input-field'),
+        html.Label("Fracción del tiempo de viaje (movilidad):"),
+        dcc.Input(id='meta-movilidad', type='number', value=0.001, step=0.0001, className='input-field'),
+        html.Label("Días a simular:"),
+        dcc.Input(id='meta-dias', type='number', value=365, className='input-field'),
+        html.Button("Simular propagación", id='btn-meta', className='btn-generar'),
+        html.Div(id='meta-mensaje', style={'fontSize': '12px', 'marginTop': '8px'})
 
     ], className="content left", style={'width': '30%'}),
 
@@ -59,13 +220,17 @@ layout = html.Div([
         
         # 1. EL MAPA MUNDI
         html.H5("Ubicación Geográfica"),
-        dcc.Graph(id='mapa-mundi', style={'height': '300px', 'marginBottom': '20px'}),
+        dcc.Graph(id='mapa-mundi', figure=MAPA_BASE, style={'height': '300px', 'marginBottom': '20px'}),
 
         # 2. LA GRÁFICA DE SERIE DE TIEMPO
         html.H5("Pronóstico 7 Días (Hora por Hora)"),
         dcc.Graph(id='grafica-clima', style={'height': '300px'}),
         
-        html.P("Datos: Open-Meteo API", style={'fontSize': '11px', 'textAlign': 'right', 'color': 'gray'})
+        html.P("Datos: Open-Meteo API", style={'fontSize': '11px', 'textAlign': 'right', 'color': 'gray'}),
+
+        # 3. LA EPIDEMIA ENTRE CIUDADES (animada)
+        html.H5("Propagación de una epidemia entre ciudades"),
+        dcc.Graph(id='mapa-epidemia', figure=EPIDEMIA_BASE, style={'height': '350px'})
 
     ], className="content right", style={'width': '70%'})
 
@@ -80,71 +245,37 @@ layout = html.Div([
     [Input('dropdown-ciudad', 'value'),
      Input('btn-api', 'n_clicks')]
 )
+@instrumentar
 def actualizar_dashboard(ciudad_seleccionada, n_clicks):
-    # --- 1. PREPARAR DATOS DEL MAPA ---
-    lats = [v['lat'] for v in ciudades.values()]
-    lons = [v['lon'] for v in ciudades.values()]
     nombres = list(ciudades.keys())
-    
- 
-    colores = ['lightgray'] * len(ciudades)
-    tamano = [8] * len(ciudades)
-    
-
     idx = nombres.index(ciudad_seleccionada)
-    colores[idx] = '#ef4444' # Rojo intenso
-    tamano[idx] = 15         # Más grande
-
-    fig_map = go.Figure(go.Scattergeo(
-        lon = lons,
-        lat = lats,
-        text = nombres,
-        mode = 'markers',
-        marker = dict(
-            size = tamano,
-            color = colores,
-            line = dict(width=1, color='black')
-        )
-    ))
-
-    fig_map.update_layout(
-        geo = dict(
-            projection_type = 'natural earth',
-            showland = True,
-            landcolor = "rgb(250, 250, 250)",
-            countrycolor = "rgb(200, 200, 200)",
-            coastlinecolor = "rgb(200, 200, 200)",
-        ),
-        margin = dict(l=0, r=0, t=0, b=0),
-        height = 300,
-        template="plotly_white"
-    )
-
 
     lat_sel = ciudades[ciudad_seleccionada]['lat']
     lon_sel = ciudades[ciudad_seleccionada]['lon']
     
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat_sel}&longitude={lon_sel}&hourly=temperature_2m,windspeed_10m&current_weather=true"
-
     try:
-        response = requests.get(url)
-        data = response.json()
+        # Cliente con timeouts y cache por hora (utils/clima.py): volver a una
+        # ciudad ya vista no hace ninguna petición. El botón "Actualizar API"
+        # sí descarga de nuevo, aunque el dato en cache siga fresco.
+        forzar = n_clicks is not None and dash.ctx.triggered_id == 'btn-api'
+        data = CLIENTE.pronostico(lat_sel, lon_sel, forzar=forzar)
+
+        # --- MAPA: solo se envía un Patch con los arreglos del marcador ---
+        # (la figura base ya está en el navegador). Se arma DESPUÉS del
+        # pronóstico para que la ciudad recién descargada salga coloreada.
+        fig_map = parche_mapa(idx)
 
         # KPIs
         temp = f"{data['current_weather']['temperature']} °C"
         wind = f"{data['current_weather']['windspeed']} km/h"
 
-        # Gráfica Histórica
+        # Gráfica Histórica (las listas del JSON van directo a plotly: pandas
+        # tardaba ~0.5 s en importarse solo para envolverlas en un DataFrame)
         hourly = data['hourly']
-        df = pd.DataFrame({
-            'Tiempo': hourly['time'],
-            'Temp': hourly['temperature_2m'],
-            'Viento': hourly['windspeed_10m']
-        })
 
         fig_line = go.Figure()
-        fig_line.add_trace(go.Scatter(x=df['Tiempo'], y=df['Temp'], mode='lines', name='Temp (°C)', line=dict(color='#f59e0b', width=3)))
-        fig_line.add_trace(go.Scatter(x=df['Tiempo'], y=df['Viento'], mode='lines', name='Viento (km/h)', line=dict(color='#3b82f6', dash='dot')))
+        fig_line.add_trace(go.Scatter(x=hourly['time'], y=hourly['temperature_2m'], mode='lines', name='Temp (°C)', line=dict(color='#f59e0b', width=3)))
+        fig_line.add_trace(go.Scatter(x=hourly['time'], y=hourly['windspeed_10m'], mode='lines', name='Viento (km/h)', line=dict(color='#3b82f6', dash='dot')))
 
         fig_line.update_layout(
             margin=dict(l=40, r=20, t=20, b=40),
@@ -155,4 +286,50 @@ def actualizar_dashboard(ciudad_seleccionada, n_clicks):
         return temp, wind, fig_map, fig_line
 
     except:
-        return "--", "--", fig_map, go.Figure()
\ No newline at end of file
+        return "--", "--", parche_mapa(idx), go.Figure()
+
+@callback(
+    [Output('mapa-epidemia', 'figure'),
+     Output('meta-mensaje', 'children')],
+    Input('btn-meta', 'n_clicks'),
+    [State('dropdown-ciudad', 'value'),
+     State('meta-beta', 'value'),
+     State('meta-gamma', 'value'),
+     State('meta-movilidad', 'value'),
+     State('meta-dias', 'value')],
+    prevent_initial_call=True
+)
+@instrumentar
+def propagar_epidemia(n_clicks, ciudad, beta, gamma, movilidad, dias):
+    if None in (ciudad, beta, gamma, movilidad, dias):
+        return no_update, "Completa todos los parámetros."
+    if not 0 < dias <= LIMITE_DIAS or not 0 <= movilidad <= 1 or beta < 0 or gamma < 0:
+        return no_update, (f"Se necesita 0 < días <= {LIMITE_DIAS:.0f}, 0 <= movilidad <= 1 "
+                           "y tasas no negativas.")
+
+    # 10 infectados en la ciudad seleccionada
+    origen = list(ciudades).index(ciudad)
+    r = simular_metapoblacion(LATITUDES, LONGITUDES, POBLACIONES, origen, 10, beta, gamma,
+                              movilidad, dias, n_cuadros=CUADROS)
+    porcentaje = np.round(100 * np.nan_to_num(r['I'] / POBLACIONES), 4)
+
+    # Un cuadro por punto de la malla: solo cambian los colores y los textos
+    cuadros, pasos = [], []
+    for i, dia in enumerate(r['t']):
+        nombre = f"{dia:.0f}"
+        textos = textos_epidemia(porcentaje[i] / 100, np.where(r['llegada'] <= dia, r['llegada'], np.inf))
+        cuadros.append({'name': nombre, 'traces': [0],
+                        'data': [{'marker': {'color': porcentaje[i].tolist()}, 'text': textos}]})
+        pasos.append({'label': nombre, 'method': 'animate',
+                      'args': [[nombre], {'mode': 'immediate', 'frame': {'duration': 0, 'redraw': True}}]})
+
+    fig = Patch()
+    fig['frames'] = cuadros
+    fig['layout']['sliders'][0]['steps'] = pasos
+    fig['layout']['sliders'][0]['active'] = 0
+    fig['data'][0]['marker']['color'] = cuadros[0]['data'][0]['marker']['color']
+    fig['data'][0]['marker']['cmax'] = max(float(porcentaje.max()), 1e-3)
+    fig['data'][0]['text'] = cuadros[0]['data'][0]['text']
+
+    llegan = int(np.isfinite(r['llegada']).sum()) - 1
+    return fig, f"El brote llega a {llegan} de {len(ciudades) - 1} ciudades en {dias:.0f} días."
@@ -1,11 +1,53 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, Input, Output, State, callback, no_update
 import plotly.graph_objs as go
 import numpy as np
-from scipy.integrate import odeint
+from utils.simulacion import simular_trayectoria
+from utils.figuras import parche_series
+from utils.barrido import barrido_sir, costo_barrido
+from utils.trabajos import controles_trabajo, despachar, registrar_trabajo, salidas_despacho
+from utils.config import LIMITE_DIAS
+from utils.metricas import pico_infectados, dia_pico as calcular_dia_pico, formato_dia
+from utils.instrumentacion import instrumentar
+from utils.modo_red import comparar_red, controles_red
 
 dash.register_page(__name__, path='/caso_politica', name='Caso 3: Política Pública',order =11)
 
+
+def figura_base():
+    # Gráfica SIR sin datos: se construye una vez al importar la página
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Susceptibles (S)', line=dict(color='#0ea5e9'))) # Azul cielo
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Influyentes (I)', line=dict(color='#d946ef', width=3))) # Magenta
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Rechazadores (R)', line=dict(color='#059669'))) # Esmeralda
+
+    fig.update_layout(
+        title={
+            'text': "Dinámica SIR (Estudiantes)",
+            'y': 0.95,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'
+        },
+        template="plotly_white",
+        hovermode="x unified",
+        # MÁRGENES AJUSTADOS: Menos espacio a los lados, más espacio abajo para la leyenda
+        margin=dict(l=10, r=10, t=50, b=100),
+        # LEYENDA ABAJO HORIZONTAL (Esto libera el ancho)
+        legend=dict(
+            orientation="h", 
+            yanchor="top", 
+            y=-0.2, 
+            xanchor="center", 
+            x=0.5
+        )
+    )
+    return fig
+
+
+# Figura base serializada una sola vez; el callback solo envía un Patch
+FIGURA_BASE = figura_base().to_dict()
+
 layout = html.Div([
     # --- ENCABEZADO ---
     html.Div([
@@ -44,7 +86,9 @@ layout = html.Div([
             dcc.Input(id="pol-tmax", type="number", value=100, className="input-field"),
             
             html.Br(), html.Br(),
-            html.Button("Simular Política", id='btn-pol', className='btn-generar')
+            html.Button("Simular Política", id='btn-pol', className='btn-generar'),
+            # Aviso, progreso y cancelar para horizontes largos (utils/trabajos.py)
+            controles_trabajo('pol')
 
         ], className="content left", style={'width': '35%'}),
 
@@ -64,13 +108,17 @@ layout = html.Div([
             ], style={'display': 'flex', 'marginBottom': '15px'}),
 
             # GRÁFICA
-            dcc.Graph(id='grafica-politica', style={'height': '350px'}),
+            dcc.Graph(id='grafica-politica', figure=FIGURA_BASE, style={'height': '350px'}),
             
             # ANÁLISIS ESTRATÉGICO (Basado en el PDF [cite: 304])
             html.Div([
                 html.H5("Análisis para Planificadores"),
                 dcc.Markdown(id='texto-analisis-pol')
-            ], style={'marginTop': '15px', 'padding': '15px', 'borderLeft': '4px solid #0ea5e9', 'backgroundColor': '#f0f9ff'})
+            ], style={'marginTop': '15px', 'padding': '15px', 'borderLeft': '4px solid #0ea5e9', 'backgroundColor': '#f0f9ff'}),
+
+            # MODO RED: la adopción sobre un grafo de contactos (utils/modo_red.py)
+            controles_red('pol', ['Susceptibles (S)', 'Influyentes (I)', 'Rechazadores (R)'],
+                          ['#0ea5e9', '#d946ef', '#059669'])
 
         ], className="content right", style={'width': '65%'})
 
@@ -79,19 +127,16 @@ layout = html.Div([
 
 
 # --- LÓGICA MATEMÁTICA ---
-def sistema_politica(y, t, b, k):
-    S, I, R = y
-    # Mismas ecuaciones SIR [cite: 442]
-    dSdt = -b * S * I
-    dIdt = b * S * I - k * I
-    dRdt = k * I
-    return [dSdt, dIdt, dRdt]
+# Mismas ecuaciones SIR [cite: 442]: el modelo 'sir' de utils/modelos.py
+
+SALIDAS = [Output('grafica-politica', 'figure'),
+           Output('pol-pico', 'children'),
+           Output('pol-rechazo', 'children'),
+           Output('texto-analisis-pol', 'children')]
+
 
 @callback(
-    [Output('grafica-politica', 'figure'),
-     Output('pol-pico', 'children'),
-     Output('pol-rechazo', 'children'),
-     Output('texto-analisis-pol', 'children')],
+    salidas_despacho('pol'),
     [Input('btn-pol', 'n_clicks')],
     [State('pol-N', 'value'),
      State('pol-b', 'value'),
@@ -99,60 +144,75 @@ def sistema_politica(y, t, b, k):
      State('pol-I0', 'value'),
      State('pol-tmax', 'value')]
 )
-def simular_politica(n_clicks, N, b, k, I0, t_max):
-    # Conversión
+@instrumentar
+def validar_politica(n_clicks, N, b, k, I0, t_max):
+    # Se revisa ANTES de integrar: entradas completas, horizonte y costo
+    if None in (N, b, k, I0, t_max):
+        return no_update, no_update, "Completa todos los parámetros."
     N, b, k = float(N), float(b), float(k)
     I0, t_max = float(I0), float(t_max)
+    if not 0 < t_max <= LIMITE_DIAS:
+        return no_update, no_update, f"Los días a simular deben ser mayores que 0 y como máximo {LIMITE_DIAS:.0f}."
+
+    # Lo caro es el barrido de las recomendaciones
+    costo = costo_barrido([b, 1.5 * b, b], [k, k, 2 * k], N, t_max, I0)
+    return despachar(costo, {'N': N, 'b': b, 'k': k, 'I0': I0, 't_max': t_max})
 
+
+def simular_politica(progreso, N, b, k, I0, t_max):
+    # progreso(hecho, total) solo llega cuando corre en segundo plano
     R0 = 0
     S0 = N - I0 - R0
     y0 = [S0, I0, R0]
-    t = np.linspace(0, t_max, 200)
 
 
-    sol = odeint(sistema_politica, y0, t, args=(b, k))
+    t, sol = simular_trayectoria('sir', y0, t_max, {'b': b, 'k': k})
     S, I, R = sol.T
 
-    idx_max = np.argmax(I)
-    max_influyentes = I[idx_max]
-    dia_pico = t[idx_max]
+    # Pico exacto (utils/metricas.py), no el argmax sobre 200 puntos
+    max_influyentes = pico_infectados(b, k, S0, I0)
+    dia_pico = calcular_dia_pico(b, k, S0, I0, R0)
     total_rechazadores = R[-1]
 
-    # 4. Gráfica
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=t, y=S, mode='lines', name='Susceptibles (S)', line=dict(color='#0ea5e9'))) # Azul cielo
-    fig.add_trace(go.Scatter(x=t, y=I, mode='lines', name='Influyentes (I)', line=dict(color='#d946ef', width=3))) # Magenta
-    fig.add_trace(go.Scatter(x=t, y=R, mode='lines', name='Rechazadores (R)', line=dict(color='#059669'))) # Esmeralda
-
-    fig.update_layout(
-        title={
-            'text': "Dinámica SIR (Estudiantes)",
-            'y': 0.95,
-            'x': 0.5,
-            'xanchor': 'center',
-            'yanchor': 'top'
-        },
-        template="plotly_white",
-        hovermode="x unified",
-        # MÁRGENES AJUSTADOS: Menos espacio a los lados, más espacio abajo para la leyenda
-        margin=dict(l=10, r=10, t=50, b=100),
-        # LEYENDA ABAJO HORIZONTAL (Esto libera el ancho)
-        legend=dict(
-            orientation="h", 
-            yanchor="top", 
-            y=-0.2, 
-            xanchor="center", 
-            x=0.5
-        )
-    )
+    # 4. Gráfica: solo viajan los datos de S, I, R (el resto está en FIGURA_BASE)
+    fig = parche_series(t, S, I, R)
 
     # 5. Texto de Análisis
+    # Las recomendaciones se calculan con un barrido: [base, b x 1.5, k x 2]
+    esc = barrido_sir([b, 1.5 * b, b], [k, k, 2 * k], I0, N, t_max, progreso=progreso)
+    dia_b = esc['dia_pico'][1]
+    rechazo_k = esc['R_final'][2]
+
     analisis = f"""
-    El momento de mayor debate público (Pico de Influencia) será alrededor del **día {dia_pico:.0f}**.
+    Momento de mayor debate público (Pico de Influencia): **{formato_dia(dia_pico, 0)}**.
     
     Para el día {t_max:.0f}, se estima que **{int(total_rechazadores)} ciudadanos** rechazarán la medida definitivamente.
     
-    **Recomendación:** Si aumentas la tasa 'b' (campañas de educación), el pico ocurrirá antes. Si aumentas 'k' (descontento social), el número de rechazadores crecerá [cite: 289-293].
+    **Recomendación:** Si aumentas la tasa 'b' un 50% (campañas de educación), el pico se adelanta al **día {dia_b:.0f}**. Si 'k' se duplica (descontento social), los rechazadores pasan de {int(total_rechazadores)} a **{int(rechazo_k)}** [cite: 289-293].
     """
 
-    return fig, f"{int(max_influyentes)} personas", f"{int(total_rechazadores)}", analisis
\ No newline at end of file
+    return fig, f"{int(max_influyentes)} personas", f"{int(total_rechazadores)}", analisis
+
+
+# En línea o en segundo plano según lo que decida validar_politica
+registrar_trabajo('pol', SALIDAS, simular_politica, 'btn-pol')
+
+
+@callback(
+    [Output('pol-red-grafica', 'figure'),
+     Output('pol-red-mensaje', 'children')],
+    Input('pol-red-btn', 'n_clicks'),
+    [State('pol-red-tipo', 'value'),
+     State('pol-red-nodos', 'value'),
+     State('pol-red-grado', 'value'),
+     State('pol-N', 'value'),
+     State('pol-b', 'value'),
+     State('pol-k', 'value'),
+     State('pol-I0', 'value'),
+     State('pol-tmax', 'value')],
+    prevent_initial_call=True
+)
+@instrumentar
+def simular_red_politica(n_clicks, tipo, nodos, grado, N, b, k, I0, t_max):
+    # Sin rechazadores iniciales, como en simular_politica
+    return comparar_red(tipo, nodos, grado, N, b, k, I0, 0, t_max, 'influyentes')
@@ -1,12 +1,78 @@
 import dash
 from dash import html, dcc, Input, Output, callback
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, Input, Output, State, Patch, callback, no_update
 import plotly.graph_objs as go
 import numpy as np
-from scipy.integrate import odeint
+from utils.simulacion import simular_trayectoria
+from utils.figuras import arreglo, parche_series
+from utils.barrido import barrido_sir, costo_barrido
+from utils.cache import CACHE, clave_simulacion
+from utils.trabajos import controles_trabajo, despachar, registrar_trabajo, salidas_despacho
+from utils.config import LIMITE_DIAS
+from utils.metricas import formato_dia, metricas_sir
+from utils.instrumentacion import instrumentar
+from utils.modo_red import comparar_red, controles_red
 
 dash.register_page(__name__, path='/caso_rumor', name='Caso 2: Rumor Social', order =10)
 
+
+def figura_base():
+    # Gráfica SIR sin datos: se construye una vez al importar la página
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Ignorantes (S)', line=dict(color='#6366f1'))) # Indigo
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Propagadores (I)', line=dict(color='#f59e0b', width=3))) # Ambar
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Racionales (R)', line=dict(color='#64748b'))) # Slate
+
+    fig.update_layout(
+        title={
+            'text': "Dinámica SIR (Estudiantes)",
+            'y': 0.95,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'
+        },
+        template="plotly_white",
+        hovermode="x unified",
+        # MÁRGENES AJUSTADOS: Menos espacio a los lados, más espacio abajo para la leyenda
+        margin=dict(l=10, r=10, t=50, b=100),
+        # LEYENDA ABAJO HORIZONTAL (Esto libera el ancho)
+        legend=dict(
+            orientation="h", 
+            yanchor="top", 
+            y=-0.2, 
+            xanchor="center", 
+            x=0.5
+        )
+    )
+    return fig
+
+
+def figura_sensibilidad_base():
+    # Mapa de calor del pico + marca del escenario actual, sin datos
+    fig_sens = go.Figure(go.Heatmap(
+        x=[], y=[], z=[], colorscale='YlOrRd',
+        colorbar=dict(title='Pico'),
+        hovertemplate='b: %{x:.4f}<br>k: %{y:.2f}<br>Pico: %{z:.0f} alumnos<extra></extra>'
+    ))
+    fig_sens.add_trace(go.Scatter(
+        x=[], y=[], mode='markers', name='Escenario actual',
+        marker=dict(size=12, color='#6366f1', symbol='x')
+    ))
+    fig_sens.update_layout(
+        title=dict(text="Sensibilidad del pico a b y k", x=0.5, xanchor='center'),
+        xaxis_title="Tasa de propagación (b)",
+        yaxis_title="Racionalidad (k)",
+        template="plotly_white",
+        margin=dict(l=10, r=10, t=50, b=40),
+        showlegend=False
+    )
+    return fig_sens
+
+
+# Figuras base serializadas una sola vez; el callback solo envía Patches
+FIGURA_BASE = figura_base().to_dict()
+SENSIBILIDAD_BASE = figura_sensibilidad_base().to_dict()
+
 layout = html.Div([
     # --- ENCABEZADO ---
     html.Div([
@@ -36,6 +102,7 @@ layout = html.Div([
             html.Label("Nivel de Racionalidad 'k' (Recuperación):"),
             dcc.Slider(
                 id='rum-k-slider',
+                updatemode='mouseup',  # un valor al soltar, no uno por paso
                 min=0.01, max=0.05, step=0.01,
                 value=0.01,
                 marks={0.01: '0.01 (Crédulos)', 0.02: '0.02 (Escépticos)', 0.05: '0.05 (Racionales)'},
@@ -53,7 +120,9 @@ layout = html.Div([
             dcc.Input(id="rum-tmax", type="number", value=15, className="input-field"),
             
             html.Br(), html.Br(),
-            html.Button("Analizar Rumor", id='btn-rum', className='btn-generar')
+            html.Button("Analizar Rumor", id='btn-rum', className='btn-generar'),
+            # Aviso, progreso y cancelar para horizontes largos (utils/trabajos.py)
+            controles_trabajo('rum')
 
         ], className="content left", style={'width': '35%'}),
 
@@ -73,13 +142,20 @@ layout = html.Div([
             ], style={'display': 'flex', 'marginBottom': '15px'}),
 
             # GRÁFICA
-            dcc.Graph(id='grafica-rumor', style={'height': '350px'}),
+            dcc.Graph(id='grafica-rumor', figure=FIGURA_BASE, style={'height': '350px'}),
             
             # ANÁLISIS DE SENSIBILIDAD
             html.Div([
                 html.H5("Análisis de Escenario (Q4, Q5 y Q6)"),
                 html.P(id='texto-analisis-rumor', style={'fontSize': '14px'})
-            ], style={'marginTop': '15px', 'padding': '15px', 'borderLeft': '4px solid #6366f1', 'backgroundColor': '#f8fafc'})
+            ], style={'marginTop': '15px', 'padding': '15px', 'borderLeft': '4px solid #6366f1', 'backgroundColor': '#f8fafc'}),
+
+            # MAPA DE SENSIBILIDAD (pico para toda una malla de b y k)
+            dcc.Graph(id='sensibilidad-rumor', figure=SENSIBILIDAD_BASE, style={'height': '350px', 'marginTop': '15px'}),
+
+            # MODO RED: el mismo rumor sobre un grafo de contactos (utils/modo_red.py)
+            controles_red('rum', ['Ignorantes (S)', 'Propagadores (I)', 'Racionales (R)'],
+                          ['#6366f1', '#f59e0b', '#64748b'])
 
         ], className="content right", style={'width': '65%'})
 
@@ -88,19 +164,37 @@ layout = html.Div([
 
 
 # --- LÓGICA MATEMÁTICA ---
-def sistema_rumor(y, t, b, k):
-    S, I, R = y
-    # Ecuaciones del PDF [cite: 150]
-    dSdt = -b * S * I
-    dIdt = b * S * I - k * I
-    dRdt = k * I
-    return [dSdt, dIdt, dRdt]
+# Ecuaciones del PDF [cite: 150]: el SIR del registro (utils/modelos.py)
+
+SALIDAS = [Output('grafica-rumor', 'figure'),
+           Output('rum-pico', 'children'),
+           Output('rum-alcance', 'children'),
+           Output('texto-analisis-rumor', 'children'),
+           Output('sensibilidad-rumor', 'figure')]
+
+
+def ejes_sensibilidad(b):
+    # Malla 40 x 40 de (b, k) alrededor del escenario actual
+    return np.linspace(b * 0.25, b * 2, 40), np.linspace(0.01, 0.05, 40)
+
+
+def clave_sensibilidad(b, N, I0, R0, t_max):
+    # El mapa no depende de k (el eje k es fijo): mover el slider de k lo reutiliza
+    return clave_simulacion('sir:sensibilidad-rumor', [I0, R0], [t_max], [b, N], 0.0, 0.0)
+
+
+def mapa_sensibilidad(b, N, I0, R0, t_max, progreso=None):
+    # Pico de propagadores para los 40 x 40 pares (b, k), guardado en CACHE
+    b_eje, k_eje = ejes_sensibilidad(b)
+
+    def calcular():
+        return barrido_sir(b_eje[None, :], k_eje[:, None], I0, N, t_max, R0=R0, progreso=progreso)['pico']
+
+    return CACHE.obtener_o_calcular(clave_sensibilidad(b, N, I0, R0, t_max), calcular)
+
 
 @callback(
-    [Output('grafica-rumor', 'figure'),
-     Output('rum-pico', 'children'),
-     Output('rum-alcance', 'children'),
-     Output('texto-analisis-rumor', 'children')],
+    salidas_despacho('rum'),
     [Input('btn-rum', 'n_clicks'),
      Input('rum-k-slider', 'value')], # Se actualiza al mover el slider también
     [State('rum-N', 'value'),
@@ -109,63 +203,98 @@ def sistema_rumor(y, t, b, k):
      State('rum-R0', 'value'),
      State('rum-tmax', 'value')]
 )
-def simular_rumor(n_clicks, k, N, b, I0, R0, t_max):
-    # Conversión
+@instrumentar
+def validar_rumor(n_clicks, k, N, b, I0, R0, t_max):
+    # Se revisa ANTES de integrar: entradas completas, horizonte y costo
+    if None in (k, N, b, I0, R0, t_max):
+        return no_update, no_update, "Completa todos los parámetros."
     N, b, k = float(N), float(b), float(k)
     I0, R0, t_max = float(I0), float(R0), float(t_max)
+    if not 0 < t_max <= LIMITE_DIAS:
+        return no_update, no_update, f"Los días a simular deben ser mayores que 0 y como máximo {LIMITE_DIAS:.0f}."
 
+    # Lo caro son los barridos: el de los escenarios Q4/Q5 y el mapa 40 x 40
+    # (este último solo si no está ya en CACHE, p. ej. al mover el slider de k)
+    costo = costo_barrido(b, [k, k, k + 0.01, k], N, t_max, [I0, 2 * I0, I0, I0], [R0, R0, R0, R0 / 2])
+    if not CACHE.contiene(clave_sensibilidad(b, N, I0, R0, t_max)):
+        b_eje, k_eje = ejes_sensibilidad(b)
+        costo += costo_barrido(b_eje[None, :], k_eje[:, None], N, t_max, I0, R0)
+    return despachar(costo, {'k': k, 'N': N, 'b': b, 'I0': I0, 'R0': R0, 't_max': t_max})
 
+
+def simular_rumor(progreso, k, N, b, I0, R0, t_max):
+    # progreso(hecho, total) solo llega cuando corre en segundo plano
     S0 = N - I0 - R0
     y0 = [S0, I0, R0]
-    t = np.linspace(0, t_max, 200)
 
 
-    sol = odeint(sistema_rumor, y0, t, args=(b, k))
+    t, sol = simular_trayectoria('sir', y0, t_max, {'b': b, 'k': k})
     S, I, R = sol.T
 
-    max_propagadores = np.max(I)
-    dia_pico = t[np.argmax(I)]
+    # Pico y alcance exactos (utils/metricas.py), no el argmax sobre 200 puntos
+    m = metricas_sir(b, k, S0, I0, R0)
+    max_propagadores = m['pico']
+    dia_pico = m['dia_pico']
     
-    total_creyeron = S0 - S[-1]
+    total_creyeron = m['tamano_final']
     porcentaje_creyeron = (total_creyeron / S0) * 100
 
-    # 4. Gráfica
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=t, y=S, mode='lines', name='Ignorantes (S)', line=dict(color='#6366f1'))) # Indigo
-    fig.add_trace(go.Scatter(x=t, y=I, mode='lines', name='Propagadores (I)', line=dict(color='#f59e0b', width=3))) # Ambar
-    fig.add_trace(go.Scatter(x=t, y=R, mode='lines', name='Racionales (R)', line=dict(color='#64748b'))) # Slate
-
-    fig.update_layout(
-        title={
-            'text': "Dinámica SIR (Estudiantes)",
-            'y': 0.95,
-            'x': 0.5,
-            'xanchor': 'center',
-            'yanchor': 'top'
-        },
-        template="plotly_white",
-        hovermode="x unified",
-        # MÁRGENES AJUSTADOS: Menos espacio a los lados, más espacio abajo para la leyenda
-        margin=dict(l=10, r=10, t=50, b=100),
-        # LEYENDA ABAJO HORIZONTAL (Esto libera el ancho)
-        legend=dict(
-            orientation="h", 
-            yanchor="top", 
-            y=-0.2, 
-            xanchor="center", 
-            x=0.5
-        )
-    )
+    # 4. Gráfica: solo viajan los datos de S, I, R (el resto está en FIGURA_BASE)
+    fig = parche_series(t, S, I, R)
 
     # 5. Texto Dinámico
     # El PDF menciona que si I0 aumenta, es más rápido (Q4) [cite: 206]
     # Y si R0 baja, dura más (Q5) [cite: 211]
+    # Los tres escenarios alternativos se calculan de verdad en un solo barrido:
+    # [base, I0 doble, k + 0.01, R0 a la mitad]
+    esc = barrido_sir(b, [k, k, k + 0.01, k], [I0, 2 * I0, I0, I0], N, t_max,
+                      R0=[R0, R0, R0, R0 / 2])
+    dia_base, dia_i0, dia_k, dia_r0 = esc['dia_pico']
+    pico_base, _, pico_k, _ = esc['pico']
+
     analisis = f"""
-    En este escenario, el pico máximo de difusión ocurre el día {dia_pico:.1f}. 
+    En este escenario, pico máximo de difusión: {formato_dia(dia_pico)}.
     El {porcentaje_creyeron:.1f}% de los alumnos susceptibles terminaron escuchando el rumor.
     
-    Observación (Q4/Q5): Si aumentas los propagadores iniciales (I0), verás que la curva naranja se dispara antes.
-    Si aumentas la racionalidad (k), notarás que el pico baja drásticamente.
+    Observación (Q4/Q5): Si duplicas los propagadores iniciales (I0 = {2 * I0:.0f}), el pico se adelanta al día {dia_i0:.1f} (antes: día {dia_base:.1f}).
+    Si la racionalidad sube a k = {k + 0.01:.2f}, el pico baja de {pico_base:.0f} a {pico_k:.0f} alumnos.
+    Con la mitad de racionales iniciales (R0 = {R0 / 2:.0f}), el pico llega el día {dia_r0:.1f}.
     """
 
-    return fig, f"{int(max_propagadores)} alumnos", f"{porcentaje_creyeron:.1f}%", analisis
\ No newline at end of file
+    # 6. Mapa de sensibilidad: pico de propagadores para 40 x 40 pares (b, k)
+    b_eje, k_eje = ejes_sensibilidad(b)
+    malla = mapa_sensibilidad(b, N, I0, R0, t_max, progreso)
+
+    fig_sens = Patch()
+    fig_sens['data'][0]['x'] = arreglo(b_eje)
+    fig_sens['data'][0]['y'] = arreglo(k_eje)
+    fig_sens['data'][0]['z'] = arreglo(malla)
+    fig_sens['data'][1]['x'] = [b]
+    fig_sens['data'][1]['y'] = [k]
+
+    return fig, f"{int(max_propagadores)} alumnos", f"{porcentaje_creyeron:.1f}%", analisis, fig_sens
+
+
+# En línea (solo el último valor del slider) o en segundo plano según validar_rumor
+registrar_trabajo('rum', SALIDAS, simular_rumor, 'btn-rum', solo_el_ultimo=True)
+
+
+@callback(
+    [Output('rum-red-grafica', 'figure'),
+     Output('rum-red-mensaje', 'children')],
+    Input('rum-red-btn', 'n_clicks'),
+    [State('rum-red-tipo', 'value'),
+     State('rum-red-nodos', 'value'),
+     State('rum-red-grado', 'value'),
+     State('rum-N', 'value'),
+     State('rum-b', 'value'),
+     State('rum-k-slider', 'value'),
+     State('rum-I0', 'value'),
+     State('rum-R0', 'value'),
+     State('rum-tmax', 'value')],
+    prevent_initial_call=True
+)
+@instrumentar
+def simular_red_rumor(n_clicks, tipo, nodos, grado, N, b, k, I0, R0, t_max):
+    # Mismas proporciones iniciales que el caso (p. ej. 1 de 275), en una red de `nodos`
+    return comparar_red(tipo, nodos, grado, N, b, k, I0, R0, t_max, 'propagadores')
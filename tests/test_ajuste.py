@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils.ajuste import ajustar, leer_csv, sensibilidades
+from utils.modelos import MODELOS
+from utils.simulacion import simular
+
+N = 7138
+
+
+@pytest.mark.parametrize('nombre, y, args', [
+    ('sir', [900, 50, 50], (3e-4, 0.2)),
+    ('seir', [900, 30, 20, 50], (3e-4, 0.3, 0.2)),
+    ('allee', [40], (0.5, 300, 20)),
+    ('cosecha', [120], (0.1, 1000, 10)),
+])
+def test_derivada_respecto_de_parametros(nombre, y, args):
+    modelo = MODELOS[nombre]
+    y, args = np.array(y, dtype=float), np.array(args)
+    h = 1e-6 * args
+    numerica = np.column_stack([(modelo.rhs(0, y, *(args + d)) - modelo.rhs(0, y, *(args - d))) / (2 * d[j])
+                                for j, d in enumerate(np.diag(h))])
+    np.testing.assert_allclose(modelo.dpar(0, y, *args), numerica, rtol=1e-6, atol=1e-9)
+
+
+def test_sensibilidades_igual_a_diferencias_finitas():
+    t = np.linspace(0, 40, 81)
+    theta = np.array([2 / N, 0.4, 3.0])
+    _, dY = sensibilidades('sir', t, theta[:2], N, theta[2])
+    for j in range(3):
+        h = np.zeros(3)
+        h[j] = 1e-5 * theta[j]
+        mas, menos = theta + h, theta - h
+        Ym = simular('sir', [N - mas[2], mas[2], 0], t, {'b': mas[0], 'k': mas[1]}, usar_cache=False)
+        Yn = simular('sir', [N - menos[2], menos[2], 0], t, {'b': menos[0], 'k': menos[1]}, usar_cache=False)
+        np.testing.assert_allclose(dY[:, :, j], (Ym - Yn) / (2 * h[j]), rtol=1e-3, atol=1e-3 * np.abs(dY[:, :, j]).max())
+
+
+def test_recupera_parametros_sir_sin_ruido():
+    t = np.linspace(0, 40, 200)
+    I = simular('sir', [N - 3, 3, 0], t, {'b': 2 / N, 'k': 0.4})[:, 1]
+    r = ajustar('sir', t, {'I': I}, N)
+    np.testing.assert_allclose([r['parametros'][p] for p in ('b', 'k', 'I0')], [2 / N, 0.4, 3], rtol=1e-3)
+
+
+def test_intervalos_contienen_el_valor_real_seir():
+    t = np.linspace(0, 80, 300)
+    Y = simular('seir', [N - 5, 0, 5, 0], t, {'b': 1 / N, 'sigma': 0.3, 'gamma': 0.2})
+    rng = np.random.default_rng(3)
+    observados = {'I': Y[:, 2] + rng.normal(0, 10, t.size), 'R': Y[:, 3] + rng.normal(0, 30, t.size)}
+    r = ajustar('seir', t, observados, N)
+    for p, real in {'b': 1 / N, 'sigma': 0.3, 'gamma': 0.2, 'I0': 5}.items():
+        bajo, alto = r['intervalos'][p]
+        assert bajo < real < alto, p
+
+
+def test_arranque_tibio_con_mas_datos():
+    # Con los primeros 20 días y luego con los 40: el segundo ajuste parte
+    # del primero y necesita muchas menos integraciones que el multistart
+    t = np.arange(0, 40.5, 0.5)
+    I = simular('sir', [N - 1, 1, 0], t, {'b': 1 / N, 'k': 0.4})[:, 1]
+    I = I + np.random.default_rng(0).normal(0, 20, t.size)
+    previo = ajustar('sir', t[:41], {'I': I[:41]}, N)
+    tibio = ajustar('sir', t, {'I': I}, N, inicial=previo['parametros'])
+    frio = ajustar('sir', t, {'I': I}, N)
+    assert tibio['inicios'] == 1
+    assert tibio['evaluaciones'] * 5 < frio['evaluaciones']
+    np.testing.assert_allclose(tibio['parametros']['b'], frio['parametros']['b'], rtol=1e-3)
+
+
+def test_miles_de_puntos():
+    t = np.linspace(0, 40, 5000)
+    I = simular('sir', [N - 3, 3, 0], t, {'b': 2 / N, 'k': 0.4})[:, 1]
+    inicio = time.perf_counter()
+    r = ajustar('sir', t, {'I': I + np.random.default_rng(1).normal(0, 5, t.size)}, N)
+    assert time.perf_counter() - inicio < 10
+    assert abs(r['parametros']['k'] - 0.4) < 0.01
+
+
+def test_leer_csv():
+    t, obs = leer_csv("Dia,I,comentario,R\n2,10,x,1\n0,3,,0\n1,5,y,\n")
+    np.testing.assert_array_equal(t, [0, 1, 2])
+    np.testing.assert_array_equal(obs['I'], [3, 5, 10])
+    assert np.isnan(obs['R'][1])
+    for malo in ("I\n1\n", "t,x\n0,1\n", "t,I\n0,1\n0,2\n", "t,I\n0,hola\n", "t,I\n"):
+        with pytest.raises(ValueError):
+            leer_csv(malo)
+    with pytest.raises(ValueError):
+        ajustar('allee', t, obs, N)
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from utils.barrido import barrido_sir, costo_barrido
+
+
+def _referencia(b, k, I0, N, t_max, R0=0.0):
+    # Solución densa de un escenario: estado en t_max, pico y día del pico
+    def rhs(t, y):
+        S, I, _ = y
+        return [-b * S * I, b * S * I - k * I, k * I]
+
+    def cruce(t, y):
+        # dI/dt = 0: el pico es donde b S baja de k
+        return b * y[0] - k
+    cruce.direction = -1
+
+    sol = solve_ivp(rhs, (0, t_max), [N - I0 - R0, I0, R0], method='LSODA',
+                    rtol=1e-10, atol=1e-10, events=cruce if k > 0 else None)
+    if k > 0 and sol.t_events[0].size:
+        return sol.y[:, -1], sol.y_events[0][0][1], sol.t_events[0][0]
+    if b * (N - I0 - R0) <= k:
+        return sol.y[:, -1], I0, 0.0
+    # Aún crece al final del horizonte (siempre, si k = 0)
+    return sol.y[:, -1], sol.y[1, -1], t_max
+
+
+# (b, k, I0, N, R0): rumor y política por defecto, un brote lento y k = 0
+ESCENARIOS = [
+    (0.004, 0.02, 1, 275, 8),
+    (5e-5, 2e-5, 50, 10050, 0),
+    (1e-5, 0.05, 1, 10000, 0),
+    (0.0004, 0.0, 1, 1000, 0),
+]
+
+
+@pytest.mark.parametrize('t_max', [15, 100, 1000, 100000])
+@pytest.mark.parametrize('b, k, I0, N, R0', ESCENARIOS)
+def test_barrido_igual_a_la_solucion_densa(b, k, I0, N, R0, t_max):
+    final, pico, dia = _referencia(b, k, I0, N, t_max, R0)
+    r = barrido_sir(b, k, I0, N, t_max, R0=R0)
+    assert r['S_final'] == pytest.approx(final[0], rel=1e-4, abs=1e-6 * N)
+    assert r['I_final'] == pytest.approx(final[1], rel=1e-4, abs=1e-6 * N)
+    assert r['pico'] == pytest.approx(pico, rel=1e-4)
+    assert r['dia_pico'] == pytest.approx(dia, rel=2e-3, abs=t_max * 1e-5)
+
+
+def test_barrido_de_una_malla():
+    # La malla del mapa de sensibilidad: cada celda como si fuera sola
+    b_eje, k_eje = np.linspace(0.001, 0.008, 6), np.linspace(0.01, 0.05, 5)
+    malla = barrido_sir(b_eje[None, :], k_eje[:, None], 1, 275, 1000, R0=8)
+    assert malla['pico'].shape == (5, 6)
+    for i, k in enumerate(k_eje):
+        for j, b in enumerate(b_eje):
+            _, pico, dia = _referencia(b, k, 1, 275, 1000, 8)
+            assert malla['pico'][i, j] == pytest.approx(pico, rel=1e-4)
+            assert malla['dia_pico'][i, j] == pytest.approx(dia, rel=2e-3, abs=0.01)
+
+
+def test_costo_crece_con_escenarios_y_es_finito_en_horizontes_largos():
+    uno = costo_barrido(0.004, 0.02, 275, 100000, 1, 8)
+    malla = costo_barrido(np.full((40, 1), 0.004), np.full((1, 40), 0.02), 275, 100000, 1, 8)
+    assert 0 < uno < malla < 10
+
+
+def test_mapa_del_rumor_no_se_recalcula_al_mover_k(monkeypatch):
+    os.environ.setdefault('CLIMA_PRECARGA', '0')
+    import app  # noqa: F401  (registra las páginas)
+    import pages.pagina_caso_rumor1 as rumor
+
+    llamadas = []
+    original = rumor.barrido_sir
+
+    def contada(beta, *args, **kwargs):
+        llamadas.append(np.shape(beta))
+        return original(beta, *args, **kwargs)
+
+    monkeypatch.setattr(rumor, 'barrido_sir', contada)
+    rumor.CACHE.limpiar()
+    for k in (0.02, 0.03, 0.04):
+        rumor.simular_rumor(None, k, 275, 0.004, 1, 8, 60)
+    # Un barrido de escenarios por cada k, pero la malla 40 x 40 una sola vez
+    assert llamadas.count((1, 40)) == 1
+    assert len(llamadas) == 4
@@ -0,0 +1,106 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from utils import bifurcacion
+from utils.bifurcacion import continuar, desenlace_allee, desenlace_cosecha, diagrama
+from utils.simulacion import simular_trayectoria
+
+
+def test_pliegue_de_la_cosecha_en_rK_sobre_4():
+    r, K = 0.1, 1000
+    rama = continuar('cosecha', [K], {'r': r, 'K': K, 'h': 0}, 'h', 40)
+    (h_critico, P), = rama['pliegues']
+    assert abs(h_critico - r * K / 4) < 1e-3 * r * K
+    assert abs(P[0] - K / 2) < 0.01 * K
+    # Antes del pliegue la rama es el equilibrio alto (estable); después, el umbral
+    h, x, estable = rama['lam'], rama['x'][:, 0], rama['estable']
+    raiz = np.sqrt(np.maximum(K ** 2 / 4 - h * K / r, 0))
+    np.testing.assert_allclose(x, np.where(x > K / 2, K / 2 + raiz, K / 2 - raiz), atol=1e-6 * K)
+    assert np.all(estable[x > K / 2 + 1]) and not np.any(estable[x < K / 2 - 1])
+
+
+def test_pliegue_al_variar_r():
+    # Con h fijo, bajar r lleva al mismo pliegue: r* = 4 h / K
+    h, K = 20, 1000
+    rama = continuar('cosecha', [900], {'r': 0.5, 'K': K, 'h': h}, 'r', 0.01)
+    (r_critico, _), = rama['pliegues']
+    assert abs(r_critico - 4 * h / K) < 1e-4
+
+
+def test_allee_equilibrios_y_transcritica():
+    K = 300
+    ramas = diagrama('allee', {'r': 0.5, 'K': K, 'A': 10}, 'A', 10, 400, -50, 450)
+    a_lo_largo = {round(r['x'][0, 0]): r for r in ramas}
+    assert sorted(a_lo_largo) == [0, 10, K]
+    # 0 y K estables, A inestable, hasta que A pasa a K
+    assert np.all(a_lo_largo[0]['estable'])
+    umbral, capacidad = a_lo_largo[10], a_lo_largo[K]
+    np.testing.assert_allclose(umbral['x'][:, 0], umbral['lam'], atol=1e-6)
+    assert not np.any(umbral['estable'][umbral['lam'] < K - 1])
+    assert np.all(capacidad['estable'][capacidad['lam'] < K - 1])
+    assert not np.any(capacidad['estable'][capacidad['lam'] > K + 1])
+    (A, _), = capacidad['cambios']
+    assert abs(A - K) < 5
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_desenlace_cosecha_igual_a_integrar(semilla):
+    rng = np.random.default_rng(semilla)
+    for _ in range(20):
+        r, K = rng.uniform(0.05, 1), rng.uniform(100, 2000)
+        h, P0 = rng.uniform(0, 0.4) * r * K, rng.uniform(0, 1.2) * K
+        d = desenlace_cosecha(P0, r, K, h)
+        # Cerca del umbral el desenlace depende de decimales: no se compara
+        if abs(P0 - d['umbral']) < 0.01 * K or abs(h - d['h_critico']) < 0.005 * r * K:
+            continue
+        t_max = 2 * d['dia'] if d['se_extingue'] else 200 / r
+        t, P = simular_trayectoria('cosecha', [P0], t_max, {'r': r, 'K': K, 'h': h}, usar_cache=False)
+        P = P[:, 0]
+        extinta = np.isnan(P) | (P <= 0)
+        assert extinta.any() == d['se_extingue'], (P0, r, K, h)
+        if d['se_extingue']:
+            dia = t[np.argmax(extinta)]
+            assert abs(dia - d['dia']) < 0.02 * d['dia'] + 2 * t_max / t.size
+
+
+def test_desenlace_allee_igual_a_integrar():
+    for P0, A, K in [(10, 20, 300), (30, 20, 300), (19, 20, 300), (21, 20, 300), (60, 50, 100)]:
+        d = desenlace_allee(P0, 0.5, K, A)
+        _, P = simular_trayectoria('allee', [P0], 400, {'r': 0.5, 'K': K, 'A': A}, usar_cache=False)
+        assert d['se_extingue'] == (P[-1, 0] < 1)
+        assert abs(d['umbral'] - A) < 1e-6 * K
+
+
+def test_consulta_en_tiempo_constante():
+    desenlace_cosecha(200, 0.1, 1000, 20)
+    inicio = time.perf_counter()
+    for h in np.linspace(0, 40, 2000):
+        desenlace_cosecha(200, 0.1, 1000, h)
+        desenlace_allee(30, 0.5, 300, h + 1)
+    assert (time.perf_counter() - inicio) / 2000 < 1e-3
+
+
+def test_entradas_invalidas():
+    assert desenlace_cosecha(200, 0, 1000, 20) is None
+    assert desenlace_cosecha(None, 0.1, 1000, 20) is None
+    assert desenlace_allee(30, 0.5, 300, 0) is None
+    with pytest.raises(ValueError):
+        bifurcacion.equilibrios('sir', {'b': 1e-3, 'k': 0.1}, 0, 1)
+
+
+def test_paginas():
+    os.environ.setdefault('CLIMA_PRECARGA', '0')
+    import app  # noqa: F401  (registra las páginas)
+    from pages.pagina2 import actualizar_allee
+    from pages.pagina4 import actualizar_bifurcacion_cosecha
+
+    _, mensaje, _ = actualizar_bifurcacion_cosecha(None, 30, 200, 0.1, 1000, 100)
+    assert 'h* = 25' in mensaje
+    _, mensaje, _ = actualizar_bifurcacion_cosecha(None, 10, 200, 0.1, 1000, 100)
+    assert mensaje.startswith('Sobrevive')
+    # P0 apenas bajo A: a T_MAX todavía queda gente, pero el desenlace es la extinción
+    _, mensaje, _ = actualizar_allee(19, 20, 300, 0.1)
+    assert 'extinguió' in mensaje
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+
+from utils.clima import ClienteClima
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SesionFalsa:
+    # Responde como Open-Meteo sin ir a la red y cuenta las peticiones
+    def __init__(self, temperatura=20.0):
+        self.temperatura = temperatura
+        self.peticiones = 0
+
+    def get(self, url, timeout=None, params=None):
+        self.peticiones += 1
+        n = len(str(params['latitude']).split(','))
+        dato = {'current_weather': {'temperature': self.temperatura, 'windspeed': 5.0},
+                'hourly': {'time': [], 'temperature_2m': [], 'windspeed_10m': []}}
+        return RespuestaFalsa(dato if n == 1 else [dato] * n)
+
+
+class RespuestaFalsa:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.datos
+
+
+def test_importar_la_app_no_arranca_la_precarga():
+    entorno = {k: v for k, v in os.environ.items() if k != 'CLIMA_PRECARGA'}
+    salida = subprocess.run(
+        [sys.executable, '-c', 'import threading, app; '
+                               'print([h.name for h in threading.enumerate()])'],
+        cwd=RAIZ, env=dict(entorno, PYTHONPATH=RAIZ), capture_output=True, text=True, check=True)
+    assert 'precarga-clima' not in salida.stdout
+
+
+def test_precarga_programada_arranca_al_iniciar():
+    sesion = SesionFalsa()
+    cliente = ClienteClima(sesion=sesion)
+    cliente.programar_precarga([(-12.0464, -77.0428), (40.4168, -3.7038)])
+    assert cliente._hilo_precarga is None and sesion.peticiones == 0
+
+    hilo = cliente.iniciar_precarga()
+    try:
+        for _ in range(100):
+            if cliente.consultar(40.4168, -3.7038) is not None:
+                break
+            hilo.join(0.05)
+        assert cliente.consultar(-12.0464, -77.0428)['current_weather']['temperature'] == 20.0
+        assert sesion.peticiones == 1   # todas las ciudades en una sola petición
+    finally:
+        cliente.detener_precarga()
+
+
+def _colores_del_parche(parche):
+    for operacion in parche.to_plotly_json()['operations']:
+        if operacion['location'] == ['data', 0, 'marker', 'color']:
+            return operacion['params']['value']
+
+
+def test_mapa_colorea_la_ciudad_recien_descargada(monkeypatch):
+    os.environ.setdefault('CLIMA_PRECARGA', '0')
+    import app  # noqa: F401  (registra las páginas)
+    from pages import pagina_api
+
+    cliente = ClienteClima(sesion=SesionFalsa())
+    monkeypatch.setattr(pagina_api, 'CLIENTE', cliente)
+    temp, _, parche, _ = pagina_api.actualizar_dashboard('Madrid', None)
+    colores = _colores_del_parche(parche)
+    idx = list(pagina_api.ciudades).index('Madrid')
+    assert temp == "20.0 °C"
+    assert colores[idx] != 'lightgray'
+    assert colores.count('lightgray') == len(colores) - 1
+
+
+def test_forzar_descarga_aunque_el_cache_este_fresco():
+    sesion = SesionFalsa()
+    cliente = ClienteClima(sesion=sesion)
+    cliente.pronostico(-12.0464, -77.0428)
+    cliente.pronostico(-12.0464, -77.0428)
+    assert sesion.peticiones == 1
+
+    sesion.temperatura = 25.0
+    datos = cliente.pronostico(-12.0464, -77.0428, forzar=True)
+    assert sesion.peticiones == 2
+    assert datos['current_weather']['temperature'] == 25.0
+    assert cliente.pronostico(-12.0464, -77.0428)['current_weather']['temperature'] == 25.0
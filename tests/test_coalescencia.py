@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+from dash.exceptions import PreventUpdate
+
+from utils.coalescencia import Coalescedor
+
+
+def _en_hilos(envuelta, llamadas):
+    # Lanza las llamadas casi a la vez; devuelve el resultado de cada una
+    resultados = [None] * len(llamadas)
+
+    def correr(i, args):
+        try:
+            resultados[i] = envuelta(*args)
+        except PreventUpdate:
+            resultados[i] = 'descartada'
+
+    hilos = [threading.Thread(target=correr, args=(i, args)) for i, args in enumerate(llamadas)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+def test_sin_pestana_se_llama_tal_cual():
+    coalescedor = Coalescedor(espera=0.05)
+    envuelta = coalescedor.envolver(lambda x: x * 2, nombre='doble')
+    assert envuelta(3, None) == 6
+    assert coalescedor.estadisticas()['recibidas'] == 0
+
+
+def test_misma_pestana_solo_el_ultimo():
+    coalescedor = Coalescedor(espera=0.2)
+    envuelta = coalescedor.envolver(lambda x: x, nombre='eco')
+    primera = threading.Thread(target=lambda: pytest.raises(PreventUpdate, envuelta, 1, 'pestana-a'))
+    primera.start()
+    threading.Event().wait(0.05)
+    assert envuelta(2, 'pestana-a') == 2
+    primera.join()
+    assert coalescedor.estadisticas()['descartadas'] == 1
+
+
+def test_pestanas_distintas_no_se_descartan():
+    # Dos pestañas del mismo navegador (misma cookie) resuelven cada una lo suyo
+    coalescedor = Coalescedor(espera=0.1)
+    envuelta = coalescedor.envolver(lambda x: x, nombre='eco')
+    assert _en_hilos(envuelta, [(1, 'pestana-a'), (2, 'pestana-b')]) == [1, 2]
+    assert coalescedor.estadisticas()['descartadas'] == 0
@@ -0,0 +1,28 @@
+import numpy as np
+
+from utils.ejecucion import EJECUTOR, Ejecutor
+
+
+def _estado_del_worker():
+    return EJECUTOR.paralelo, EJECUTOR.procesos
+
+
+def _barrido_en_el_worker():
+    from utils.barrido import barrido_sir
+    return barrido_sir(np.full(5000, 4e-4), np.linspace(0.05, 0.2, 5000), 1, 1000, 160)['pico']
+
+
+def test_los_workers_no_abren_pools_anidados(monkeypatch):
+    # Los workers importan utils.ejecucion de nuevo: con esta configuración
+    # su EJECUTOR también tendría procesos > 1 si no se marcara al arrancar
+    monkeypatch.setenv('SIM_EJECUTOR', 'procesos')
+    monkeypatch.setenv('SIM_PROCESOS', '2')
+    ejecutor = Ejecutor(procesos=2, umbral=0.0)
+    try:
+        assert ejecutor.paralelo
+        assert ejecutor.ejecutar('estado', _estado_del_worker) == (False, 0)
+        # Un barrido dentro de un worker corre en línea y vuelve
+        pico = ejecutor.ejecutar('barrido', _barrido_en_el_worker)
+        assert pico.shape == (5000,) and np.all(pico > 1)
+    finally:
+        ejecutor._pool.shutdown()
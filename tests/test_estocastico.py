@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils.estocastico import banda, simular_estocastico
+from utils.simulacion import simular
+
+
+@pytest.mark.parametrize('metodo', ['exacto', 'tau'])
+def test_probabilidad_de_brote_como_el_proceso_de_ramificacion(metodo):
+    # R0 = 2 con un infectado: la mitad de las veces se apaga por azar
+    N, k = 1000, 0.1
+    r = simular_estocastico('sir', [N - 1, 1, 0], 400, {'b': 2 * k / (N - 1), 'k': k},
+                            n_realizaciones=2000, metodo=metodo, semilla=1)
+    assert r['prob_brote_teorica'] == pytest.approx(0.5)
+    assert r['prob_brote'] == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.parametrize('metodo', ['exacto', 'tau'])
+def test_promedio_igual_a_las_edo_con_n_grande(metodo):
+    # Con muchos infectados iniciales no hay extinciones y el promedio sigue a las EDO
+    y0, parametros = [19500, 500, 0], {'b': 3e-5 / 2, 'k': 0.1}
+    r = simular_estocastico('sir', y0, 60, parametros, n_realizaciones=200, n_puntos=61,
+                            metodo=metodo, semilla=2)
+    edo = simular('sir', y0, r['t'], parametros)
+    np.testing.assert_allclose(r['media'], edo, rtol=0.03, atol=0.005 * sum(y0))
+    assert r['prob_brote'] == 1
+
+
+def test_seir_y_bandas_ordenadas():
+    r = simular_estocastico('seir', [993, 5, 2, 0], 160, {'b': 0.5 / 1000, 'sigma': 0.2, 'gamma': 0.1},
+                            n_realizaciones=300, semilla=3)
+    assert r['cuantiles'].shape == (5, 200, 4)
+    # Se conserva la población en cada realización y los cuantiles van en orden
+    np.testing.assert_allclose(r['media'].sum(axis=1), 1000)
+    assert np.all(np.diff(r['cuantiles'], axis=0) >= 0)
+    alto, bajo, mediana = banda(r, 2)
+    assert np.all(bajo <= mediana) and np.all(mediana <= alto)
+
+
+def test_misma_semilla_mismo_resultado():
+    args = ('sir', [274, 1, 0], 60, {'b': 0.004, 'k': 0.02})
+    a = simular_estocastico(*args, n_realizaciones=100, semilla=7)
+    b = simular_estocastico(*args, n_realizaciones=100, semilla=7)
+    np.testing.assert_array_equal(a['cuantiles'], b['cuantiles'])
+    assert a['prob_brote'] == b['prob_brote']
+
+
+def test_interactivo_con_mil_realizaciones():
+    # Valores por defecto de pagina6 (Gillespie) y del brote estudiantil (tau-leaping)
+    for args, metodo in ((('sir', [998, 2, 0], 160, {'b': 0.4 / 1000, 'k': 0.1}), 'exacto'),
+                         (('sir', [7137, 1, 0], 40, {'b': 0.0001401, 'k': 0.4}), 'tau')):
+        inicio = time.perf_counter()
+        r = simular_estocastico(*args, n_realizaciones=1000, semilla=0)
+        assert r['metodo'] == metodo
+        assert time.perf_counter() - inicio < 2.0
@@ -0,0 +1,24 @@
+import numpy as np
+
+from utils.funciones import trazas_campo_vectorial
+
+
+def test_hover_una_vez_por_vector():
+    X, Y = np.meshgrid(np.linspace(-1, 1, 4), np.linspace(-2, 2, 3))
+    flechas, origenes = trazas_campo_vectorial(X, Y, X * 0 + 0.5, -Y)
+    n = X.size
+    # Flechas: (inicio, punta, NaN) por vector y sin hover
+    assert len(flechas.x) == 3 * n and flechas.customdata is None
+    assert np.isnan(flechas.x[2::3]).all()
+    # Orígenes: un punto y un (u, v) por vector
+    assert len(origenes.x) == n and origenes.customdata.shape == (n, 2)
+    np.testing.assert_allclose(origenes.customdata[:, 0], 0.5)
+    np.testing.assert_allclose(origenes.customdata[:, 1], -Y.ravel())
+
+
+def test_campo_constante():
+    # dx/dt = 1: la expresión no depende de la malla (broadcast)
+    X, Y = np.meshgrid(np.arange(3.0), np.arange(2.0))
+    flechas, origenes = trazas_campo_vectorial(X, Y, 1.0, 0.0)
+    np.testing.assert_allclose(flechas.x[1::3], X.ravel() + 1)
+    np.testing.assert_allclose(origenes.customdata, [[1, 0]] * X.size)
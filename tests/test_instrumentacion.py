@@ -0,0 +1,72 @@
+import os
+import time
+
+from utils import instrumentacion
+from utils.instrumentacion import etapas, iniciar_peticion, medir, server_timing, terminar_peticion
+
+CALLBACK_ALLEE = {
+    "output": "..grafica-allee.figure...mensaje-allee.children...mensaje-allee.style..",
+    "outputs": [{"id": "grafica-allee", "property": "figure"},
+                {"id": "mensaje-allee", "property": "children"},
+                {"id": "mensaje-allee", "property": "style"}],
+    "inputs": [{"id": "allee-p0", "property": "value", "value": 31},
+               {"id": "allee-a", "property": "value", "value": 20},
+               {"id": "allee-k", "property": "value", "value": 300},
+               {"id": "allee-r", "property": "value", "value": 0.5}],
+    "state": [{"id": "pestana", "property": "data", "value": None}],
+    "changedPropIds": ["allee-p0.value"],
+}
+
+
+def _cliente():
+    os.environ.setdefault('CLIMA_PRECARGA', '0')
+    import app
+    return app.server.test_client()
+
+
+def test_medir_fuera_de_una_peticion_no_hace_nada():
+    with medir():
+        pass
+    assert terminar_peticion() is None
+
+
+def test_medir_anidado_cuenta_una_vez():
+    iniciar_peticion()
+    with medir():
+        with medir():
+            time.sleep(0.02)
+    registro = terminar_peticion()
+    assert 0.02 <= registro['etapas']['resolver'] < registro['etapas']['total']
+    registro['etapas']['callback'] = registro['etapas']['total']
+    assert server_timing(etapas(registro)).startswith('resolver;dur=')
+
+
+def test_callback_con_server_timing_y_metricas():
+    cliente = _cliente()
+    respuesta = cliente.post('/_dash-update-component', json=CALLBACK_ALLEE)
+    assert respuesta.status_code == 200
+    cabecera = respuesta.headers['Server-Timing']
+    for etapa in ('resolver', 'figura', 'serializacion', 'total'):
+        assert f'{etapa};dur=' in cabecera
+
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    assert 'lab_callback_segundos_count{callback="actualizar_allee"}' in texto
+    evaluaciones = [l for l in texto.splitlines()
+                    if l.startswith('lab_rhs_evaluaciones_total{callback="actualizar_allee"}')]
+    assert int(evaluaciones[0].split()[-1]) > 0
+    assert 'lab_cache_entradas' in texto
+
+
+def test_perfil_necesita_token(monkeypatch):
+    cliente = _cliente()
+    assert cliente.get('/perfil').status_code == 404
+
+    import utils.servidor
+    monkeypatch.setattr(utils.servidor, 'TOKEN_PERFIL', 'secreto')
+    monkeypatch.setattr(instrumentacion.PERFILADOR, 'muestreo', 0.0)
+    respuesta = cliente.get('/perfil?muestreo=1', headers={'X-Token-Perfil': 'secreto'})
+    assert respuesta.status_code == 200 and instrumentacion.PERFILADOR.muestreo == 1.0
+    cliente.post('/_dash-update-component', json={**CALLBACK_ALLEE, "inputs": [
+        {**e, "value": 32} if e["id"] == "allee-p0" else e for e in CALLBACK_ALLEE["inputs"]]})
+    texto = cliente.get('/perfil', headers={'X-Token-Perfil': 'secreto'}).get_data(as_text=True)
+    assert 'actualizar_allee' in texto
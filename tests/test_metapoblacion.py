@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pytest
+
+import utils.metapoblacion as meta
+from utils.simulacion import simular
+
+
+def _parches(m, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return rng.uniform(-60, 70, m), rng.uniform(-180, 180, m), rng.uniform(1e5, 1e7, m)
+
+
+def test_sin_movilidad_cada_ciudad_es_un_sir_aislado():
+    lat, lon, P = _parches(12)
+    r = meta.simular_metapoblacion(lat, lon, P, 3, 10, 0.3, 0.1, 0.0, 200, usar_cache=False)
+    sir = simular('sir', [P[3] - 10, 10, 0], r['t'], {'b': 0.3 / P[3], 'k': 0.1})
+    np.testing.assert_allclose(r['I'][:, 3], sir[:, 1], rtol=1e-3, atol=1e-3 * P[3])
+    assert np.all(np.delete(r['I'], 3, axis=1) == 0)
+    assert np.isinf(np.delete(r['llegada'], 3)).all()
+
+
+def test_jacobiano_disperso_igual_a_diferencias_finitas():
+    lat, lon, P = _parches(30, semilla=1)
+    C = meta.acoplamiento(meta.movilidad_gravedad(lat, lon, P, vecinos=4), 0.05)
+    rng = np.random.default_rng(2)
+    y = np.concatenate([P * rng.uniform(0.3, 1, 30), P * rng.uniform(0, 0.1, 30)])
+    args = (0.3, 0.1, C, 1 / P)
+    J = meta.jacobiano(0, y, *args).toarray()
+    f0 = meta.lado_derecho(0, y, *args)
+    h = 1e-3 * np.maximum(np.abs(y), 1)
+    numerico = np.column_stack([(meta.lado_derecho(0, y + h[j] * np.eye(60)[j], *args) - f0) / h[j]
+                                for j in range(60)])
+    np.testing.assert_allclose(J, numerico, rtol=1e-5, atol=1e-12)
+
+
+def test_miles_de_parches_sin_matrices_densas():
+    lat, lon, P = _parches(3000)
+    W = meta.movilidad_gravedad(lat, lon, P)
+    C = meta.acoplamiento(W, 0.01)
+    # A lo sumo 2 * VECINOS entradas por fila (más la diagonal)
+    assert C.nnz <= 3000 * (2 * meta.VECINOS + 1)
+    np.testing.assert_allclose(np.asarray(C.sum(axis=1)).ravel(), 1.0)
+
+    inicio = time.perf_counter()
+    r = meta.simular_metapoblacion(lat, lon, P, 0, 10, 0.3, 0.1, 0.01, 365, usar_cache=False)
+    assert time.perf_counter() - inicio < 5
+    np.testing.assert_allclose(r['S'] + r['I'] + r['R'], np.broadcast_to(P, r['S'].shape))
+    # La epidemia llega antes a los vecinos del origen que al resto
+    vecinos = W[0].indices
+    resto = np.setdiff1d(np.arange(1, 3000), vecinos)
+    assert np.isfinite(r['llegada'][vecinos]).all()
+    assert r['llegada'][vecinos].max() < np.median(r['llegada'][resto])
+
+
+def test_bdf_con_jacobiano_disperso_igual_a_rk45(monkeypatch):
+    lat, lon, P = _parches(200, semilla=3)
+    args = (lat, lon, P, 0, 10, 0.3, 0.1, 0.01, 300)
+    rk = meta.simular_metapoblacion(*args, usar_cache=False)
+    monkeypatch.setattr(meta, 'RIGIDEZ', 0.0)
+    assert meta.metodo_integracion(0.3, 0.1, 300) == 'BDF'
+    bdf = meta.simular_metapoblacion(*args, usar_cache=False)
+    np.testing.assert_allclose(bdf['I'], rk['I'], rtol=1e-3, atol=1e-3 * P.max())
+
+
+def test_entradas_invalidas():
+    lat, lon, P = _parches(5)
+    with pytest.raises(ValueError):
+        meta.simular_metapoblacion(lat, lon, P, 0, 10, 0.3, 0.1, 1.5, 100)
+    with pytest.raises(ValueError):
+        meta.simular_metapoblacion(lat, lon, P, 0, 10, 0.3, 0.1, 0.01, 0)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from utils.metricas import dia_pico, formato_dia, metricas_sir, pico_infectados, susceptibles_finales
+
+
+def _referencia(b, k, S0, I0):
+    # Solución densa hasta el pico (evento dI/dt = 0) y hasta que I se apaga
+    def rhs(t, y):
+        S, I = y
+        return [-b * S * I, b * S * I - k * I]
+
+    def cruce(t, y):
+        return b * y[0] - k
+    cruce.direction = -1
+
+    def apagado(t, y):
+        return y[1] - 1e-9 * (S0 + I0)
+    apagado.terminal = True
+    apagado.direction = -1
+
+    sol = solve_ivp(rhs, (0, 1e7), [S0, I0], method='LSODA', rtol=1e-12, atol=1e-12,
+                    events=[cruce, apagado])
+    return sol.t_events[0][0], sol.y_events[0][0][1], sol.y[0, -1]
+
+
+# (b, k, S0, I0): casos por defecto de las páginas, brotes lentos, casi
+# críticos y con b S0 >> k (S casi se agota antes del pico)
+ESCENARIOS = [
+    (0.0004, 0.1, 999, 1),
+    (0.004, 0.02, 266, 1),
+    (5e-5, 2e-5, 10000, 50),
+    (1e-5, 0.05, 9999, 1),
+    (0.0001401, 0.4, 7137, 1e-3),
+    (0.5, 0.1, 1e6, 1e-3),
+    (1e-3, 0.9, 1000, 1),
+    (1e-3, 0.5, 1000, 499),
+]
+
+
+@pytest.mark.parametrize('b, k, S0, I0', ESCENARIOS)
+def test_metricas_igual_a_la_solucion_densa(b, k, S0, I0):
+    dia, pico, s_inf = _referencia(b, k, S0, I0)
+    assert dia_pico(b, k, S0, I0) == pytest.approx(dia, rel=1e-7)
+    assert pico_infectados(b, k, S0, I0) == pytest.approx(pico, rel=1e-7)
+    assert susceptibles_finales(b, k, S0, I0) == pytest.approx(s_inf, rel=1e-5, abs=1e-6 * S0)
+
+
+def test_dia_pico_vectorizado():
+    b, k, S0, I0 = (np.array(v) for v in zip(*ESCENARIOS))
+    esperado = [dia_pico(*e) for e in ESCENARIOS]
+    np.testing.assert_allclose(dia_pico(b, k, S0, I0), esperado, rtol=1e-12)
+    # Malla con broadcast, con celdas sin brote (b S0 <= k) mezcladas
+    malla = dia_pico(np.linspace(1e-5, 1e-3, 30)[None, :], np.linspace(0.01, 0.5, 20)[:, None], 999, 1)
+    assert malla.shape == (20, 30)
+    assert np.all(np.isfinite(malla)) and np.any(malla == 0) and np.any(malla > 0)
+
+
+def test_sin_infectados_iniciales_no_hay_epidemia():
+    m = metricas_sir(0.0001401, 0.4, 7137, 0.0)
+    assert m['pico'] == 0
+    assert m['dia_pico'] == 0
+    assert m['susceptibles_finales'] == 7137
+    assert m['tamano_final'] == 0
+
+
+def test_sin_brote_y_sin_recuperacion():
+    # b S0 <= k: el pico es el inicial, en el día 0
+    assert dia_pico(1e-4, 0.5, 1000, 1) == 0
+    assert pico_infectados(1e-4, 0.5, 1000, 1) == 1
+    # k = 0: I crece hacia N, no hay pico finito
+    assert dia_pico(4e-4, 0.0, 999, 1) == np.inf
+    assert formato_dia(np.inf) == "sin pico (crece hasta el final)"
+    assert formato_dia(9.2345) == "día 9.2"
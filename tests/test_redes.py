@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+import pytest
+
+import utils.redes as redes
+from utils.modo_red import comparar_red
+from utils.simulacion import simular
+
+
+@pytest.mark.parametrize('tipo', list(redes.TIPOS))
+def test_csr_simetrico_sin_lazos_ni_repetidas(tipo):
+    indptr, indices = redes.generar_red(tipo, 2000, 10, semilla=1)
+    n = indptr.size - 1
+    filas = np.repeat(np.arange(n), np.diff(indptr))
+    assert np.all(filas != indices)
+    claves = filas * n + indices
+    assert np.unique(claves).size == claves.size
+    # (u, v) está si y solo si (v, u) está
+    assert np.array_equal(np.sort(claves), np.sort(indices.astype(np.int64) * n + filas))
+    assert abs(indices.size / n - 10) < 1
+    with pytest.raises(ValueError):
+        indptr[0] = 1   # se comparte entre llamadas: de solo lectura
+
+
+def test_barabasi_albert_tiene_cola_pesada():
+    g_er = np.diff(redes.generar_red('er', 20000, 10)[0])
+    g_ba = np.diff(redes.generar_red('ba', 20000, 10)[0])
+    # Cada nodo nuevo llega con grado / 2 aristas (salvo alguna repetida)
+    assert np.mean(g_ba >= 5) > 0.99
+    assert g_ba.max() > 5 * g_er.max()
+
+
+def test_red_densa_tiende_al_campo_medio():
+    # Con grado medio alto cada nodo ve la prevalencia promedio: SIR de las EDO
+    indptr, indices = redes.generar_red('er', 20000, 400)
+    r = redes.contagio_en_red(indptr, indices, 0.5, 0.1, 0.01, 0.0, 60)
+    sir = simular('sir', [0.99, 0.01, 0.0], r['t'], {'b': 0.5, 'k': 0.1})
+    assert np.max(np.abs(r['I'] - sir[:, 1])) < 0.02
+    assert abs(r['R'][-1] - sir[-1, 2]) < 0.02
+    np.testing.assert_allclose(r['S'] + r['I'] + r['R'], 1.0)
+
+
+def test_la_red_frena_el_contagio():
+    # Con pocos vecinos los contactos se repiten (y los ya contagiados no
+    # cuentan): la red alcanza a menos gente que el campo medio
+    indptr, indices = redes.generar_red('ws', 50000, 4)
+    r = redes.contagio_en_red(indptr, indices, 0.3, 0.1, 0.001, 0.0, 200)
+    sir = simular('sir', [0.999, 0.001, 0.0], r['t'], {'b': 0.3, 'k': 0.1})
+    assert r['R'][-1] < sir[-1, 2] - 0.2
+
+
+def test_cien_mil_nodos_en_tiempo_interactivo():
+    inicio = time.perf_counter()
+    patch, mensaje = comparar_red('ba', 100000, 10, 275, 0.004, 0.01, 1, 8, 15)
+    assert time.perf_counter() - inicio < 2.0
+    assert 'Barabási' in mensaje
+
+
+def test_entradas_invalidas():
+    with pytest.raises(ValueError):
+        redes.generar_red('completo', 100, 4)
+    with pytest.raises(ValueError):
+        redes.generar_red('er', redes.MAX_NODOS + 1, 4)
+    with pytest.raises(ValueError):
+        redes.generar_red('ba', redes.MAX_NODOS, 1000)
+    _, mensaje = comparar_red('er', 10, 20, 275, 0.004, 0.01, 1, 8, 15)
+    assert 'grado' in mensaje
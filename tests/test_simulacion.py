@@ -0,0 +1,46 @@
+import os
+import time
+
+import numpy as np
+
+from utils.simulacion import simular, simular_trayectoria
+
+
+def test_allee_con_umbral_cero_no_cuelga():
+    # A = 0 hace P/A infinito: antes LSODA achicaba el paso para siempre
+    inicio = time.perf_counter()
+    t, P = simular_trayectoria('allee', [30], 50, {'r': 0.5, 'K': 300, 'A': 0}, usar_cache=False)
+    assert time.perf_counter() - inicio < 10
+    assert t[0] == 0 and t[-1] == 50
+    assert P[0, 0] == 30 and np.isnan(P[-1, 0])
+
+
+def test_allee_casi_sin_umbral_agota_el_presupuesto():
+    inicio = time.perf_counter()
+    _, P = simular_trayectoria('allee', [30], 50, {'r': 0.5, 'K': 300, 'A': 1e-300}, usar_cache=False)
+    assert time.perf_counter() - inicio < 10
+    assert np.isnan(P[-1, 0])
+
+
+def test_allee_normal():
+    _, P = simular_trayectoria('allee', [30], 50, {'r': 0.5, 'K': 300, 'A': 20}, usar_cache=False)
+    assert abs(P[-1, 0] - 300) < 1e-3
+    _, P = simular_trayectoria('allee', [10], 50, {'r': 0.5, 'K': 300, 'A': 20}, usar_cache=False)
+    assert P[-1, 0] < 1
+
+
+def test_pagina_allee_con_umbral_cero():
+    os.environ.setdefault('CLIMA_PRECARGA', '0')
+    import app  # noqa: F401  (registra las páginas)
+    from pages.pagina2 import actualizar_allee
+
+    _, mensaje, _ = actualizar_allee(30, 0, 300, 0.5)
+    assert 'prosperó' not in mensaje and 'extinguió' not in mensaje
+
+
+def test_simular_en_malla_marca_lo_no_alcanzado():
+    # Cosecha excesiva: P -> -inf en tiempo finito, el resto queda como NaN
+    t = np.linspace(0, 200, 201)
+    Y = simular('cosecha', [100], t, {'r': 0.5, 'K': 1000, 'h': 200}, usar_cache=False)
+    assert Y.shape == (201, 1) and Y[0, 0] == 100
+    assert np.isnan(Y[-1, 0]) and np.isfinite(Y[1, 0])
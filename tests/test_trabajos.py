@@ -0,0 +1,18 @@
+from dash import no_update
+
+from utils import trabajos
+from utils.config import COSTO_EN_LINEA, COSTO_MAXIMO
+
+
+def test_despachar_en_linea_y_demasiado_grande():
+    datos = {'t_max': 100}
+    assert trabajos.despachar(COSTO_EN_LINEA / 2, datos) == (datos, no_update, "")
+    en_linea, en_fondo, aviso = trabajos.despachar(COSTO_MAXIMO * 2, datos)
+    assert en_linea is no_update and en_fondo is no_update and 'demasiado grande' in aviso
+
+
+def test_sin_cola_lo_largo_se_rechaza(monkeypatch):
+    # Sin diskcache no hay segundo plano: no se bloquea al worker en línea
+    monkeypatch.setattr(trabajos, 'GESTOR', None)
+    en_linea, en_fondo, aviso = trabajos.despachar((COSTO_EN_LINEA + COSTO_MAXIMO) / 2, {'t_max': 1e5})
+    assert en_linea is no_update and en_fondo is no_update and 'segundo plano' in aviso
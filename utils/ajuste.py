@@ -0,0 +1,242 @@
+import csv
+import io
+
+import numpy as np
+
+from utils.ejecucion import EJECUTOR
+from utils.instrumentacion import contar_evaluaciones, medir
+from utils.modelos import obtener_modelo
+
+# --- AJUSTE DE PARÁMETROS A DATOS OBSERVADOS ---
+# Las páginas usan los parámetros del PDF (beta = 1/7138, k = 0.40). Aquí se
+# estiman a partir de conteos observados (un CSV con una columna de tiempo y
+# una o más de los estados del modelo, p. ej. "dia,I" o "t,I,R"): los
+# parámetros del registro (utils/modelos.py) y los infectados iniciales I0.
+#
+# Mínimos cuadrados (el estimador de máxima verosimilitud con ruido normal)
+# con scipy.optimize.least_squares:
+#   - los parámetros van en escala logarítmica: son positivos y sus órdenes de
+#     magnitud son muy distintos (b ~ 1e-4, k ~ 0.4)
+#   - el jacobiano de los residuos sale de las sensibilidades hacia adelante:
+#     junto con el modelo se integra dY/dtheta' = J dY/dtheta + df/dtheta
+#     (modelo.jac y modelo.dpar). Una sola integración por paso del
+#     optimizador da residuos y jacobiano, en todos los puntos de los datos a
+#     la vez (t_eval): miles de puntos cuestan lo mismo que unos pocos
+#   - varios arranques al azar (multistart) repartidos entre los workers de
+#     EJECUTOR; al re-ajustar con más datos se arranca desde el ajuste
+#     anterior (un solo arranque)
+# Los intervalos de confianza salen de la aproximación lineal en el óptimo:
+# cov = s^2 (J^T J)^-1 en escala logarítmica, con el cuantil t de Student.
+# SciPy se importa dentro de las funciones (ver utils/perfil_arranque.py).
+
+# Nombres aceptados para la columna de tiempo
+COLUMNAS_TIEMPO = ('t', 'dia', 'día', 'dias', 'días', 'tiempo', 'fecha')
+MODELOS_AJUSTABLES = ('sir', 'seir')
+# Rangos de los arranques al azar (log-uniforme). b se sortea como beta = b N
+RANGOS = {'b': (0.05, 5.0), 'k': (0.01, 2.0), 'sigma': (0.05, 2.0), 'gamma': (0.01, 2.0)}
+INICIOS = 8
+NIVEL = 0.95
+RTOL = 1e-6
+ATOL = 1e-6
+MAX_NFEV = 200
+MAX_PUNTOS = 100000
+
+
+def leer_csv(texto):
+    # (t, {estado: conteos}) de un CSV con encabezado. Columnas de estados
+    # por nombre (S, E, I, R, sin importar mayúsculas); las demás se ignoran
+    filas = [f for f in csv.reader(io.StringIO(texto)) if any(c.strip() for c in f)]
+    if len(filas) < 2:
+        raise ValueError("El CSV necesita un encabezado y al menos una fila de datos")
+    encabezado = [c.strip().lower() for c in filas[0]]
+    tiempo = next((j for j, c in enumerate(encabezado) if c in COLUMNAS_TIEMPO), None)
+    if tiempo is None:
+        raise ValueError(f"Falta la columna de tiempo ({', '.join(COLUMNAS_TIEMPO[:3])}, ...)")
+    estados = {c.upper(): j for j, c in enumerate(encabezado) if c.upper() in ('S', 'E', 'I', 'R')}
+    if not estados:
+        raise ValueError("Falta al menos una columna con conteos: S, E, I o R")
+    if len(filas) - 1 > MAX_PUNTOS:
+        raise ValueError(f"Demasiados puntos (máximo {MAX_PUNTOS})")
+    try:
+        datos = np.array([[float(f[j]) if f[j].strip() else np.nan for j in [tiempo, *estados.values()]]
+                          for f in filas[1:]])
+    except (ValueError, IndexError):
+        raise ValueError("Hay valores que no son números o filas incompletas") from None
+    datos = datos[np.argsort(datos[:, 0], kind='stable')]
+    if np.isnan(datos[:, 0]).any() or np.any(np.diff(datos[:, 0]) <= 0):
+        raise ValueError("Los tiempos deben ser números distintos")
+    return datos[:, 0], {e: datos[:, 1 + i] for i, e in enumerate(estados)}
+
+
+def estado_inicial(modelo, N, I0):
+    # y0 con I0 infectados y el resto susceptibles, y dy0/dI0
+    modelo = obtener_modelo(modelo)
+    i = modelo.estados.index('I')
+    y0, dy0 = np.zeros(len(modelo.estados)), np.zeros(len(modelo.estados))
+    y0[0], y0[i] = N - I0, I0
+    dy0[0], dy0[i] = -1.0, 1.0
+    return y0, dy0
+
+
+def _aumentado(t, z, modelo, args, n, q):
+    # [y, dy/dtheta] con theta = (parámetros..., I0): I0 solo entra por y0
+    y = z[:n]
+    sens = z[n:].reshape(n, q)
+    dsens = modelo.jac(t, y, *args) @ sens
+    dsens[:, :q - 1] += modelo.dpar(t, y, *args)
+    return np.concatenate([modelo.rhs(t, y, *args), dsens.ravel()])
+
+
+def sensibilidades(modelo, t, args, N, I0):
+    # (Y, dY): solución (len(t), n) y sus derivadas (len(t), n, q) respecto de
+    # los parámetros y de I0, con una sola integración del sistema aumentado.
+    # odeint y no solve_ivp: el optimizador integra cientos de veces y el
+    # bucle de pasos de odeint corre en Fortran (~2x más rápido aquí)
+    from scipy.integrate import odeint
+
+    modelo = obtener_modelo(modelo)
+    n, q = len(modelo.estados), len(modelo.parametros) + 1
+    y0, dy0 = estado_inicial(modelo, N, I0)
+    sens0 = np.zeros((n, q))
+    sens0[:, -1] = dy0
+    Z, info = odeint(_aumentado, np.concatenate([y0, sens0.ravel()]), t, args=(modelo, tuple(args), n, q),
+                     rtol=RTOL, atol=ATOL, tfirst=True, full_output=True)
+    contar_evaluaciones(int(info['nfe'][-1]) if len(info['nfe']) else 0)
+    if info['message'] != 'Integration successful.':
+        Z = np.full_like(Z, np.nan)
+    return Z[:, :n], Z[:, n:].reshape(t.size, n, q)
+
+
+class _Objetivo:
+    # Residuos y jacobiano en escala logarítmica. least_squares pide fun(x) y
+    # luego jac(x) en el mismo punto: se integra una vez para los dos
+    def __init__(self, modelo, t, observados, N):
+        self.modelo = obtener_modelo(modelo)
+        self.t, self.N = t, N
+        self.columnas = [self.modelo.estados.index(e) for e in observados]
+        Y = np.column_stack(list(observados.values()))
+        self.validos = ~np.isnan(Y)
+        # Cada columna pesa igual sin importar su escala (R crece hasta N, I no)
+        self.escala = np.maximum(np.nanmax(np.abs(Y), axis=0), 1.0)
+        self.Y = Y
+        self._x, self._r, self._J = None, None, None
+
+    def _calcular(self, x):
+        if self._x is not None and np.array_equal(x, self._x):
+            return
+        theta = np.exp(x)
+        with np.errstate(all='ignore'):
+            Y, dY = sensibilidades(self.modelo, self.t, theta[:-1], self.N, theta[-1])
+        modelo = Y[:, self.columnas]
+        r = ((modelo - self.Y) / self.escala)[self.validos]
+        J = (dY[:, self.columnas, :] * theta / self.escala[:, None])[self.validos]
+        # Integración fallida: residuo grande pero finito, el optimizador retrocede
+        if not np.all(np.isfinite(r)) or not np.all(np.isfinite(J)):
+            r, J = np.full_like(r, 1e3), np.zeros_like(J)
+        self._x, self._r, self._J = x.copy(), r, J
+
+    def residuos(self, x):
+        self._calcular(x)
+        return self._r
+
+    def jacobiano(self, x):
+        self._calcular(x)
+        return self._J
+
+
+def _ajustar_desde(modelo, t, observados, N, x0, cotas):
+    # Un arranque de least_squares; función de módulo para EJECUTOR.repartir
+    from scipy.optimize import least_squares
+
+    objetivo = _Objetivo(modelo, t, observados, N)
+    sol = least_squares(objetivo.residuos, x0, jac=objetivo.jacobiano, bounds=cotas,
+                        method='trf', x_scale='jac', max_nfev=MAX_NFEV)
+    return {'x': sol.x, 'costo': float(sol.cost), 'nfev': int(sol.nfev), 'exito': bool(sol.success)}
+
+
+def _arranques(modelo, N, I0_guia, cotas, n, rng):
+    # n puntos log-uniformes en RANGOS (b a través de beta = b N) e I0 alrededor de la guía
+    modelo = obtener_modelo(modelo)
+    bajo, alto = [], []
+    for p in modelo.parametros:
+        lo, hi = RANGOS[p]
+        escala = N if p == 'b' else 1.0
+        bajo.append(np.log(lo / escala))
+        alto.append(np.log(hi / escala))
+    bajo.append(np.log(I0_guia / 3))
+    alto.append(np.log(I0_guia * 3))
+    x = rng.uniform(bajo, alto, size=(n, len(bajo)))
+    return np.clip(x, cotas[0] + 1e-9, cotas[1] - 1e-9)
+
+
+def _intervalos(objetivo, x, nivel):
+    # Aproximación lineal en el óptimo, en escala log: exp(x -/+ t * se)
+    from scipy.stats import t as student
+
+    r, J = objetivo.residuos(x), objetivo.jacobiano(x)
+    libertad = max(r.size - x.size, 1)
+    s2 = float(r @ r) / libertad
+    cov = s2 * np.linalg.pinv(J.T @ J)
+    se = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    margen = student.ppf(0.5 + nivel / 2, libertad) * se
+    # Un valor que los datos no determinan da un intervalo (0, inf)
+    with np.errstate(over='ignore'):
+        return np.exp(x - margen), np.exp(x + margen), s2
+
+
+@medir('resolver')
+def ajustar(modelo, t, observados, N, inicial=None, inicios=INICIOS, semilla=0, nivel=NIVEL):
+    # observados: {estado: conteos} (NaN = sin dato) en los tiempos t.
+    # inicial: {parámetro: valor, 'I0': valor} de un ajuste anterior para
+    # arrancar desde ahí (un solo arranque) en vez del multistart.
+    modelo = obtener_modelo(modelo)
+    if modelo.nombre not in MODELOS_AJUSTABLES:
+        raise ValueError(f"El modelo '{modelo.nombre}' no se puede ajustar (opciones: {', '.join(MODELOS_AJUSTABLES)})")
+    t = np.asarray(t, dtype=float)
+    observados = {e: np.asarray(v, dtype=float) for e, v in observados.items()}
+    desconocidos = [e for e in observados if e not in modelo.estados]
+    if desconocidos:
+        raise ValueError(f"El modelo '{modelo.nombre}' no tiene los estados {', '.join(desconocidos)}")
+    q = len(modelo.parametros) + 1
+    if sum(int(np.sum(~np.isnan(v))) for v in observados.values()) <= q:
+        raise ValueError(f"Se necesitan más de {q} datos para estimar {q} valores")
+    N = float(N)
+    if not N > 0 or np.any(np.diff(t) <= 0):
+        raise ValueError("Se necesita N > 0 y tiempos crecientes")
+
+    # I0 entre 1e-6 y N (cotas del optimizador en escala log); la guía es el
+    # primer dato de I si existe
+    cotas = (np.r_[np.full(q - 1, -40.0), np.log(1e-6)], np.r_[np.full(q - 1, 10.0), np.log(N)])
+    primero = observados.get('I', [np.nan])[0]
+    I0_guia = float(np.clip(primero if primero > 0 else 1.0, 1e-3, N / 10))
+    if inicial is not None:
+        x0 = np.log([[*modelo.argumentos(inicial), inicial['I0']]])
+        x0 = np.clip(x0, cotas[0] + 1e-9, cotas[1] - 1e-9)
+    else:
+        x0 = _arranques(modelo, N, I0_guia, cotas, inicios, np.random.default_rng(semilla))
+
+    resultados = EJECUTOR.repartir(f'ajuste-{modelo.nombre}', _ajustar_desde,
+                                   [(modelo.nombre, t, observados, N, x, cotas) for x in x0])
+    mejor = min(resultados, key=lambda r: r['costo'])
+
+    objetivo = _Objetivo(modelo, t, observados, N)
+    bajo, alto, s2 = _intervalos(objetivo, mejor['x'], nivel)
+    theta = np.exp(mejor['x'])
+    nombres = [*modelo.parametros, 'I0']
+    Y, _ = sensibilidades(modelo, t, theta[:-1], N, theta[-1])
+    return {
+        'modelo': modelo.nombre,
+        'parametros': dict(zip(nombres, theta.tolist())),
+        'intervalos': {p: (lo, hi) for p, lo, hi in zip(nombres, bajo.tolist(), alto.tolist())},
+        'nivel': nivel,
+        't': t,
+        'ajuste': Y,
+        # Error típico en las unidades de los datos (los residuos van escalados)
+        'rmse': {e: float(np.sqrt(np.nanmean((Y[:, modelo.estados.index(e)] - v) ** 2)))
+                 for e, v in observados.items()},
+        'costo': mejor['costo'],
+        'inicios': len(resultados),
+        'exitosos': sum(r['exito'] for r in resultados),
+        'evaluaciones': sum(r['nfev'] for r in resultados),
+        'varianza': s2,
+    }
@@ -0,0 +1,241 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+# --- BANCO DE RENDIMIENTO DE LOS CALLBACKS ---
+#   python -m utils.banco                        (todos los casos)
+#   python -m utils.banco campo seir -r 10       (solo los que contienen esos nombres)
+#   python -m utils.banco --comparar banco-3dae97b.json
+#
+# Llama a cada callback directamente (sin navegador ni Flask) sobre una
+# matriz de parámetros y mide por caso:
+#   total_ms      tiempo del callback (mediana de -r repeticiones, cache vacío)
+#   resolver_ms   parte de ese tiempo dentro de los integradores / barridos /
+#                 evaluación del campo (ver RESOLVEDORES)
+#   figura_ms     el resto: armar la figura o el Patch
+#   serializar_ms pasar la respuesta a JSON como lo hace Dash
+#   bytes         tamaño de ese JSON (lo que viaja al navegador)
+#   memoria_kb    pico de memoria de Python (tracemalloc, en una corrida aparte)
+#
+# El resultado se guarda en JSON (por defecto banco-<commit>.json) para
+# comparar contra una corrida anterior con --comparar.
+#
+# Fuera del banco: el pronóstico del mapa climático (depende de la red) y los callbacks
+# de validación (no calculan nada).
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (módulo, función): el tiempo dentro de ellas cuenta como "resolver"
+RESOLVEDORES = [
+    ('utils.simulacion', '_resolver'),
+    ('utils.barrido', 'barrido_sir'),
+    ('utils.metricas', 'dia_pico'),
+    ('utils.expresiones', 'evaluar_campo'),
+    ('utils.estocastico', 'realizaciones'),
+    ('utils.metapoblacion', '_integrar'),
+    ('utils.redes', 'generar_red'),
+    ('utils.redes', 'contagio_en_red'),
+    ('utils.ajuste', '_ajustar_desde'),
+    ('utils.bifurcacion', 'diagrama'),
+]
+
+
+def _casos():
+    # (nombre, función, argumentos); la función ya es la de la página
+    from pages import (Campo_vectorial, clase1, pagina2, pagina3, pagina4, pagina6, pagina7,
+                       pagina_ajuste, pagina_api, pagina_Caso_epidemia, pagina_caso_politica, pagina_caso_rumor1)
+    return [
+        ('exponencial', clase1.actualizar_exponencial, (100, 0.03, 100)),
+        ('logistica', pagina3.actualizar_logistica, (50, 0.1, 800, 100)),
+        ('logistica_parche', pagina3.parche_logistica, (50, 0.1, 800, 100)),
+        ('allee', pagina2.actualizar_allee, (30, 20, 300, 0.5)),
+        ('allee_extincion', pagina2.actualizar_allee, (10, 20, 300, 0.5)),
+        ('cosecha', pagina4.actualizar_grafica_cosecha, (None, 0, 200, 0.1, 1000, 100)),
+        ('cosecha_colapso', pagina4.actualizar_grafica_cosecha, (None, 40, 200, 0.1, 1000, 100)),
+        # Diagrama y veredicto desde las tablas (se calculan una vez por proceso)
+        ('cosecha_bifurcacion', pagina4.actualizar_bifurcacion_cosecha, (None, 40, 200, 0.1, 1000, 100)),
+        ('allee_bifurcacion', pagina2.actualizar_bifurcacion_allee, (10, 20, 300)),
+        ('sir', pagina6.actualizar_grafica_SIR, (None, 1000, 0.4, 0.1, 2, 160)),
+        ('sir_largo', pagina6.actualizar_grafica_SIR, (None, 1000, 0.4, 0.1, 2, 20000)),
+        ('sir_estocastico', pagina6.actualizar_grafica_SIR, (None, 1000, 0.4, 0.1, 2, 160, ['si'])),
+        ('seir', pagina7.actualizar_graficas_SEIR, (None, 1000, 0.5, 0.2, 0.1, 5, 2, 160)),
+        ('seir_largo', pagina7.actualizar_graficas_SEIR, (None, 1000, 0.5, 0.2, 0.1, 5, 2, 20000)),
+        ('seir_estocastico', pagina7.actualizar_graficas_SEIR, (None, 1000, 0.5, 0.2, 0.1, 5, 2, 160, ['si'])),
+        ('epidemia', pagina_Caso_epidemia.simular_epidemia, (None, 7138, 0.0001401, 0.4, 1, 40)),
+        ('epidemia_grande', pagina_Caso_epidemia.simular_epidemia, (None, 1e6, 1e-6, 0.4, 1, 400)),
+        ('epidemia_estocastica', pagina_Caso_epidemia.simular_epidemia, (None, 7138, 0.0001401, 0.4, 1, 40, ['si'])),
+        ('politica', pagina_caso_politica.simular_politica, (None, 10050, 0.00005, 0.00002, 50, 100)),
+        ('politica_larga', pagina_caso_politica.simular_politica, (None, 10050, 0.00005, 0.00002, 50, 5000)),
+        ('rumor', pagina_caso_rumor1.simular_rumor, (None, 0.01, 275, 0.004, 1, 8, 15)),
+        ('rumor_largo', pagina_caso_rumor1.simular_rumor, (None, 0.01, 275, 0.004, 1, 8, 500)),
+        ('rumor_red', pagina_caso_rumor1.simular_red_rumor, (1, 'ba', 100000, 10, 275, 0.004, 0.01, 1, 8, 15)),
+        ('politica_red', pagina_caso_politica.simular_red_politica, (1, 'ws', 100000, 10, 10050, 0.00005, 0.00002, 50, 100)),
+        # Sin archivo: los datos de ejemplo (81 puntos), multistart de 8 arranques
+        ('ajuste', pagina_ajuste.ajustar_datos, (1, None, 'sir', 7138, [], None)),
+        ('metapoblacion', pagina_api.propagar_epidemia, (1, 'Lima', 0.3, 0.1, 0.001, 365)),
+        ('campo', Campo_vectorial.graficar_campo, (None, 'np.sin(X)', 'np.cos(Y)', 5, 5, 15)),
+        ('campo_50', Campo_vectorial.graficar_campo, (None, 'np.sin(X)*Y', 'np.cos(Y)-X', 5, 5, 50)),
+        # Peor caso: la malla más grande que se acepta (más allá se recorta)
+        ('campo_maximo', Campo_vectorial.graficar_campo, (None, 'np.sin(X)*Y', 'np.cos(Y)-X', 5, 5, 10**6)),
+    ]
+
+
+class _Cronometro:
+    # Suma el tiempo pasado dentro de los RESOLVEDORES (solo la llamada más
+    # externa: barrido_sir puede llamarse a sí mismo al repartir)
+    def __init__(self):
+        self.segundos = 0.0
+        self._local = threading.local()
+
+    def envolver(self, func):
+        def envuelta(*args, **kwargs):
+            profundidad = getattr(self._local, 'profundidad', 0)
+            self._local.profundidad = profundidad + 1
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.profundidad = profundidad
+                if profundidad == 0:
+                    self.segundos += time.perf_counter() - inicio
+        return envuelta
+
+
+def _instalar(cronometro):
+    # Reemplaza cada resolvedor en TODOS los módulos que lo importaron por
+    # nombre (p.ej. `from utils.barrido import barrido_sir` en una página)
+    for modulo, nombre in RESOLVEDORES:
+        original = getattr(sys.modules[modulo], nombre)
+        envuelta = cronometro.envolver(original)
+        for m in list(sys.modules.values()):
+            nombre_m = getattr(m, '__name__', '')
+            if not nombre_m.startswith(('utils.', 'pages.')):
+                continue
+            for atributo, valor in list(vars(m).items()):
+                if valor is original:
+                    setattr(m, atributo, envuelta)
+
+
+def _cargar_app():
+    os.environ.setdefault('CLIMA_PRECARGA', '0')
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    import app  # noqa: F401  (registra las páginas)
+
+
+def medir(func, args, repeticiones, cronometro):
+    from plotly.io.json import to_json_plotly
+    from utils.cache import CACHE
+    from utils.redes import _red_guardada
+
+    totales, resolver, serializar = [], [], []
+    for _ in range(repeticiones):
+        CACHE.limpiar()
+        _red_guardada.cache_clear()   # las redes también se guardan (lru_cache)
+        cronometro.segundos = 0.0
+        inicio = time.perf_counter()
+        salida = func(*args)
+        totales.append(time.perf_counter() - inicio)
+        resolver.append(cronometro.segundos)
+
+        inicio = time.perf_counter()
+        carga = to_json_plotly({'response': salida})
+        serializar.append(time.perf_counter() - inicio)
+
+    CACHE.limpiar()
+    _red_guardada.cache_clear()
+    tracemalloc.start()
+    func(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = statistics.median(totales)
+    resolver_s = statistics.median(resolver)
+    return {
+        'total_ms': round(total * 1000, 3),
+        'total_min_ms': round(min(totales) * 1000, 3),
+        'resolver_ms': round(resolver_s * 1000, 3),
+        'figura_ms': round(max(total - resolver_s, 0.0) * 1000, 3),
+        'serializar_ms': round(statistics.median(serializar) * 1000, 3),
+        'bytes': len(carga.encode()),
+        'memoria_kb': round(pico / 1024, 1),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'sin-git'
+
+
+def correr(filtros=(), repeticiones=5):
+    _cargar_app()
+    cronometro = _Cronometro()
+    _instalar(cronometro)
+
+    resultados = {}
+    for nombre, func, args in _casos():
+        if filtros and not any(f in nombre for f in filtros):
+            continue
+        func(*args)  # calentamiento (imports diferidos, cachés de expresiones...)
+        resultados[nombre] = dict(callback=func.__name__, argumentos=repr(args),
+                                  **medir(func, args, repeticiones, cronometro))
+        r = resultados[nombre]
+        print(f"{nombre:18s} {r['total_ms']:9.1f} ms  (resolver {r['resolver_ms']:8.1f}, "
+              f"figura {r['figura_ms']:7.1f}, json {r['serializar_ms']:6.1f})  "
+              f"{r['bytes'] / 1024:8.1f} KB  {r['memoria_kb']:8.0f} KB mem")
+
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'maquina': platform.platform(),
+        'repeticiones': repeticiones,
+        'casos': resultados,
+    }
+
+
+def comparar(actual, previo):
+    # Razón actual / previo de total_ms y bytes por caso común
+    print(f"\ncontra {previo['commit']} ({previo['fecha']}):")
+    for nombre, r in actual['casos'].items():
+        p = previo['casos'].get(nombre)
+        if p is None:
+            continue
+        tiempo = r['total_ms'] / p['total_ms'] if p['total_ms'] else float('inf')
+        peso = r['bytes'] / p['bytes'] if p['bytes'] else float('inf')
+        marca = '  <-- más lento' if tiempo > 1.2 else ''
+        print(f"{nombre:18s} tiempo x{tiempo:5.2f}   bytes x{peso:5.2f}{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de rendimiento de los callbacks")
+    parser.add_argument('filtros', nargs='*', help="solo los casos que contienen alguno de estos textos")
+    parser.add_argument('-r', '--repeticiones', type=int, default=5)
+    parser.add_argument('-o', '--salida', help="archivo JSON (por defecto banco-<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior")
+    opciones = parser.parse_args()
+
+    resultado = correr(opciones.filtros, opciones.repeticiones)
+    salida = opciones.salida or f"banco-{resultado['commit']}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nGuardado en {salida}")
+
+    if opciones.comparar:
+        with open(opciones.comparar, encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
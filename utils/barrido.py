@@ -0,0 +1,241 @@
+import numpy as np
+
+from utils.ejecucion import EJECUTOR
+from utils.instrumentacion import contar_evaluaciones, medir
+from utils.modelos import obtener_modelo
+
+# --- BARRIDO DE PARÁMETROS ---
+# Integra miles de escenarios a la vez: el estado se apila como (n_estados, m)
+# y el lado derecho del registro (que solo usa y[0], y[1], ...) trabaja sobre
+# las m columnas en una sola llamada de NumPy. Se usa RK4 con un paso común a
+# todos los escenarios, fijado por la tasa local del más rápido (ver FRACCION);
+# los escenarios que ya se asentaron salen del arreglo.
+
+
+def _paso_rk4(rhs, t, y, dt, args):
+    k1 = rhs(t, y, *args)
+    k2 = rhs(t + dt / 2, y + dt / 2 * k1, *args)
+    k3 = rhs(t + dt / 2, y + dt / 2 * k2, *args)
+    k4 = rhs(t + dt, y + dt * k3, *args)
+    return y + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+# Paso común a todos los escenarios: dt * (tasa local más rápida) = FRACCION.
+# La tasa local de cada escenario es b (S + I) + k (cota del jacobiano), así
+# que el paso es chico durante el brote y crece cuando la epidemia se apaga;
+# dt * tasa ~ 0.2 es estable y preciso para RK4 en todo el horizonte.
+FRACCION = 0.2
+# Al menos tantos pasos por horizonte: el pico no se detecta con menos
+PASOS_MINIMOS = 400
+# Un escenario se "asienta" cuando lo que le queda por contagiar es menor que
+# TOLERANCIA * N: como mucho S (no hay más susceptibles) y, pasado el pico
+# (b S < k), como mucho b S I / (k - b S). Desde ahí el estado en t_max se
+# escribe de forma cerrada (ver asentar) y se deja de integrar.
+TOLERANCIA = 1e-9
+# Cada cuántos pasos se revisa qué escenarios se asentaron
+REVISION = 16
+
+# Costo medido de un paso (RK4, pico y revisión): fijo (NumPy por llamada)
+# + por escenario activo
+SEGUNDOS_POR_PASO = 6e-5
+SEGUNDOS_POR_ESCENARIO = 1e-7
+
+# Repartir un barrido entre procesos solo conviene si cada parte tiene al
+# menos tantos escenarios como para que su costo supere al costo fijo del paso
+ESCENARIOS_POR_PARTE = int(SEGUNDOS_POR_PASO / SEGUNDOS_POR_ESCENARIO)
+
+
+def _tasa(b, k, S, I):
+    return np.abs(b) * (np.abs(S) + np.abs(I)) + np.abs(k)
+
+
+def _estimacion(beta, k, I0, N, t_max, R0=0.0):
+    # (pasos, pasos * escenarios activos) de barrido_sir, sin integrar: el
+    # brote (con la tasa inicial) más la cola hasta que el escenario se
+    # asienta (con la tasa final), cada fase limitada por el horizonte.
+    from utils.metricas import pico_infectados, susceptibles_finales
+
+    b, k, I0, N, R0 = (np.ravel(v) for v in np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (beta, k, I0, N, R0))))
+    S0 = N - I0 - R0
+    s_inf = susceptibles_finales(b, k, S0, I0)
+    pico = pico_infectados(b, k, S0, I0)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        crecimiento = b * S0 - k
+        brote = np.where(crecimiento > 0, 2 * np.log(np.maximum(N / np.maximum(I0, 1e-12), 1.0)) / crecimiento, 0.0)
+        # Cola: I decae a ritmo k - b S_inf o, si no decae (k = 0), se
+        # acaban los susceptibles a ritmo b N
+        decaimiento = k - b * s_inf
+        decae = decaimiento > 0
+        cola = np.where(decae, np.log(np.maximum(pico / (TOLERANCIA * N), 1.0)) / decaimiento,
+                        np.log(1 / TOLERANCIA) / (b * N))
+    brote = np.nan_to_num(np.minimum(brote, t_max), nan=t_max)
+    cola = np.nan_to_num(np.minimum(cola, t_max - brote), nan=t_max, posinf=t_max)
+    tasa_cola = np.where(decae, _tasa(b, k, s_inf, 0.0), _tasa(b, k, 0.0, N))
+
+    pasos = max((np.max(brote * _tasa(b, k, N, 0.0), initial=0.0)
+                 + np.max(cola * tasa_cola, initial=0.0)) / FRACCION, PASOS_MINIMOS)
+    # Cada escenario ocupa el arreglo solo hasta asentarse
+    vida = np.minimum(brote + cola, t_max)
+    activos = b.size if not np.max(vida, initial=0.0) else np.sum(vida) / np.max(vida)
+    return int(pasos), pasos * activos
+
+
+def pasos_estimados(beta, k, I0, N, t_max, R0=0.0):
+    # Orden de magnitud de los pasos de barrido_sir, sin integrar
+    return _estimacion(beta, k, I0, N, t_max, R0)[0]
+
+
+def costo_barrido(beta, k, N, t_max, I0=1.0, R0=0.0):
+    # Segundos estimados (orden de magnitud) de barrido_sir con esos argumentos,
+    # sin integrar nada: sirve para decidir antes de lanzar el cálculo
+    pasos, escenario_pasos = _estimacion(beta, k, I0, N, t_max, R0)
+    return pasos * SEGUNDOS_POR_PASO + escenario_pasos * SEGUNDOS_POR_ESCENARIO
+
+
+def _vertice(t, v):
+    # Máximo de la parábola por tres puntos (t[j], v[j]) no equiespaciados,
+    # en coordenadas relativas al punto del medio. Si no es cóncava, el del medio.
+    h0, h2 = t[0] - t[1], t[2] - t[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p0, p2 = (v[0] - v[1]) / h0, (v[2] - v[1]) / h2
+        alfa = (p2 - p0) / (h2 - h0)
+        beta = p0 - alfa * h0
+        h = np.clip(-beta / (2 * alfa), h0, h2)
+        valor = v[1] + beta * h + alfa * h ** 2
+    ok = (alfa < 0) & np.isfinite(h) & np.isfinite(valor)
+    return np.where(ok, t[1] + h, t[1]), np.where(ok, np.maximum(valor, v[1]), v[1])
+
+
+@medir('resolver')
+def barrido_sir(beta, k, I0, N, t_max, R0=0.0, progreso=None):
+    # beta, k, I0, N y R0 pueden ser escalares o arreglos (se hace broadcast).
+    # Para una malla: barrido_sir(betas[:, None], ks[None, :], I0, N, t_max)
+    # Devuelve un dict de arreglos con la forma del broadcast:
+    #   dia_pico, pico, tamano_final (S0 - S(t_max)), fraccion_final y el
+    #   estado al final del horizonte (S_final, I_final, R_final).
+    # progreso(hecho, total), si se pasa, se llama ~50 veces (en milésimas del horizonte).
+    beta, k, I0, N, R0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (beta, k, I0, N, R0)))
+    forma = beta.shape
+    b, kk = beta.ravel(), k.ravel()
+    S0 = (N - I0 - R0).ravel()
+    m = b.size
+
+    # Barrido grande y sin barra de progreso: se reparte por columnas entre los
+    # workers de EJECUTOR (cada parte elige su propio paso)
+    partes = min(EJECUTOR.procesos, m // ESCENARIOS_POR_PARTE)
+    if (progreso is None and EJECUTOR.paralelo and partes > 1
+            and costo_barrido(b, kk, N.ravel(), t_max, I0.ravel(), R0.ravel()) >= EJECUTOR.umbral):
+        trozos = [np.array_split(v, partes) for v in (b, kk, I0.ravel(), N.ravel(), R0.ravel())]
+        resultados = EJECUTOR.repartir('barrido', barrido_sir,
+                                       [(bi, ki, I0i, Ni, t_max, R0i)
+                                        for bi, ki, I0i, Ni, R0i in zip(*trozos)])
+        return {nombre: np.concatenate([r[nombre] for r in resultados]).reshape(forma)
+                for nombre in resultados[0]}
+
+    rhs = obtener_modelo('sir').rhs
+    final = np.stack([S0, I0.ravel(), R0.ravel()])   # se llena al asentarse
+    pico = I0.ravel().copy()
+    dia_pico = np.zeros(m)
+
+    # Escenarios aún activos (los asentados salen del arreglo)
+    activos = np.arange(m)
+    y = final.copy()
+    ba, ka = b.copy(), kk.copy()
+    # Pico por escenario: el mejor I visto y sus dos vecinos (valores y
+    # tiempos) para refinar con una parábola entre pasos
+    v_ant, v_act = np.full(m, -np.inf), y[1].copy()
+    t_ant, t_act = np.zeros(m), np.zeros(m)
+    mejor = np.stack([v_act, v_act, v_act])
+    t_mejor = np.zeros((3, m))
+    visto = v_act.copy()
+
+    def asentar(cuales, t):
+        # Guarda el resultado de los escenarios `cuales` (máscara sobre
+        # activos) extrapolando de t a t_max: si I ya decae, S queda fija y I
+        # decae a ritmo k - b S; si no (sin susceptibles), S se agota a
+        # ritmo b I y lo que quede de I decae a ritmo k.
+        idx = activos[cuales]
+        S, I, R = y[:, cuales]
+        bc, kc = ba[cuales], ka[cuales]
+        resta = t_max - t
+        with np.errstate(over='ignore', under='ignore'):
+            S_fin = np.where(bc * S < kc, S, S * np.exp(-bc * I * resta))
+            I_fin = (I + S - S_fin) * np.exp(np.minimum((bc * S_fin - kc) * resta, 0.0))
+        final[:, idx] = np.stack([S_fin, I_fin, R + I + S - S_fin - I_fin])
+
+        # Pico: vértice de la parábola por el mejor máximo local. Si I nunca
+        # tuvo un máximo local, aún crecía: sin recuperación (k = 0) sigue
+        # creciendo hasta t_max; si no, el pico es prácticamente el actual.
+        t_pico, v_pico = _vertice(t_mejor[:, cuales], mejor[:, cuales])
+        sin_max = visto[cuales] > mejor[1, cuales]
+        pico[idx] = np.where(sin_max, np.where(kc > 0, visto[cuales], I_fin), v_pico)
+        dia_pico[idx] = np.where(sin_max, np.where(kc > 0, t, t_max), t_pico)
+
+    t, n = 0.0, 0
+    aviso = 0
+    evaluaciones = 0   # por escenario: 4 por paso RK4
+    dt_max = t_max / PASOS_MINIMOS
+    while activos.size and t < t_max:
+        tasa = float(np.max(_tasa(ba, ka, y[0], y[1]), initial=0.0))
+        dt = min(FRACCION / tasa if tasa > 0 else dt_max, dt_max, t_max - t)
+        y = _paso_rk4(rhs, t, y, dt, (ba, ka))
+        t += dt
+        n += 1
+        evaluaciones += 4 * activos.size
+
+        v_sig = y[1]
+        es_max = (v_act >= v_ant) & (v_act > v_sig) & (v_act > mejor[1])
+        if es_max.any():
+            mejor[:, es_max] = np.stack([v_ant, v_act, v_sig])[:, es_max]
+            t_mejor[:, es_max] = np.stack([t_ant, t_act, np.full(activos.size, t)])[:, es_max]
+        v_ant, v_act = v_act, v_sig
+        t_ant, t_act = t_act, np.full(activos.size, t)
+        visto = np.maximum(visto, v_sig)
+
+        if n % REVISION == 0:
+            S, I = y[0], y[1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                resto = np.minimum(S, np.where(ba * S < ka, ba * S * I / (ka - ba * S), np.inf))
+            listos = resto <= TOLERANCIA * N.ravel()[activos]
+            if listos.any():
+                asentar(listos, t)
+                sigue = ~listos
+                activos = activos[sigue]
+                y, ba, ka = y[:, sigue], ba[sigue], ka[sigue]
+                v_ant, v_act, t_ant, t_act = v_ant[sigue], v_act[sigue], t_ant[sigue], t_act[sigue]
+                mejor, t_mejor, visto = mejor[:, sigue], t_mejor[:, sigue], visto[sigue]
+
+        if progreso is not None and int(50 * t / t_max) > aviso:
+            aviso = int(50 * t / t_max)
+            progreso(int(1000 * t / t_max), 1000)
+
+    if activos.size:
+        # Los que llegaron a t_max sin asentarse
+        asentar(np.ones(activos.size, dtype=bool), t_max)
+    contar_evaluaciones(evaluaciones)
+
+    # Escenarios que nunca crecieron: el pico es el valor inicial, en el día 0
+    sin_brote = ~(pico > I0.ravel())
+    pico = np.where(sin_brote, I0.ravel(), pico)
+    dia_pico = np.where(sin_brote, 0.0, dia_pico)
+
+    tamano_final = S0 - final[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraccion = np.where(S0 > 0, tamano_final / S0, 0.0)
+
+    return {
+        'dia_pico': dia_pico.reshape(forma),
+        'pico': pico.reshape(forma),
+        'tamano_final': tamano_final.reshape(forma),
+        'fraccion_final': fraccion.reshape(forma),
+        'S_final': final[0].reshape(forma),
+        'I_final': final[1].reshape(forma),
+        'R_final': final[2].reshape(forma),
+    }
+
+
+def barrido_escenarios(escenarios, t_max, R0=0.0):
+    # Lista de tuplas (beta, k, I0, N) -> mismos resultados, uno por escenario
+    beta, k, I0, N = np.asarray(escenarios, dtype=float).reshape(-1, 4).T
+    return barrido_sir(beta, k, I0, N, t_max, R0=R0)
@@ -0,0 +1,345 @@
+import functools
+
+import numpy as np
+
+from utils.instrumentacion import contar_evaluaciones, medir
+from utils.modelos import obtener_modelo
+
+# --- EQUILIBRIOS Y BIFURCACIONES (COSECHA Y ALLEE) ---
+# Una trayectoria responde "¿qué pasa con ESTE P0?"; la pregunta de fondo es
+# dónde están los equilibrios y cuándo cambian: la cosecha crítica h* = rK/4
+# (pliegue: el equilibrio estable y el umbral chocan y desaparecen) o el
+# umbral de Allee A.
+#
+# continuar() sigue una rama de equilibrios f(x, lam) = 0 al variar el
+# parámetro lam con continuación por pseudo-longitud de arco: predictor por
+# la tangente, corrector de Newton con modelo.jac y modelo.dpar (utils/
+# modelos.py). Pasa por los pliegues (la rama da la vuelta) y marca la
+# estabilidad de cada punto por los autovalores del jacobiano.
+#
+# Ambos modelos se simplifican con p = P/K y tau = r t:
+#   cosecha  dp/dtau = p (1 - p) - eta       eta = h / (r K)
+#   allee    dp/dtau = p (1 - p) (p/a - 1)    a = A / K
+# así que un solo diagrama adimensional (r = K = 1) sirve para cualquier r,
+# K, h o A: se calcula una vez y se reescala. Lo mismo las tablas densas
+# parámetro -> desenlace, que responden "¿se extingue?" (y cuándo, con
+# cosecha) en O(1) sin integrar hasta t_max.
+
+# Continuación
+PASO = 0.01
+PASO_MIN = 1e-6
+PASO_MAX = 0.05
+MAX_PUNTOS = 5000
+TOLERANCIA = 1e-10
+MAX_NEWTON = 8
+
+# Tablas: eta en [0, ETA_MAX] y p en [0, P_MAX] (cosecha); a en [A_MIN, A_MAX] (allee)
+ETA_MAX = 0.5
+A_MIN = 0.01   # a -> 0 es singular (p/a); en la página A/K >= 5/500
+A_MAX = 1.5
+P_MAX = 1.5
+N_PARAMETRO = 4001
+N_TIEMPO = (401, 601)   # (eta, p) de la tabla de tiempos de extinción
+NODOS_GAUSS, PESOS_GAUSS = np.polynomial.legendre.leggauss(64)
+
+
+def _f(modelo, x, args):
+    return np.asarray(modelo.rhs(0.0, x, *args), dtype=float)
+
+
+def _derivadas(modelo, x, args, libre):
+    # (J_x, J_lam): jacobiano en el estado y derivada respecto del parámetro libre
+    Jx = np.atleast_2d(modelo.jac(0.0, x, *args))
+    Jl = np.atleast_2d(modelo.dpar(0.0, x, *args))[:, libre]
+    return Jx, Jl
+
+
+def _tangente(Jx, Jl, previa):
+    # Vector unitario del núcleo de [J_x | J_lam], con el sentido de `previa`
+    n = Jx.shape[0]
+    A = np.vstack([np.column_stack([Jx, Jl]), previa])
+    b = np.zeros(n + 1)
+    b[-1] = 1.0
+    t = np.linalg.solve(A, b)
+    return t / np.linalg.norm(t)
+
+
+def _corregir(modelo, x, args, libre):
+    # Newton a parámetro fijo: lleva x al equilibrio más cercano
+    x = np.array(x, dtype=float)
+    for _ in range(MAX_NEWTON):
+        Jx, _ = _derivadas(modelo, x, args, libre)
+        x -= np.linalg.solve(Jx, _f(modelo, x, args))
+    return x
+
+
+def _con(args, libre, valor):
+    args = list(args)
+    args[libre] = valor
+    return tuple(args)
+
+
+def continuar(modelo, x0, parametros, libre, hasta, paso=PASO, limites=(-np.inf, np.inf)):
+    # Rama de equilibrios desde (x0, parametros[libre]) hacia `hasta`.
+    # Devuelve {'lam', 'x' (puntos, n), 'estable', 'pliegues' [(lam, x)],
+    # 'cambios' [(lam, x)] (cambios de estabilidad que no son pliegues)}.
+    # Se detiene al salir de [min(inicio, hasta), max(...)] en lam o de
+    # `limites` en x.
+    modelo = obtener_modelo(modelo)
+    args = modelo.argumentos(parametros)
+    libre = modelo.parametros.index(libre)
+    lam0 = args[libre]
+    lam_min, lam_max = min(lam0, hasta), max(lam0, hasta)
+    x0 = np.atleast_1d(np.asarray(x0, dtype=float))
+    n = x0.size
+    evaluaciones = 0
+
+    # La longitud de arco se mide en unidades escaladas (lam por el largo del
+    # recorrido, x por su tamaño): `paso` es la misma fracción del diagrama
+    # con K = 1 o con K = 1000
+    rango = abs(hasta - lam0) or 1.0
+    escala = np.append(np.full(n, max(np.abs(x0).max(), rango)), rango)
+
+    def sistema(z):
+        u = z * escala
+        a = _con(args, libre, u[-1])
+        Jx, Jl = _derivadas(modelo, u[:n], a, libre)
+        return u, a, Jx, np.column_stack([Jx, Jl]) * escala
+
+    # Corrección inicial a lam fijo y tangente hacia `hasta`
+    z = np.append(_corregir(modelo, x0, args, libre), lam0) / escala
+    evaluaciones += MAX_NEWTON
+    previa = np.zeros(n + 1)
+    previa[-1] = 1.0 if hasta >= lam0 else -1.0
+    _, _, Jx, M = sistema(z)
+    t = _tangente(M[:, :n], M[:, n], previa)
+
+    puntos, estables, pliegues, cambios = [z.copy()], [], [], []
+    estables.append(bool(np.all(np.linalg.eigvals(Jx).real < 0)))
+    ds = paso
+    while len(puntos) < MAX_PUNTOS:
+        prediccion = z + ds * t
+        w = prediccion.copy()
+        convergio = False
+        for _ in range(MAX_NEWTON):
+            u, a, _, M = sistema(w)
+            G = np.append(_f(modelo, u[:n], a), t @ (w - prediccion))
+            evaluaciones += 1
+            delta = np.linalg.solve(np.vstack([M, t]), -G)
+            w += delta
+            if np.linalg.norm(delta) < TOLERANCIA * (1 + np.linalg.norm(w)):
+                convergio = True
+                break
+        if not convergio:
+            ds /= 2
+            if ds < PASO_MIN:
+                break
+            continue
+
+        u, _, Jx, M = sistema(w)
+        nueva = _tangente(M[:, :n], M[:, n], t)
+        estable = bool(np.all(np.linalg.eigvals(Jx).real < 0))
+        # Pliegue: la componente en lam de la tangente cambia de signo. Se
+        # ubica con la parábola lam(s) por los tres últimos puntos
+        if nueva[-1] * t[-1] < 0 and len(puntos) > 1:
+            lam, x = _vertice(puntos[-2], puntos[-1], w)
+            pliegues.append((lam * escala[-1], x * escala[:n]))
+        elif estable != estables[-1]:
+            # Cambio de estabilidad sin pliegue: transcrítica, tridente o Hopf
+            medio = (z + w) / 2 * escala
+            cambios.append((float(medio[-1]), medio[:n]))
+        z, t = w, nueva
+        puntos.append(z.copy())
+        estables.append(estable)
+        ds = min(ds * 1.3, PASO_MAX)
+        if not lam_min <= u[-1] <= lam_max or np.any(u[:n] < limites[0]) or np.any(u[:n] > limites[1]):
+            break
+
+    contar_evaluaciones(evaluaciones)
+    puntos = np.array(puntos) * escala
+    return {'lam': puntos[:, -1], 'x': puntos[:, :n], 'estable': np.array(estables),
+            'pliegues': pliegues, 'cambios': cambios}
+
+
+def _vertice(u0, u1, u2):
+    # Extremo en lam de la parábola por tres puntos, parametrizada por la
+    # longitud de arco acumulada
+    s = np.array([0.0, np.linalg.norm(u1 - u0), np.linalg.norm(u1 - u0) + np.linalg.norm(u2 - u1)])
+    U = np.array([u0, u1, u2])
+    c = np.polyfit(s, U[:, -1], 2)
+    s_v = np.clip(-c[1] / (2 * c[0]), s[0], s[2]) if c[0] != 0 else s[1]
+    x = np.array([np.interp(s_v, s, U[:, j]) for j in range(U.shape[1] - 1)])
+    return float(np.polyval(c, s_v)), x
+
+
+def equilibrios(modelo, parametros, x_min, x_max, n=4001):
+    # Equilibrios de un modelo de un estado en [x_min, x_max]: cambios de
+    # signo de f en una malla (y ceros exactos), refinados con brentq
+    from scipy.optimize import brentq
+
+    modelo = obtener_modelo(modelo)
+    if len(modelo.estados) != 1:
+        raise ValueError("equilibrios() es para modelos de un solo estado")
+    args = modelo.argumentos(parametros)
+    x = np.linspace(x_min, x_max, n)
+    with np.errstate(all='ignore'):
+        f = modelo.rhs(0.0, x[None, :], *args)[0]
+    raices = list(x[f == 0])
+    for i in np.flatnonzero(f[:-1] * f[1:] < 0):
+        raices.append(brentq(lambda z: modelo.rhs(0.0, [z], *args)[0], x[i], x[i + 1], xtol=1e-14))
+    return np.unique(np.round(raices, 12))
+
+
+@medir('resolver')
+def diagrama(modelo, parametros, libre, desde, hasta, x_min, x_max, paso=PASO):
+    # Todas las ramas que cortan lam = desde en [x_min, x_max], seguidas hacia
+    # `hasta`. Una semilla que ya quedó sobre una rama calculada (p. ej. el
+    # otro extremo de un pliegue) no se repite.
+    modelo = obtener_modelo(modelo)
+    inicial = dict(zip(modelo.parametros, modelo.argumentos(parametros)))
+    inicial[libre] = desde
+    args, j = modelo.argumentos(inicial), modelo.parametros.index(libre)
+    ramas = []
+    for x0 in equilibrios(modelo, inicial, x_min, x_max):
+        if any(abs(_corregir(modelo, [x], args, j)[0] - x0) < 1e-6 * (1 + abs(x0))
+               for r in ramas for x in _cortes(r, desde)):
+            continue
+        ramas.append(continuar(modelo, [x0], inicial, libre, hasta, paso, limites=(x_min - 1, x_max + 1)))
+    return ramas
+
+
+def _cortes(rama, lam):
+    # x (primer estado) donde la rama pasa por el valor `lam` del parámetro,
+    # interpolado entre los puntos vecinos (diagrama() lo corrige con Newton)
+    l, x = rama['lam'] - lam, rama['x'][:, 0]
+    exactos = x[l == 0]
+    i = np.flatnonzero(l[:-1] * l[1:] < 0)
+    w = l[i] / (l[i] - l[i + 1])
+    return np.concatenate([exactos, x[i] + w * (x[i + 1] - x[i])])
+
+
+# --- DIAGRAMAS Y TABLAS ADIMENSIONALES (se calculan una vez) ---
+
+# r = K = 1; el parámetro libre (h o A) lo fija cada diagrama
+UNITARIOS = {'cosecha': {'r': 1.0, 'K': 1.0, 'h': 0.0}, 'allee': {'r': 1.0, 'K': 1.0, 'A': A_MIN}}
+
+
+@functools.lru_cache(maxsize=1)
+def diagrama_cosecha():
+    # p* contra eta = h / (r K): una sola rama que se pliega en eta* = 1/4
+    return diagrama('cosecha', UNITARIOS['cosecha'], 'h', 0.0, ETA_MAX, -0.5, P_MAX)
+
+
+@functools.lru_cache(maxsize=1)
+def diagrama_allee():
+    # p* contra a = A / K: p = 0 y p = 1 para todo a, p = a el umbral; p = a
+    # y p = 1 se cruzan en a = 1 e intercambian estabilidad (transcrítica)
+    return diagrama('allee', UNITARIOS['allee'], 'A', A_MIN, A_MAX, -0.5, P_MAX)
+
+
+def _umbral_en(modelo, parametros, libre, ramas, malla):
+    # El umbral de extinción para cada valor de la malla: el menor equilibrio
+    # inestable positivo (inf si no hay ninguno: se extingue desde cualquier
+    # p). Las ramas se interpolan en la malla y la estabilidad se evalúa ahí
+    # mismo (df/dp > 0), no en los puntos de la continuación: así no quedan
+    # huecos junto a los cambios de estabilidad
+    modelo = obtener_modelo(modelo)
+    args = list(modelo.argumentos(parametros))
+    j = modelo.parametros.index(libre)
+    umbral = np.full(malla.size, np.inf)
+    for r in ramas:
+        lam, x = r['lam'], r['x'][:, 0]
+        # Tramo por tramo: la rama puede ir y volver en lam
+        for i in range(lam.size - 1):
+            lo, hi = sorted((lam[i], lam[i + 1]))
+            dentro = np.flatnonzero((malla >= lo) & (malla <= hi))
+            if hi == lo or dentro.size == 0:
+                continue
+            p = np.interp(malla[dentro], [lam[i], lam[i + 1]] if lam[i] < lam[i + 1] else [lam[i + 1], lam[i]],
+                          x[[i, i + 1]] if lam[i] < lam[i + 1] else x[[i + 1, i]])
+            args[j] = malla[dentro]
+            d = 1e-7
+            pendiente = (modelo.rhs(0.0, (p + d)[None, :], *args)[0] - modelo.rhs(0.0, (p - d)[None, :], *args)[0]) / (2 * d)
+            candidato = (p > 0) & (pendiente > 0)
+            umbral[dentro[candidato]] = np.minimum(umbral[dentro[candidato]], p[candidato])
+    return umbral
+
+
+@functools.lru_cache(maxsize=1)
+def tabla_cosecha():
+    # Malla densa en eta: umbral p_c(eta) y eta* del pliegue. Más la tabla de
+    # tiempos adimensionales de extinción tau(eta, p0) = int_0^p0 dp / (eta - p(1 - p))
+    # (inf si p0 está sobre el umbral: no se extingue)
+    ramas = diagrama_cosecha()
+    eta = np.linspace(0.0, ETA_MAX, N_PARAMETRO)
+    umbral = _umbral_en('cosecha', UNITARIOS['cosecha'], 'h', ramas, eta)
+    critico = min(lam for r in ramas for lam, _ in r['pliegues'])
+    umbral[eta > critico] = np.inf
+    # En eta = 0 el umbral es p = 0 (solo se extingue si no hay nadie)
+    umbral[eta == 0] = 0.0
+
+    n_eta, n_p = N_TIEMPO
+    e = np.linspace(0.0, ETA_MAX, n_eta)[:, None]
+    # Malla fina en p para la integral acumulada; se guarda una de cada `cada`
+    cada = 8
+    p = np.linspace(0.0, P_MAX, (n_p - 1) * cada + 1)
+    f = obtener_modelo('cosecha').rhs(0.0, p[None, :], 1.0, 1.0, e)[0]
+    with np.errstate(divide='ignore'):
+        integrando = -1.0 / f
+    integrando[integrando <= 0] = np.inf   # f >= 0: no se llega a 0 pasando por ahí
+    tramos = 0.5 * (integrando[:, 1:] + integrando[:, :-1]) * (p[1] - p[0])
+    tau = np.concatenate([np.zeros((n_eta, 1)), np.cumsum(tramos, axis=1)], axis=1)[:, ::cada]
+    tau[0, 1:] = np.inf   # sin cosecha nunca se llega a 0
+    return {'eta': eta, 'umbral': umbral, 'critico': critico, 'tau': tau, 'p': p[::cada]}
+
+
+@functools.lru_cache(maxsize=1)
+def tabla_allee():
+    a = np.linspace(A_MIN, A_MAX, N_PARAMETRO)
+    umbral = _umbral_en('allee', UNITARIOS['allee'], 'A', diagrama_allee(), a)
+    return {'a': a, 'umbral': umbral}
+
+
+def _en_malla(valores, malla, x):
+    # Interpolación lineal en una malla uniforme: O(1), sin búsqueda. Junto a
+    # un inf (p. ej. pasado el pliegue) se toma el vecino más cercano
+    d = malla[1] - malla[0]
+    i = min(max(int((x - malla[0]) / d), 0), malla.size - 2)
+    w = min(max((x - malla[i]) / d, 0.0), 1.0)
+    a, b = valores[..., i], valores[..., i + 1]
+    with np.errstate(invalid='ignore'):
+        return np.where(np.isfinite(a) & np.isfinite(b), a + w * (b - a), a if w < 0.5 else b)
+
+
+def desenlace_cosecha(P0, r, K, h):
+    # {'se_extingue', 'dia' (inf si no), 'umbral' (P bajo el cual se extingue),
+    # 'h_critico'} sin integrar. None si los parámetros no tienen sentido.
+    if None in (P0, r, K, h) or not (r > 0 and K > 0 and h >= 0 and P0 >= 0):
+        return None
+    t = tabla_cosecha()
+    eta, p0 = h / (r * K), P0 / K
+    umbral = float(_en_malla(t['umbral'], t['eta'], eta)) if eta <= t['critico'] else np.inf
+    se_extingue = p0 == 0 or p0 < umbral
+    tau = np.inf
+    if se_extingue and eta <= ETA_MAX and p0 <= P_MAX:
+        # Bilineal: en p dentro de cada fila de eta y luego entre las dos filas
+        filas = _en_malla(t['tau'], t['p'], p0)
+        tau = float(_en_malla(filas, np.linspace(0.0, ETA_MAX, filas.size), eta))
+    elif se_extingue:
+        # Fuera de la tabla (muy pasado el pliegue) -1/f es suave y acotado:
+        # cuadratura de Gauss de orden fijo, también O(1)
+        p = 0.5 * p0 * (NODOS_GAUSS + 1)
+        tau = float(0.5 * p0 * np.sum(PESOS_GAUSS / (eta - p * (1 - p))))
+    return {'se_extingue': bool(se_extingue), 'dia': tau / r,
+            'umbral': umbral * K, 'h_critico': t['critico'] * r * K}
+
+
+def desenlace_allee(P0, r, K, A):
+    # {'se_extingue', 'umbral'} sin integrar. None si los parámetros no tienen
+    # sentido (A <= 0 hace P/A infinito)
+    if None in (P0, r, K, A) or not (r > 0 and K > 0 and A > 0 and P0 >= 0):
+        return None
+    t = tabla_allee()
+    a = min(max(A / K, A_MIN), A_MAX)
+    umbral = float(_en_malla(t['umbral'], t['a'], a)) * K
+    return {'se_extingue': bool(P0 < umbral), 'umbral': umbral}
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# --- CACHE DE RESULTADOS DE SIMULACIÓN ---
+# Dos niveles: memoria (LRU acotada por número de entradas y por bytes) y,
+# opcionalmente, disco (.npy en un directorio, acotado por bytes). La clave
+# es un hash canónico del modelo, parámetros, condición inicial, malla de
+# tiempo y tolerancias, así que mover un slider y volver a un valor ya visto
+# no vuelve a integrar nada.
+
+
+def clave_simulacion(modelo, y0, t, args, rtol, atol):
+    # Todo se pasa a float64 para que 30, 30.0 y np.float64(30) den la misma clave
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(modelo).encode())
+    for parte in (args, y0, t, (rtol, atol)):
+        arreglo = np.ascontiguousarray(parte, dtype=np.float64)
+        h.update(str(arreglo.shape).encode())
+        h.update(arreglo.tobytes())
+    return h.hexdigest()
+
+
+class CacheSimulaciones:
+    def __init__(self, max_entradas=256, max_bytes=64 * 2**20,
+                 directorio=None, max_bytes_disco=512 * 2**20):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.directorio = directorio
+        self.max_bytes_disco = max_bytes_disco
+
+        self._memoria = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._en_curso = {}   # clave -> Event de quien la está calculando
+
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    # --- memoria ---
+    def _guardar_memoria(self, clave, valor):
+        # Llamar con el lock tomado
+        if clave in self._memoria:
+            self._bytes -= self._memoria.pop(clave).nbytes
+        self._memoria[clave] = valor
+        self._bytes += valor.nbytes
+        while self._memoria and (len(self._memoria) > self.max_entradas or self._bytes > self.max_bytes):
+            _, viejo = self._memoria.popitem(last=False)
+            self._bytes -= viejo.nbytes
+            self.desalojos += 1
+
+    # --- disco ---
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.npy")
+
+    def _leer_disco(self, clave):
+        if not self.directorio:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            valor = np.load(ruta, allow_pickle=False)
+            os.utime(ruta)  # la fecha de modificación hace de "último uso"
+        except (OSError, ValueError):
+            return None
+        return valor
+
+    def _escribir_disco(self, clave, valor):
+        if not self.directorio:
+            return
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, 'wb') as f:
+                np.save(f, valor, allow_pickle=False)
+            os.replace(temporal, ruta)
+            self._recortar_disco()
+        except OSError:
+            pass  # el disco es solo un nivel extra, nunca debe romper la página
+
+    def _recortar_disco(self):
+        archivos = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.npy'):
+                try:
+                    st = os.stat(os.path.join(self.directorio, nombre))
+                except OSError:
+                    continue
+                archivos.append((st.st_mtime, st.st_size, nombre))
+        total = sum(a[1] for a in archivos)
+        for _, tamano, nombre in sorted(archivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(os.path.join(self.directorio, nombre))
+                total -= tamano
+            except OSError:
+                pass
+
+    # --- API ---
+    def obtener(self, clave):
+        with self._lock:
+            valor = self._memoria.get(clave)
+            if valor is not None:
+                self._memoria.move_to_end(clave)
+                self.aciertos += 1
+                return valor
+        valor = self._leer_disco(clave)
+        if valor is not None:
+            valor.setflags(write=False)
+            with self._lock:
+                self.aciertos_disco += 1
+                self._guardar_memoria(clave, valor)
+        return valor
+
+    def contiene(self, clave):
+        # Sin leer el valor ni contar un acierto: para estimar costos antes de calcular
+        with self._lock:
+            if clave in self._memoria:
+                return True
+        return bool(self.directorio) and os.path.exists(self._ruta(clave))
+
+    def guardar(self, clave, valor):
+        valor = np.asarray(valor)
+        valor.setflags(write=False)  # compartido entre peticiones: solo lectura
+        with self._lock:
+            self._guardar_memoria(clave, valor)
+        self._escribir_disco(clave, valor)
+        return valor
+
+    def obtener_o_calcular(self, clave, calcular):
+        # Si varios usuarios piden lo mismo a la vez (los valores por defecto
+        # de una página en plena clase) solo el primero integra; el resto espera.
+        while True:
+            valor = self.obtener(clave)
+            if valor is not None:
+                return valor
+            with self._lock:
+                evento = self._en_curso.get(clave)
+                if evento is None:
+                    evento = self._en_curso[clave] = threading.Event()
+                    self.fallos += 1
+                    break
+            evento.wait()
+
+        try:
+            return self.guardar(clave, calcular())
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            evento.set()
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_disco + self.fallos
+            return {
+                'entradas': len(self._memoria),
+                'bytes': self._bytes,
+                'aciertos': self.aciertos,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': (self.aciertos + self.aciertos_disco) / consultas if consultas else 0.0,
+            }
+
+
+# Cache compartido por todas las páginas. Para activar el nivel en disco:
+#   SIM_CACHE_DIR=/tmp/lab-modelos-cache python app.py
+CACHE = CacheSimulaciones(
+    max_entradas=int(os.environ.get('SIM_CACHE_ENTRADAS', 256)),
+    directorio=os.environ.get('SIM_CACHE_DIR') or None,
+)
@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- CLIENTE DE OPEN-METEO ---
+# Antes cada cambio del dropdown hacía un requests.get sin timeout ni cache.
+# Aquí: una sola Session con pool de conexiones, timeouts estrictos y un
+# cache en memoria por (lat, lon) que dura hasta la siguiente hora (el
+# pronóstico horario no cambia antes). Pasada esa hora, durante la ventana
+# "obsoleta" se responde al instante con el dato anterior y se refresca en
+# segundo plano (stale-while-revalidate).
+#
+# Para pruebas se puede apuntar a un servidor local:
+#   OPEN_METEO_URL=http://127.0.0.1:8000/v1/forecast python app.py
+#
+# precargar() trae varias ciudades en UNA petición (Open-Meteo acepta listas
+# de coordenadas) e iniciar_precarga() lo repite cada hora en un hilo, así el
+# mapa puede colorear todas las ciudades sin esperar a la red. Las páginas
+# solo anotan qué precargar (programar_precarga); el hilo lo arranca el
+# proceso que atiende (utils/servidor.py), nunca un import.
+
+URL_OPEN_METEO = 'https://api.open-meteo.com/v1/forecast'
+VARIABLES_HORARIAS = 'temperature_2m,windspeed_10m'
+
+
+def _siguiente_hora(ahora):
+    return (int(ahora) // 3600 + 1) * 3600
+
+
+class ClienteClima:
+    def __init__(self, url_base=URL_OPEN_METEO, timeout=(3.05, 10),
+                 ventana_obsoleta=3600, sesion=None):
+        self.url_base = url_base
+        self.timeout = timeout
+        self.ventana_obsoleta = ventana_obsoleta
+
+        self._sesion_propia = sesion is None
+        self.sesion = self._nueva_sesion() if sesion is None else sesion
+
+        self._cache = {}          # (lat, lon) -> (datos, expira, descargado)
+        self._lock = threading.Lock()
+        self._descargando = {}    # (lat, lon) -> Lock, para no pedir lo mismo dos veces
+        self._refrescando = set()
+        self._hilo_precarga = None
+        self._precarga = None     # (coordenadas, intervalo) de iniciar_precarga
+        self._detener = threading.Event()
+
+        self.aciertos = 0
+        self.obsoletos = 0
+        self.descargas = 0
+        self.errores = 0
+
+    @staticmethod
+    def _nueva_sesion():
+        sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        sesion.mount('https://', adaptador)
+        sesion.mount('http://', adaptador)
+        return sesion
+
+    @staticmethod
+    def _clave(lat, lon):
+        return round(float(lat), 4), round(float(lon), 4)
+
+    def _descargar(self, clave):
+        lat, lon = clave
+        respuesta = self.sesion.get(self.url_base, timeout=self.timeout, params={
+            'latitude': lat,
+            'longitude': lon,
+            'hourly': VARIABLES_HORARIAS,
+            'current_weather': 'true',
+        })
+        respuesta.raise_for_status()
+        datos = respuesta.json()
+        with self._lock:
+            self.descargas += 1
+        return datos
+
+    def guardar(self, lat, lon, datos, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            self._cache[self._clave(lat, lon)] = (datos, _siguiente_hora(ahora), ahora)
+
+    def _actualizar(self, clave, forzar=False):
+        # Descarga bloqueante, pero una sola por clave aunque lleguen varias peticiones
+        pedido = time.time()
+        with self._lock:
+            candado = self._descargando.setdefault(clave, threading.Lock())
+        with candado:
+            with self._lock:
+                entrada = self._cache.get(clave)
+            if entrada is not None and time.time() < entrada[1] and not forzar:
+                return entrada[0]  # otro hilo ya la descargó mientras esperábamos
+            if forzar and entrada is not None and entrada[2] >= pedido:
+                return entrada[0]  # otro hilo la descargó después de que se pidiera
+            try:
+                datos = self._descargar(clave)
+            except (requests.RequestException, ValueError):
+                with self._lock:
+                    self.errores += 1
+                raise
+            self.guardar(*clave, datos)
+            return datos
+
+    def _refrescar_en_fondo(self, clave):
+        with self._lock:
+            if clave in self._refrescando:
+                return
+            self._refrescando.add(clave)
+
+        def tarea():
+            try:
+                self._actualizar(clave)
+            except (requests.RequestException, ValueError):
+                pass  # se seguirá sirviendo el dato anterior
+            finally:
+                with self._lock:
+                    self._refrescando.discard(clave)
+
+        threading.Thread(target=tarea, daemon=True).start()
+
+    def pronostico(self, lat, lon, forzar=False):
+        # JSON de Open-Meteo (current_weather + hourly) para esa coordenada.
+        # forzar=True (botón "Actualizar API") descarga aunque el cache esté fresco.
+        clave = self._clave(lat, lon)
+        if forzar:
+            return self._actualizar(clave, forzar=True)
+        ahora = time.time()
+        with self._lock:
+            entrada = self._cache.get(clave)
+            if entrada is not None and ahora < entrada[1]:
+                self.aciertos += 1
+                return entrada[0]
+            obsoleto = entrada is not None and ahora < entrada[1] + self.ventana_obsoleta
+            if obsoleto:
+                self.obsoletos += 1
+
+        if obsoleto:
+            self._refrescar_en_fondo(clave)
+            return entrada[0]
+        return self._actualizar(clave)
+
+    def consultar(self, lat, lon):
+        # Solo mira el cache (aunque esté obsoleto); nunca va a la red
+        with self._lock:
+            entrada = self._cache.get(self._clave(lat, lon))
+        return entrada[0] if entrada is not None else None
+
+    def _intentar(self, clave):
+        try:
+            self._actualizar(clave)
+        except (requests.RequestException, ValueError):
+            pass
+
+    def precargar(self, coordenadas):
+        # Todas las coordenadas en una sola petición; si la respuesta no es la
+        # esperada, plan B: una petición por ciudad en paralelo.
+        claves = [self._clave(lat, lon) for lat, lon in coordenadas]
+        if not claves:
+            return
+        try:
+            respuesta = self.sesion.get(self.url_base, timeout=self.timeout, params={
+                'latitude': ','.join(str(lat) for lat, _ in claves),
+                'longitude': ','.join(str(lon) for _, lon in claves),
+                'hourly': VARIABLES_HORARIAS,
+                'current_weather': 'true',
+            })
+            respuesta.raise_for_status()
+            datos = respuesta.json()
+            if isinstance(datos, dict):
+                datos = [datos]
+            if len(datos) != len(claves):
+                raise ValueError("La respuesta no trae una entrada por ciudad")
+            with self._lock:
+                self.descargas += 1
+            ahora = time.time()
+            for clave, dato in zip(claves, datos):
+                self.guardar(*clave, dato, ahora=ahora)
+        except (requests.RequestException, ValueError):
+            with ThreadPoolExecutor(max_workers=min(8, len(claves))) as ejecutor:
+                list(ejecutor.map(self._intentar, claves))
+
+    def programar_precarga(self, coordenadas, intervalo=None):
+        # Anota qué precargar sin arrancar el hilo (ver iniciar_precarga)
+        self._precarga = (list(coordenadas), intervalo)
+
+    def iniciar_precarga(self, coordenadas=None, intervalo=None):
+        # Hilo en segundo plano: precarga ahora y luego cada `intervalo`
+        # segundos (por defecto, justo después de cada cambio de hora).
+        # Sin coordenadas usa las de programar_precarga (si no hay, nada).
+        if self._hilo_precarga is not None and self._hilo_precarga.is_alive():
+            return self._hilo_precarga
+        if coordenadas is None:
+            if self._precarga is None:
+                return None
+            coordenadas, intervalo = self._precarga
+        coordenadas = list(coordenadas)
+        self._precarga = (coordenadas, intervalo)
+        self._detener.clear()
+
+        def bucle():
+            while not self._detener.is_set():
+                self.precargar(coordenadas)
+                ahora = time.time()
+                espera = intervalo if intervalo else _siguiente_hora(ahora) - ahora + 5
+                self._detener.wait(espera)
+
+        self._hilo_precarga = threading.Thread(target=bucle, name='precarga-clima', daemon=True)
+        self._hilo_precarga.start()
+        return self._hilo_precarga
+
+    def detener_precarga(self):
+        self._detener.set()
+
+    def despues_de_fork(self):
+        # En un worker de gunicorn recién creado (preload_app): el cache se
+        # hereda del maestro, pero los hilos no sobreviven al fork, un lock
+        # podía estar tomado en ese instante y la sesión compartiría sockets.
+        detenida = self._detener.is_set()
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._descargando = {}
+        self._refrescando = set()
+        if self._sesion_propia:
+            self.sesion = self._nueva_sesion()
+        if self._precarga is not None and not detenida:
+            self._hilo_precarga = None
+            self.iniciar_precarga(*self._precarga)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'entradas': len(self._cache),
+                'aciertos': self.aciertos,
+                'obsoletos': self.obsoletos,
+                'descargas': self.descargas,
+                'errores': self.errores,
+            }
+
+
+CLIENTE = ClienteClima(url_base=os.environ.get('OPEN_METEO_URL', URL_OPEN_METEO))
@@ -0,0 +1,110 @@
+import functools
+import itertools
+import threading
+import time
+import uuid
+
+from dash import State, dcc
+from dash.exceptions import PreventUpdate
+
+from utils.config import ESPERA_COALESCENCIA
+
+# --- SOLO EL ÚLTIMO VALOR DE CADA SESIÓN ---
+# Al mover un slider con el teclado (o a saltos por la barra) llega una
+# petición por paso y cada una resuelve una EDO, aunque su resultado ya no le
+# sirva a nadie. Con solo_el_ultimo cada petición:
+#   1. se anota como la más reciente de su (pestaña, callback),
+#   2. espera ESPERA_COALESCENCIA segundos por si llega otra (debounce),
+#   3. hace fila: solo se resuelve una a la vez por (pestaña, callback),
+#   4. si al llegar su turno ya hay una más nueva, se descarta (PreventUpdate).
+# La última petición nunca se descarta, así que la pantalla siempre termina
+# mostrando los últimos parámetros.
+#
+# La pestaña es un id aleatorio en un dcc.Store del layout (almacen_pestana
+# en app.py), nuevo en cada carga de la página: dos pestañas del mismo
+# navegador no se descartan entre sí. El callback envuelto
+# declara PESTANA como último State y recibe ese id como último argumento;
+# sin id (p.ej. un layout sin el Store) la función se llama tal cual, sin
+# coalescer. El estado vive en la memoria del proceso: con varios workers
+# cada uno coalesce lo que le llega.
+
+PESTANA = State('pestana', 'data')
+
+
+def almacen_pestana():
+    # Se llama al servir el layout: un id por carga de página (= por pestaña)
+    return dcc.Store(id='pestana', data=uuid.uuid4().hex)
+
+
+class Coalescedor:
+    def __init__(self, espera=ESPERA_COALESCENCIA):
+        self.espera = espera
+        self._lock = threading.Lock()
+        self._generacion = itertools.count(1)  # global: nunca se repite
+        self._ultima = {}    # (pestaña, callback) -> generación más reciente
+        self._turnos = {}    # (pestaña, callback) -> Lock, una resolución a la vez
+
+        self.recibidas = 0
+        self.descartadas = 0
+        self.resueltas = 0
+
+    def _superada(self, clave, gen):
+        with self._lock:
+            return self._ultima.get(clave) != gen
+
+    def _descartar(self):
+        with self._lock:
+            self.descartadas += 1
+        raise PreventUpdate
+
+    def envolver(self, func, nombre=None):
+        # Devuelve la versión para registrar con callback(..., PESTANA): igual
+        # que func pero con el id de la pestaña como último argumento.
+        # nombre distingue funciones genéricas registradas varias veces.
+        nombre = nombre or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def envuelta(*args, **kwargs):
+            *args, pestana = args
+            if not pestana:
+                return func(*args, **kwargs)
+
+            clave = (pestana, nombre)
+            with self._lock:
+                gen = next(self._generacion)
+                self._ultima[clave] = gen
+                turno = self._turnos.setdefault(clave, threading.Lock())
+                self.recibidas += 1
+
+            if self.espera > 0:
+                time.sleep(self.espera)
+            if self._superada(clave, gen):
+                self._descartar()
+
+            with turno:
+                if self._superada(clave, gen):
+                    self._descartar()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    with self._lock:
+                        self.resueltas += 1
+                        # Si nadie más llegó, se olvida la clave (no crece sin límite)
+                        if self._ultima.get(clave) == gen:
+                            del self._ultima[clave]
+                            self._turnos.pop(clave, None)
+
+        return envuelta
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'pendientes': len(self._ultima),
+                'recibidas': self.recibidas,
+                'descartadas': self.descartadas,
+                'resueltas': self.resueltas,
+            }
+
+
+COALESCEDOR = Coalescedor()
+solo_el_ultimo = COALESCEDOR.envolver
@@ -0,0 +1,41 @@
+import os
+
+# --- CONFIGURACIÓN POR VARIABLES DE ENTORNO ---
+
+# Páginas con solución cerrada (clase1, pagina3): evaluar en el navegador
+# (assets/js/modelos_cerrados.js) o, con CALLBACKS_EN_CLIENTE=0, en Python.
+CALLBACKS_EN_CLIENTE = os.environ.get('CALLBACKS_EN_CLIENTE', '1') != '0'
+
+# Precisión de los arreglos que viajan en las figuras (trayectorias, barridos).
+# float32 da ~7 cifras significativas: de sobra para graficar poblaciones y
+# pesa la mitad. PRECISION_GRAFICAS=float64 manda los valores completos.
+PRECISION_GRAFICAS = os.environ.get('PRECISION_GRAFICAS', 'float32')
+
+# Segundos que espera un callback pesado por si llega un valor más nuevo del
+# mismo slider antes de resolver (utils/coalescencia.py). 0 = sin espera.
+ESPERA_COALESCENCIA = float(os.environ.get('ESPERA_COALESCENCIA', '0.15'))
+
+# Trabajos pesados (utils/trabajos.py): hasta COSTO_EN_LINEA segundos estimados
+# se calcula en el mismo worker; por encima, en segundo plano (si está
+# diskcache; si no, se rechaza) y por encima de COSTO_MAXIMO se rechaza sin calcular.
+# Sin DIR_TRABAJOS la cola usa un directorio temporal.
+COSTO_EN_LINEA = float(os.environ.get('COSTO_EN_LINEA', '1.0'))
+COSTO_MAXIMO = float(os.environ.get('COSTO_MAXIMO', '60'))
+DIR_TRABAJOS = os.environ.get('DIR_TRABAJOS') or None
+
+# Límites de las entradas numéricas, se revisan antes de resolver
+LIMITE_DIAS = float(os.environ.get('LIMITE_DIAS', '100000'))
+LIMITE_MALLA = int(os.environ.get('LIMITE_MALLA', '150'))
+
+# Dónde corren las integraciones (utils/ejecucion.py): 'local' (en el hilo
+# del callback) o 'procesos' (pool de SIM_PROCESOS workers). Las tareas que
+# tardan menos de UMBRAL_PROCESOS segundos siempre se quedan en línea.
+SIM_EJECUTOR = os.environ.get('SIM_EJECUTOR', 'local')
+SIM_PROCESOS = int(os.environ.get('SIM_PROCESOS', os.cpu_count() or 1))
+UMBRAL_PROCESOS = float(os.environ.get('UMBRAL_PROCESOS', '0.005'))
+
+# Instrumentación (utils/instrumentacion.py): fracción de las llamadas a
+# callbacks que se perfilan con cProfile (0 = ninguna). Se puede cambiar en
+# caliente en /perfil, que solo existe si se define TOKEN_PERFIL.
+PERFIL_MUESTREO = float(os.environ.get('PERFIL_MUESTREO', '0'))
+TOKEN_PERFIL = os.environ.get('TOKEN_PERFIL') or None
@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.config import SIM_EJECUTOR, SIM_PROCESOS, UMBRAL_PROCESOS
+
+# --- DÓNDE CORREN LAS INTEGRACIONES ---
+# odeint/solve_ivp llaman al lado derecho en Python en cada paso, así que
+# tienen el GIL casi todo el tiempo: con un servidor con hilos, dos usuarios
+# integrando a la vez se turnan en un solo núcleo. Con SIM_EJECUTOR=procesos
+# las integraciones van a un ProcessPoolExecutor con SIM_PROCESOS workers ya
+# calientes (NumPy, SciPy y los modelos importados de antemano).
+#
+# No todo vale la pena mandarlo a otro proceso (cuesta ~1 ms ir y volver):
+# cada tarea lleva un nombre y se guarda cuánto tarda en promedio. Las que
+# tardan menos de UMBRAL_PROCESOS segundos se siguen haciendo en el hilo que
+# las pidió. Los barridos grandes se reparten entre los workers (ver
+# utils/barrido.py).
+#
+# Con SIM_EJECUTOR=local (por defecto) todo corre en el hilo del callback.
+
+# Lo que cada worker importa al arrancar (y el maestro de gunicorn antes
+# del fork, ver utils/servidor.py)
+PRECARGA = ['numpy', 'scipy.integrate', 'scipy.special', 'scipy.optimize', 'utils.modelos',
+            'utils.simulacion', 'utils.barrido', 'utils.estocastico', 'utils.ajuste']
+
+
+def precargar():
+    for modulo in PRECARGA:
+        __import__(modulo)
+
+
+def _iniciar_worker():
+    # Initializer de cada worker del pool: importa lo pesado y marca el
+    # EJECUTOR de ese proceso como "sin pool", para que un barrido dentro de
+    # un worker corra en línea en vez de abrir otro pool anidado
+    precargar()
+    EJECUTOR.procesos = 0
+
+
+def _nada(_=None):
+    return os.getpid()
+
+
+class Ejecutor:
+    def __init__(self, procesos=0, umbral=UMBRAL_PROCESOS):
+        self.procesos = procesos
+        self.umbral = umbral
+        self._pool = None
+        self._pid = os.getpid()   # el pool solo sirve en el proceso que lo creó
+        self._lock = threading.Lock()
+        self._promedios = {}   # nombre de tarea -> segundos (promedio móvil)
+
+        self.en_linea = 0
+        self.en_procesos = 0
+
+    @property
+    def paralelo(self):
+        # Dentro de un proceso hijo por fork (p.ej. un trabajo en segundo plano
+        # de utils/trabajos.py) el pool heredado no sirve: se trabaja en línea.
+        # Los workers del pool ponen procesos = 0 al arrancar (_iniciar_worker).
+        return self.procesos > 1 and self._pid == os.getpid()
+
+    def _obtener_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # forkserver: los workers nacen de un proceso limpio (sin los
+                # hilos del servidor) que ya importó NumPy/SciPy
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    contexto = multiprocessing.get_context('forkserver')
+                    contexto.set_forkserver_preload(PRECARGA)
+                else:
+                    contexto = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(self.procesos, mp_context=contexto,
+                                                 initializer=_iniciar_worker)
+            return self._pool
+
+    def despues_de_fork(self):
+        # En un worker de gunicorn recién creado: pool y lock propios
+        self._pool = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def calentar(self):
+        # Arranca todos los workers ahora y no en la primera petición
+        if not self.paralelo:
+            return []
+        pool = self._obtener_pool()
+        return sorted(set(pool.map(_nada, range(self.procesos))))
+
+    def _anotar(self, nombre, segundos, en_procesos):
+        with self._lock:
+            previo = self._promedios.get(nombre)
+            self._promedios[nombre] = segundos if previo is None else 0.8 * previo + 0.2 * segundos
+            if en_procesos:
+                self.en_procesos += 1
+            else:
+                self.en_linea += 1
+
+    def ejecutar(self, nombre, func, *args, costo=None):
+        # func y args deben poder enviarse a otro proceso (funciones de módulo,
+        # arreglos, tuplas). costo: segundos estimados; si no se da se usa el
+        # promedio de las veces anteriores de la misma tarea.
+        if costo is None:
+            with self._lock:
+                costo = self._promedios.get(nombre, 0.0)
+        en_procesos = self.paralelo and costo >= self.umbral
+
+        inicio = time.perf_counter()
+        if en_procesos:
+            resultado = self._obtener_pool().submit(func, *args).result()
+        else:
+            resultado = func(*args)
+        self._anotar(nombre, time.perf_counter() - inicio, en_procesos)
+        return resultado
+
+    def repartir(self, nombre, func, lista_args):
+        # Varias tareas independientes a la vez, una por worker
+        if not self.paralelo or len(lista_args) < 2:
+            return [func(*args) for args in lista_args]
+        inicio = time.perf_counter()
+        pool = self._obtener_pool()
+        futuros = [pool.submit(func, *args) for args in lista_args]
+        resultados = [f.result() for f in futuros]
+        self._anotar(nombre, time.perf_counter() - inicio, True)
+        return resultados
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'procesos': self.procesos if self.paralelo else 0,
+                'en_linea': self.en_linea,
+                'en_procesos': self.en_procesos,
+                'promedios_ms': {k: round(v * 1000, 2) for k, v in self._promedios.items()},
+            }
+
+
+EJECUTOR = Ejecutor(procesos=SIM_PROCESOS if SIM_EJECUTOR == 'procesos' else 0)
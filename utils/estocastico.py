@@ -0,0 +1,217 @@
+import numpy as np
+
+from utils.ejecucion import EJECUTOR
+from utils.instrumentacion import contar_evaluaciones, medir
+from utils.modelos import obtener_modelo
+
+# --- SIMULACIÓN ESTOCÁSTICA DE LOS MODELOS COMPARTIMENTALES ---
+# Con poblaciones chicas (N = 275 del rumor, I0 = 1 en el brote estudiantil)
+# la epidemia se puede apagar por azar antes de despegar, cosa que las EDO no
+# ven. Aquí se corren muchas realizaciones a la vez, una por columna de un
+# arreglo (n_estados, m) de enteros:
+#   exacto (Gillespie)  una transición por realización y por iteración, cada
+#                       una con su propio reloj; para N chico
+#   tau-leaping         pasos de tiempo comunes; cuántos individuos salen de
+#                       cada compartimento en un paso es binomial, así que
+#                       nunca queda uno negativo; para N grande
+# Las realizaciones que se absorben (sin nadie que pueda cambiar de
+# compartimento) salen del arreglo. Los parámetros son los del registro
+# (utils/modelos.py): b es por contacto, b = beta/N en las páginas.
+
+# modelo -> [(origen, destino, tasa por individuo del origen)]: cada
+# transición mueve a un individuo; la tasa puede depender del estado. Van en
+# el orden de la cadena (tau-leaping las aplica en ese orden)
+TRANSICIONES = {
+    'sir': [(0, 1, lambda y, b, k: b * y[1]),
+            (1, 2, lambda y, b, k: k)],
+    'seir': [(0, 1, lambda y, b, sigma, gamma: b * y[2]),
+             (1, 2, lambda y, b, sigma, gamma: sigma),
+             (2, 3, lambda y, b, sigma, gamma: gamma)],
+}
+
+# modelo -> R0 con los susceptibles iniciales (para la probabilidad teórica)
+NUMERO_REPRODUCTIVO = {
+    'sir': lambda S0, b, k: b * S0 / k if k > 0 else np.inf,
+    'seir': lambda S0, b, sigma, gamma: b * S0 / gamma if gamma > 0 else np.inf,
+}
+
+# Hasta esta población se usa Gillespie; arriba, tau-leaping. Gillespie hace
+# del orden de 2 N iteraciones (una por contagio y una por recuperación)
+UMBRAL_EXACTO = 1000
+# Tau-leaping: el paso es tal que la tasa por individuo más rápida por el
+# paso no pasa de EPSILON (probabilidad de cambiar de compartimento en un paso)
+EPSILON = 0.03
+# Brote mayor: la realización contagió al menos esta fracción de S0
+UMBRAL_BROTE = 0.1
+NIVELES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _tablas(modelo):
+    transiciones = TRANSICIONES[modelo]
+    origen = np.array([o for o, _, _ in transiciones])
+    destino = np.array([d for _, d, _ in transiciones])
+    tasas = [f for _, _, f in transiciones]
+    return origen, destino, tasas
+
+
+def _tasas_por_individuo(tasas, y, args):
+    salida = np.empty((len(tasas), y.shape[1]))
+    for r, f in enumerate(tasas):
+        salida[r] = f(y, *args)
+    return salida
+
+
+def _anotar(salida, pos, fin, columnas, y):
+    # Estado y[:, j] en los puntos de la malla pos[j] .. fin[j] - 1 de la columna columnas[j]
+    cuantos = fin - pos
+    total = int(cuantos.sum())
+    if total == 0:
+        return
+    j = np.repeat(np.arange(cuantos.size), cuantos)
+    puntos = pos[j] + np.arange(total) - np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+    salida[puntos, :, columnas[j]] = y[:, j].T
+
+
+def _gillespie(modelo, y0, malla, args, n, rng):
+    origen, destino, tasas = _tablas(modelo)
+    # Solo las realizaciones vivas, contiguas; columnas[j] dice cuál es cada una
+    Y = np.repeat(np.asarray(y0, dtype=np.int64)[:, None], n, axis=1)
+    t = np.zeros(n)
+    pos = np.zeros(n, dtype=np.int64)   # próximo punto de la malla por anotar
+    columnas = np.arange(n)
+    salida = np.empty((malla.size, Y.shape[0], n), dtype=np.int32)
+    evaluaciones = 0
+
+    while columnas.size:
+        propensiones = np.cumsum(_tasas_por_individuo(tasas, Y, args) * Y[origen], axis=0)
+        total = propensiones[-1]
+        evaluaciones += columnas.size
+        with np.errstate(divide='ignore'):
+            t += rng.exponential(1.0, columnas.size) / total   # inf si se absorbió
+
+        # El estado actual vale hasta el salto: se anota en los puntos de la
+        # malla que caen antes (casi siempre ninguno)
+        cruza = np.flatnonzero(malla[pos] < t)
+        if cruza.size:
+            fin = np.searchsorted(malla, t[cruza])
+            _anotar(salida, pos[cruza], fin, columnas[cruza], Y[:, cruza])
+            pos[cruza] = fin
+            sigue = pos < malla.size
+            if not sigue.all():
+                Y, t, pos, columnas = Y[:, sigue], t[sigue], pos[sigue], columnas[sigue]
+                propensiones, total = propensiones[:, sigue], total[sigue]
+
+        elegida = (propensiones < rng.random(columnas.size) * total).sum(axis=0)
+        j = np.arange(columnas.size)
+        Y[origen[elegida], j] -= 1
+        Y[destino[elegida], j] += 1
+
+    return salida, evaluaciones
+
+
+def _tau_leaping(modelo, y0, malla, args, n, rng, epsilon=EPSILON):
+    origen, destino, tasas = _tablas(modelo)
+    Y = np.repeat(np.asarray(y0, dtype=np.int64)[:, None], n, axis=1)
+    salida = np.empty((malla.size, Y.shape[0], n), dtype=np.int32)
+    salida[0] = Y
+    vivas = np.arange(n)
+    evaluaciones = 0
+    t = malla[0]
+
+    for i in range(1, malla.size):
+        while vivas.size and t < malla[i]:
+            y = Y[:, vivas]
+            por_individuo = _tasas_por_individuo(tasas, y, args)
+            evaluaciones += vivas.size
+            # Absorbidas: nadie en el origen de una transición con tasa > 0
+            activa = ((por_individuo > 0) & (y[origen] > 0)).any(axis=0)
+            if not activa.all():
+                salida[i:, :, vivas[~activa]] = y[:, ~activa]
+                vivas, y, por_individuo = vivas[activa], y[:, activa], por_individuo[:, activa]
+                if not vivas.size:
+                    break
+            tau = min(malla[i] - t, epsilon / por_individuo.max())
+            # Tasas en el punto medio del paso (con el cambio esperado) y, en
+            # el orden de la cadena, los que entraron en este mismo paso salen
+            # con la probabilidad de medio paso. Sin esto el promedio se
+            # adelanta a las EDO en un O(EPSILON)
+            medio = y.astype(float)
+            flujo = 0.5 * y[origen] * -np.expm1(-por_individuo * tau)
+            np.subtract.at(medio, origen, flujo)
+            np.add.at(medio, destino, flujo)
+            por_individuo = _tasas_por_individuo(tasas, medio, args)
+            entraron = np.zeros_like(y)
+            for r, (o, d) in enumerate(zip(origen, destino)):
+                salen = (rng.binomial(y[o], -np.expm1(-por_individuo[r] * tau))
+                         + rng.binomial(entraron[o], -np.expm1(-por_individuo[r] * tau / 2)))
+                Y[o, vivas] -= salen
+                Y[d, vivas] += salen
+                entraron[d] += salen
+            t += tau
+        salida[i, :, vivas] = Y[:, vivas].T
+
+    return salida, evaluaciones
+
+
+def realizaciones(modelo, y0, malla, args, n, metodo, semilla):
+    # (puntos de la malla, n_estados, n) enteros. Función de módulo: se puede
+    # mandar a un worker de EJECUTOR con su propia semilla
+    rng = np.random.default_rng(semilla)
+    correr = _gillespie if metodo == 'exacto' else _tau_leaping
+    salida, evaluaciones = correr(modelo, y0, malla, args, n, rng)
+    contar_evaluaciones(evaluaciones)
+    return salida
+
+
+def prob_brote_teorica(modelo, y0, args):
+    # Proceso de ramificación: cada cadena de contagio iniciada por un
+    # expuesto o infectado se extingue con probabilidad 1/R0
+    R0 = NUMERO_REPRODUCTIVO[modelo](y0[0], *args)
+    if R0 <= 1:
+        return 0.0
+    return 1.0 - R0 ** -float(np.sum(y0[1:-1]))
+
+
+@medir('resolver')
+def simular_estocastico(modelo, y0, t_max, parametros, n_realizaciones=1000, n_puntos=200,
+                        metodo='auto', semilla=None, niveles=NIVELES):
+    # Bandas de cuantiles y probabilidad de brote mayor de n_realizaciones.
+    # Los estados iniciales se redondean a enteros (individuos).
+    nombre = obtener_modelo(modelo).nombre
+    if nombre not in TRANSICIONES:
+        raise ValueError(f"El modelo '{nombre}' no tiene versión estocástica")
+    if not t_max > 0 or n_realizaciones < 1:
+        raise ValueError("Se necesita t_max > 0 y al menos una realización")
+    args = obtener_modelo(nombre).argumentos(parametros)
+    y0 = np.rint(np.maximum(np.asarray(y0, dtype=float), 0)).astype(np.int64)
+    if metodo == 'auto':
+        metodo = 'exacto' if y0.sum() <= UMBRAL_EXACTO else 'tau'
+    malla = np.linspace(0.0, float(t_max), int(n_puntos))
+
+    # Una parte por worker, cada una con su flujo de números aleatorios
+    partes = EJECUTOR.procesos if EJECUTOR.paralelo else 1
+    partes = max(1, min(partes, n_realizaciones // 250))
+    semillas = np.random.SeedSequence(semilla).spawn(partes)
+    tamanos = np.diff(np.linspace(0, n_realizaciones, partes + 1).astype(int))
+    salida = np.concatenate(EJECUTOR.repartir(
+        f'estocastico-{nombre}', realizaciones,
+        [(nombre, y0, malla, args, int(m), metodo, s) for m, s in zip(tamanos, semillas)]), axis=2)
+
+    tamano = y0[0] - salida[-1, 0, :]
+    return {
+        't': malla,
+        'niveles': tuple(niveles),
+        'cuantiles': np.quantile(salida, niveles, axis=2),   # (niveles, puntos, estados)
+        'media': salida.mean(axis=2),
+        'prob_brote': float(np.mean(tamano >= max(UMBRAL_BROTE * y0[0], 1))),
+        'prob_brote_teorica': prob_brote_teorica(nombre, y0, args),
+        'metodo': metodo,
+        'realizaciones': int(n_realizaciones),
+    }
+
+
+def banda(resultado, estado, bajo=0.05, alto=0.95):
+    # (alto, bajo, mediana) del estado `estado` (índice) para trazas_banda
+    niveles = list(resultado['niveles'])
+    c = resultado['cuantiles'][:, :, estado]
+    return c[niveles.index(alto)], c[niveles.index(bajo)], c[niveles.index(0.5)]
@@ -0,0 +1,136 @@
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+from utils.instrumentacion import medir
+
+try:
+    import numexpr
+except ImportError:  # numexpr es opcional, sin él se usa NumPy directamente
+    numexpr = None
+
+# --- LISTA BLANCA (la misma que usaba el diccionario de Campo_vectorial) ---
+VARIABLES = ('X', 'Y')
+FUNCIONES = {
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+}
+CONSTANTES = {
+    'pi': np.pi,
+    'e': np.e,
+}
+
+_OPERADORES = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod,
+               ast.UAdd, ast.USub)
+
+
+class _Normalizador(ast.NodeTransformer):
+    # Recorre el árbol y rechaza cualquier nodo que no esté en la lista blanca.
+    # De paso quita el prefijo "np." para que np.sin(X) y sin(X) sean la
+    # misma expresión normalizada (y compartan la entrada del cache).
+
+    def generic_visit(self, node):
+        raise ValueError(f"Elemento no permitido: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _OPERADORES):
+            raise ValueError(f"Operador no permitido: {type(node.op).__name__}")
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _OPERADORES):
+            raise ValueError(f"Operador no permitido: {type(node.op).__name__}")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Constante no permitida: {node.value!r}")
+        # Todo se pasa a float: así algo como 9**9**9 desborda al instante en
+        # vez de calcular un entero gigantesco con el worker bloqueado.
+        try:
+            node.value = float(node.value)
+        except OverflowError:
+            raise ValueError("Constante demasiado grande") from None
+        return node
+
+    def visit_Name(self, node):
+        if node.id not in VARIABLES and node.id not in CONSTANTES and node.id not in FUNCIONES:
+            raise ValueError(f"Nombre no permitido: {node.id}")
+        return node
+
+    def visit_Attribute(self, node):
+        # Solo se acepta np.<nombre de la lista blanca>
+        if not (isinstance(node.value, ast.Name) and node.value.id == 'np'):
+            raise ValueError("Solo se permiten atributos de la forma np.<función>")
+        if node.attr not in FUNCIONES and node.attr not in CONSTANTES:
+            raise ValueError(f"Función no permitida: np.{node.attr}")
+        return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+
+    def visit_Call(self, node):
+        func = self.visit(node.func)
+        if not isinstance(func, ast.Name) or func.id not in FUNCIONES:
+            raise ValueError("Solo se pueden llamar funciones de la lista blanca")
+        if node.keywords or len(node.args) != 1:
+            raise ValueError(f"{func.id}() recibe exactamente un argumento")
+        node.func = func
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+def normalizar(texto):
+    # Texto del usuario -> árbol validado (sin "np.") y su forma canónica
+    if not isinstance(texto, str) or not texto.strip():
+        raise ValueError("La expresión está vacía")
+    try:
+        arbol = ast.parse(texto.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Expresión inválida: {e.msg}") from None
+    arbol = ast.fix_missing_locations(_Normalizador().visit(arbol))
+    return arbol, ast.unparse(arbol)
+
+
+@lru_cache(maxsize=256)
+def _compilar_normalizada(normalizada):
+    if numexpr is not None:
+        # numexpr entiende la misma sintaxis; las constantes se pasan como variables
+        def evaluar(X, Y):
+            X, Y = np.asarray(X, dtype=float), np.asarray(Y, dtype=float)
+            return numexpr.evaluate(normalizada, local_dict={'X': X, 'Y': Y, **CONSTANTES})
+        evaluar.expresion = normalizada
+        return evaluar
+
+    # El árbol ya fue validado: se compila una sola vez y se evalúa sin builtins
+    codigo = compile(normalizada, '<campo>', 'eval')
+    entorno = {'__builtins__': {}, **FUNCIONES, **CONSTANTES}
+
+    def evaluar(X, Y):
+        return eval(codigo, entorno, {'X': X, 'Y': Y})
+    evaluar.expresion = normalizada
+    return evaluar
+
+
+@lru_cache(maxsize=256)
+def compilar(texto):
+    # Devuelve f(X, Y) vectorizada. El texto ya visto no se vuelve a parsear y
+    # escrituras equivalentes ("np.sin(X)" / "sin( X )") comparten la función.
+    _, normalizada = normalizar(texto)
+    return _compilar_normalizada(normalizada)
+
+
+@medir('resolver')
+def evaluar_campo(fx_str, fy_str, X, Y):
+    # Evalúa ambas componentes y las lleva a la forma de la malla
+    fx = compilar(fx_str)(X, Y)
+    fy = compilar(fy_str)(X, Y)
+    return np.broadcast_to(fx, X.shape), np.broadcast_to(fy, Y.shape)
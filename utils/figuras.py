@@ -0,0 +1,80 @@
+import base64
+
+import numpy as np
+import plotly.graph_objs as go
+from dash import Patch
+
+from utils.config import PRECISION_GRAFICAS
+
+# --- ACTUALIZACIÓN PARCIAL DE FIGURAS ---
+# Cada página arma su figura base (layout, títulos, leyendas, líneas fijas)
+# UNA sola vez al importar y la pone en su dcc.Graph. Los callbacks devuelven
+# un Patch que reemplaza solo los datos de las trazas (y alguna anotación):
+# el layout no se vuelve a validar en el servidor ni viaja otra vez al navegador.
+#
+# Requisito: la figura base ya trae todas las trazas (aunque vacías) en el
+# mismo orden en que las parchea el callback.
+#
+# Al construir una figura, plotly manda los arreglos de NumPy en binario
+# (base64, "bdata"), pero dentro de un Patch irían como listas JSON de
+# números en texto, que pesan más que la figura entera. arreglo() hace la
+# misma conversión para lo que va en un Patch.
+#
+# Además, los flotantes se bajan a PRECISION_GRAFICAS (float32 por defecto,
+# ver utils/config.py): nadie necesita 17 cifras para dibujar una curva.
+
+# dtype de NumPy -> tipo de arreglo de plotly.js
+_TIPOS = {'float64': 'f8', 'float32': 'f4', 'int32': 'i4', 'int16': 'i2',
+          'int8': 'i1', 'uint32': 'u4', 'uint16': 'u2', 'uint8': 'u1'}
+
+
+def compactar(v, precision=None):
+    # Arreglo flotante en la precisión de las gráficas (lo demás no se toca).
+    # Sirve también para go.Scatter(...): plotly lo manda en binario con ese dtype.
+    if isinstance(v, np.ndarray) and v.dtype.kind == 'f':
+        return v.astype(precision or PRECISION_GRAFICAS, copy=False)
+    return v
+
+
+def arreglo(v, precision=None):
+    # Arreglo de NumPy -> {'dtype', 'bdata'} que plotly.js lee directamente
+    v = compactar(v, precision)
+    if not isinstance(v, np.ndarray) or v.size == 0 or str(v.dtype) not in _TIPOS:
+        return v
+    v = np.ascontiguousarray(v)
+    spec = {'dtype': _TIPOS[str(v.dtype)], 'bdata': base64.b64encode(v).decode('ascii')}
+    if v.ndim > 1:
+        spec['shape'] = ', '.join(str(n) for n in v.shape)  # p.ej. z de un heatmap
+    return spec
+
+
+def parche_series(x, *series, parche=None, desde=0):
+    # Todas las series comparten el eje x; la serie j va a la traza desde + j
+    parche = Patch() if parche is None else parche
+    x = arreglo(x)
+    for j, y in enumerate(series):
+        parche['data'][desde + j]['x'] = x
+        parche['data'][desde + j]['y'] = arreglo(y)
+    return parche
+
+
+def parche_vacio(n_trazas, parche=None, desde=0):
+    # Borra los datos de las trazas pero conserva el layout (entradas inválidas)
+    parche = Patch() if parche is None else parche
+    for i in range(desde, desde + n_trazas):
+        parche['data'][i]['x'] = []
+        parche['data'][i]['y'] = []
+    return parche
+
+
+def trazas_banda(nombre, color, relleno):
+    # Tres trazas vacías para la figura base: borde alto y borde bajo de una
+    # banda de cuantiles (relleno entre ambos) y la mediana. Se parchean con
+    # parche_series(t, alto, bajo, mediana, desde=...)
+    borde = dict(width=0, color=color)
+    return [
+        go.Scatter(x=[], y=[], mode='lines', line=borde, hoverinfo='skip', showlegend=False),
+        go.Scatter(x=[], y=[], mode='lines', line=borde, fill='tonexty', fillcolor=relleno,
+                   hoverinfo='skip', name=f'{nombre} (5-95 %)'),
+        go.Scatter(x=[], y=[], mode='lines', line=dict(color=color, dash='dot'), name=f'{nombre} (mediana)'),
+    ]
@@ -1,47 +1,46 @@
 import numpy as np
 import plotly.graph_objs as go
-from scipy.integrate import odeint
+from dash import Patch
+from utils.simulacion import simular_trayectoria
+from utils.figuras import arreglo, compactar, parche_series
 
-# Definimos la ecuación diferencial fuera para que odeint la use
-def modelo_cosecha_edo(P, t, r, K, h):
-    # Ecuación: Crecimiento logístico MENOS la cosecha constante h
-    dPdt = r * P * (1 - P/K) - h
-    return dPdt
-
-def funcion_grafica_cosecha(n_clicks, P0, r, K, t_max, h):
-    # 1. Generar vector de tiempo (más puntos para que la curva sea suave)
-    t = np.linspace(0, t_max, 200)
-
-    # 2. Resolver la ecuación diferencial numéricamente
-    # Pasamos los argumentos r, K, h a la función
-    P = odeint(modelo_cosecha_edo, P0, t, args=(r, K, h))
+def simular_cosecha(P0, r, K, t_max, h):
+    # 1-2. Resolver la ecuación diferencial numéricamente
+    # Modelo 'cosecha' del registro (utils/modelos.py): logístico MENOS h.
+    # El vector de tiempo lo elige el integrador (pasos adaptativos reducidos
+    # a un número fijo de puntos), así la curva es suave para cualquier t_max.
+    t, P = simular_trayectoria('cosecha', [P0], t_max, {'r': r, 'K': K, 'h': h})
     P = P.flatten() # Convertimos matriz a vector simple
 
     # 3. Lógica de Extinción:
     # Si la población baja de 0, matemáticamente sigue, pero biológicamente es 0.
-    P[P < 0] = 0
+    # Si la población colapsa hacia -inf el integrador se detiene (NaN): también es 0.
+    P[np.isnan(P) | (P < 0)] = 0
     
     # Detectar si se extinguió para cambiar el color de la línea
     se_extingue = np.any(P == 0)
     color_linea = 'red' if se_extingue else '#10b981' # Rojo si muere, Verde si vive
+    return t, P, color_linea
 
-    # --- CREAR LA FIGURA ---
+
+def figura_cosecha_base():
+    # --- CREAR LA FIGURA --- (sin datos: el layout no depende de los parámetros)
     fig = go.Figure()
 
     # Traza 1: Población
     fig.add_trace(go.Scatter(
-        x=t,
-        y=P,
+        x=[],
+        y=[],
         mode='lines', # Quitamos markers para que se vea más limpio
         name='Población P(t)',
-        line=dict(color=color_linea, width=4),
+        line=dict(color='#10b981', width=4),
         hovertemplate='Día: %{x:.1f}<br>Población: %{y:.1f}<extra></extra>'
     ))
 
     # Traza 2: Capacidad de Carga
     fig.add_trace(go.Scatter(
-        x=[0, t_max],
-        y=[K, K],
+        x=[],
+        y=[],
         mode='lines',
         name='Capacidad (K)',
         line=dict(color='gray', width=2, dash='dash'),
@@ -50,7 +49,7 @@ def funcion_grafica_cosecha(n_clicks, P0, r, K, t_max, h):
 
     # Traza 3: Umbral de Extinción (Línea en 0)
     fig.add_trace(go.Scatter(
-        x=[0, t_max],
+        x=[],
         y=[0, 0],
         mode='lines',
         name='Extinción',
@@ -61,7 +60,7 @@ def funcion_grafica_cosecha(n_clicks, P0, r, K, t_max, h):
     # --- DISEÑO (LAYOUT) MEJORADO ---
     fig.update_layout(
         title=dict(
-            text=f'<b>Modelo con Cosecha (h={h})</b>',
+            text='',
             y=0.95,
             x=0.5,
             xanchor='center',
@@ -83,5 +82,130 @@ def funcion_grafica_cosecha(n_clicks, P0, r, K, t_max, h):
             x=0.5
         )
     )
+    return fig
+
+
+def parche_cosecha(P0, r, K, t_max, h):
+    # Patch sobre figura_cosecha_base(): solo cambian los datos, el color y el título
+    t, P, color_linea = simular_cosecha(P0, r, K, t_max, h)
+    parche = parche_series(t, P)
+    parche['data'][0]['line']['color'] = color_linea
+    parche['data'][1]['x'] = [0, t_max]
+    parche['data'][1]['y'] = [K, K]
+    parche['data'][2]['x'] = [0, t_max]
+    parche['layout']['title']['text'] = f'<b>Modelo con Cosecha (h={h})</b>'
+    return parche
+
+
+def funcion_grafica_cosecha(n_clicks, P0, r, K, t_max, h):
+    # Figura completa (base + datos), para quien necesite el go.Figure entero
+    t, P, color_linea = simular_cosecha(P0, r, K, t_max, h)
+    fig = figura_cosecha_base()
+    fig.update_traces(x=compactar(t), y=compactar(P), line_color=color_linea, selector=0)
+    fig.update_traces(x=[0, t_max], y=[K, K], selector=1)
+    fig.update_traces(x=[0, t_max], selector=2)
+    fig.update_layout(title_text=f'<b>Modelo con Cosecha (h={h})</b>')
+    return fig
+
+
+def figura_bifurcacion_base(eje_x):
+    # Diagrama de bifurcación: equilibrios P* contra un parámetro. Trazas:
+    # 0 estables, 1 inestables (cada una con NaN entre tramos), 2 puntos de
+    # bifurcación, 3 valor actual del parámetro, 4 población inicial
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Equilibrio estable',
+                             line=dict(color='#10b981', width=4)))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Equilibrio inestable (umbral)',
+                             line=dict(color='#ef4444', width=3, dash='dash')))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='markers+text', name='Bifurcación', text=[],
+                             textposition='top center', marker=dict(color='black', size=10, symbol='x')))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Valor actual',
+                             line=dict(color='gray', width=1, dash='dot')))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='markers', name='P(0)',
+                             marker=dict(color='#3b82f6', size=11, symbol='diamond')))
+    fig.update_layout(
+        title=dict(text='Diagrama de bifurcación', x=0.5, xanchor='center'),
+        xaxis_title=eje_x,
+        yaxis_title="Equilibrio P*",
+        template='plotly_white',
+        margin=dict(l=40, r=40, t=60, b=80),
+        legend=dict(orientation="h", y=-0.2, x=0.5, xanchor='center')
+    )
+    return fig
+
+
+def parche_bifurcacion(ramas, escala_x, escala_y, valor, P0, marcas, x_max):
+    # Patch sobre figura_bifurcacion_base(). `ramas` son las de
+    # utils.bifurcacion en forma adimensional: se escalan a las unidades de
+    # la página. `marcas`: [(x, y, texto)] ya en esas unidades
+    partes = {True: ([], []), False: ([], [])}
+    for r in ramas:
+        x, y, estable = r['lam'] * escala_x, r['x'][:, 0] * escala_y, r['estable']
+        for tipo in (True, False):
+            # Cada tramo se extiende un punto para que estable e inestable se toquen
+            en_tramo = estable == tipo
+            en_tramo[1:] |= en_tramo[:-1]
+            xs, ys = partes[tipo]
+            xs.append(np.where(en_tramo, x, np.nan))
+            ys.append(np.where(en_tramo, y, np.nan))
+            xs.append([np.nan])
+            ys.append([np.nan])
+    parche = Patch()
+    for j, tipo in enumerate((True, False)):
+        xs, ys = partes[tipo]
+        parche['data'][j]['x'] = arreglo(np.concatenate(xs))
+        parche['data'][j]['y'] = arreglo(np.concatenate(ys))
+    parche['data'][2]['x'] = [m[0] for m in marcas]
+    parche['data'][2]['y'] = [m[1] for m in marcas]
+    parche['data'][2]['text'] = [m[2] for m in marcas]
+    y_max = max(1.2 * escala_y, 1.1 * P0)
+    parche['data'][3]['x'] = [valor, valor]
+    parche['data'][3]['y'] = [0, y_max]
+    parche['data'][4]['x'] = [valor]
+    parche['data'][4]['y'] = [P0]
+    parche['layout']['xaxis']['range'] = [0, max(x_max, 1.1 * valor)]
+    parche['layout']['yaxis']['range'] = [-0.05 * y_max, y_max]
+    return parche
+
 
-    return fig
\ No newline at end of file
+def trazas_campo_vectorial(X, Y, fx, fy):
+    # Todas las flechas van en UNA traza de líneas: cada vector aporta 3 puntos
+    # (inicio, punta, NaN) y el NaN corta la línea entre un vector y otro.
+    # El hover va en una segunda traza, solo con los orígenes: así los datos
+    # del hover viajan una vez por vector y no en la punta ni en el NaN.
+    x0, y0 = X.ravel(), Y.ravel()
+    # broadcast_to permite expresiones constantes (p.ej. dx/dt = 1)
+    u = np.broadcast_to(np.asarray(fx, dtype=float), X.shape).ravel()
+    v = np.broadcast_to(np.asarray(fy, dtype=float), Y.shape).ravel()
+    n = x0.size
+
+    xs = np.empty((n, 3))
+    ys = np.empty((n, 3))
+    xs[:, 0], xs[:, 1], xs[:, 2] = x0, x0 + u, np.nan
+    ys[:, 0], ys[:, 1], ys[:, 2] = y0, y0 + v, np.nan
+
+    # Marcador rojo solo en la punta (tamaño 0 en el origen y en el NaN)
+    tamanos = np.tile(np.array([0, 5, 0], dtype=np.uint8), n)
+
+    flechas = go.Scatter(
+        x=compactar(xs.ravel()),
+        y=compactar(ys.ravel()),
+        mode='lines+markers',
+        line=dict(color='blue', width=2),
+        marker=dict(size=tamanos, color='red'),
+        hoverinfo='skip',
+        showlegend=False,
+    )
+    # Origen: marcador pequeño azul con el vector en el hover. float32 basta
+    # para mostrar 2 decimales y reduce el JSON a la mitad.
+    origenes = go.Scatter(
+        x=compactar(x0),
+        y=compactar(y0),
+        mode='markers',
+        marker=dict(size=3, color='blue'),
+        customdata=np.column_stack([u, v]).astype(np.float32),
+        showlegend=False,
+        hovertemplate=('Punto:(%{x:.1f}, %{y:.1f})<br>'
+                       'Vector:(%{customdata[0]:.2f}, %{customdata[1]:.2f})<extra></extra>')
+    )
+    return [flechas, origenes]
@@ -0,0 +1,219 @@
+import cProfile
+import functools
+import io
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.config import PERFIL_MUESTREO
+
+# --- INSTRUMENTACIÓN DE LOS CALLBACKS ---
+# ¿En qué se va el tiempo de una página lenta? En cada petición de un
+# callback (POST /_dash-update-component) se anotan las etapas:
+#   resolver        integraciones, barridos y cuadraturas (ganchos medir() en
+#                   utils/simulacion.py, utils/barrido.py, utils/metricas.py
+#                   y utils/expresiones.py)
+#   figura          el resto del callback: figuras, Patch, textos
+#   serializacion   lo que hace Dash después del callback (sobre todo el JSON)
+#   total           la petición completa (incluye la espera de coalescencia)
+# más las evaluaciones del lado derecho y los bytes de la respuesta. Van en
+# la cabecera Server-Timing (pestaña Red del navegador) y se acumulan por
+# callback en MEDIDOR, que utils/servidor.py publica en /metrics.
+#
+# @instrumentar va debajo de @callback. Fuera de una petición (scripts,
+# utils/banco.py, trabajos en segundo plano) la función se llama tal cual.
+# Con SIM_EJECUTOR=procesos, "resolver" es lo que se esperó al worker y las
+# evaluaciones hechas allá no se cuentan.
+#
+# cProfile por muestreo: con PERFIL_MUESTREO=0.05 se perfila el 5 % de las
+# llamadas instrumentadas y se acumula en PERFILADOR. Se cambia en caliente
+# con /perfil (ver utils/servidor.py).
+
+RUTA_CALLBACKS = '/_dash-update-component'
+
+# Límites (segundos) del histograma de duración por callback
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_actual = threading.local()
+
+
+def _registro():
+    return getattr(_actual, 'registro', None)
+
+
+def iniciar_peticion():
+    _actual.registro = {'inicio': time.perf_counter(), 'callback': None,
+                        'etapas': {}, 'abiertas': set(), 'evaluaciones': 0}
+
+
+def terminar_peticion():
+    # Devuelve el registro de la petición (o None) y lo saca del hilo
+    registro = _registro()
+    _actual.registro = None
+    if registro is not None:
+        registro['etapas']['total'] = time.perf_counter() - registro['inicio']
+    return registro
+
+
+@contextmanager
+def medir(etapa='resolver'):
+    # Suma el tiempo del bloque a `etapa` de la petición en curso. Sirve
+    # también como decorador (@medir()). Si hay otro medir de la misma
+    # etapa más afuera, solo cuenta el de afuera.
+    registro = _registro()
+    if registro is None or etapa in registro['abiertas']:
+        yield
+        return
+    registro['abiertas'].add(etapa)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro['abiertas'].discard(etapa)
+        registro['etapas'][etapa] = registro['etapas'].get(etapa, 0.0) + time.perf_counter() - inicio
+
+
+def contar_evaluaciones(n):
+    # Evaluaciones del lado derecho (en los barridos, por escenario)
+    registro = _registro()
+    if registro is not None:
+        registro['evaluaciones'] += int(n)
+
+
+class Perfilador:
+    def __init__(self, muestreo=0.0):
+        self.muestreo = muestreo
+        self._lock = threading.Lock()
+        self._stats = None
+        self.perfiladas = 0
+
+    def toca(self):
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+    def correr(self, func, *args, **kwargs):
+        perfil = cProfile.Profile()
+        try:
+            return perfil.runcall(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(perfil)
+                else:
+                    self._stats.add(perfil)
+                self.perfiladas += 1
+
+    def reporte(self, n=30, orden='cumulative'):
+        # Las n funciones más caras de todo lo perfilado, como texto
+        with self._lock:
+            if self._stats is None:
+                return "Sin llamadas perfiladas (muestreo = 0?)\n"
+            salida = io.StringIO()
+            self._stats.stream = salida
+            self._stats.sort_stats(orden).print_stats(n)
+        return f"{self.perfiladas} llamadas perfiladas\n" + salida.getvalue()
+
+    def limpiar(self):
+        with self._lock:
+            self._stats = None
+            self.perfiladas = 0
+
+
+PERFILADOR = Perfilador(PERFIL_MUESTREO)
+
+
+def instrumentar(func=None, nombre=None):
+    # @instrumentar o instrumentar(func, nombre=...) debajo de @callback
+    if func is None:
+        return functools.partial(instrumentar, nombre=nombre)
+    nombre = nombre or func.__name__
+
+    @functools.wraps(func)
+    def instrumentada(*args, **kwargs):
+        registro = _registro()
+        if registro is None:
+            return func(*args, **kwargs)
+        registro['callback'] = nombre
+        inicio = time.perf_counter()
+        try:
+            if PERFILADOR.toca():
+                return PERFILADOR.correr(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            registro['etapas']['callback'] = time.perf_counter() - inicio
+
+    return instrumentada
+
+
+def etapas(registro):
+    # {etapa: segundos} de una petición terminada, derivando figura y serialización
+    medidas = registro['etapas']
+    callback = medidas.get('callback', 0.0)
+    resolver = medidas.get('resolver', 0.0)
+    return {
+        'resolver': resolver,
+        'figura': max(callback - resolver, 0.0),
+        'serializacion': max(medidas['total'] - callback, 0.0),
+        'total': medidas['total'],
+    }
+
+
+def server_timing(duraciones):
+    # Cabecera Server-Timing (milisegundos)
+    return ', '.join(f'{etapa};dur={segundos * 1000:.1f}' for etapa, segundos in duraciones.items())
+
+
+class Medidor:
+    # Acumulados por callback para /metrics (contadores de Prometheus)
+    def __init__(self, limites=LIMITES):
+        self.limites = limites
+        self._lock = threading.Lock()
+        self._callbacks = {}
+
+    def anotar(self, nombre, duraciones, evaluaciones, bytes_respuesta):
+        with self._lock:
+            c = self._callbacks.setdefault(nombre, {
+                'peticiones': 0, 'etapas': dict.fromkeys(duraciones, 0.0),
+                'cubetas': [0] * len(self.limites), 'evaluaciones': 0, 'bytes': 0})
+            c['peticiones'] += 1
+            for etapa, segundos in duraciones.items():
+                c['etapas'][etapa] = c['etapas'].get(etapa, 0.0) + segundos
+            for i, limite in enumerate(self.limites):
+                if duraciones['total'] <= limite:
+                    c['cubetas'][i] += 1
+            c['evaluaciones'] += evaluaciones
+            c['bytes'] += bytes_respuesta
+
+    def prometheus(self):
+        # Líneas en formato de texto de Prometheus
+        with self._lock:
+            callbacks = {n: {**c, 'etapas': dict(c['etapas']), 'cubetas': list(c['cubetas'])}
+                         for n, c in self._callbacks.items()}
+        lineas = ['# HELP lab_callback_segundos Duración de las peticiones de cada callback',
+                  '# TYPE lab_callback_segundos histogram']
+        for nombre, c in callbacks.items():
+            for limite, cuenta in zip(self.limites, c['cubetas']):
+                lineas.append(f'lab_callback_segundos_bucket{{callback="{nombre}",le="{limite}"}} {cuenta}')
+            lineas.append(f'lab_callback_segundos_bucket{{callback="{nombre}",le="+Inf"}} {c["peticiones"]}')
+            lineas.append(f'lab_callback_segundos_sum{{callback="{nombre}"}} {c["etapas"]["total"]:.6f}')
+            lineas.append(f'lab_callback_segundos_count{{callback="{nombre}"}} {c["peticiones"]}')
+        lineas += ['# HELP lab_etapa_segundos_total Segundos acumulados por etapa de cada callback',
+                   '# TYPE lab_etapa_segundos_total counter']
+        for nombre, c in callbacks.items():
+            for etapa, segundos in c['etapas'].items():
+                lineas.append(f'lab_etapa_segundos_total{{callback="{nombre}",etapa="{etapa}"}} {segundos:.6f}')
+        lineas += ['# HELP lab_rhs_evaluaciones_total Evaluaciones del lado derecho de las EDO',
+                   '# TYPE lab_rhs_evaluaciones_total counter']
+        lineas += [f'lab_rhs_evaluaciones_total{{callback="{n}"}} {c["evaluaciones"]}' for n, c in callbacks.items()]
+        lineas += ['# HELP lab_respuesta_bytes_total Bytes de las respuestas (JSON de las figuras)',
+                   '# TYPE lab_respuesta_bytes_total counter']
+        lineas += [f'lab_respuesta_bytes_total{{callback="{n}"}} {c["bytes"]}' for n, c in callbacks.items()]
+        return lineas
+
+    def limpiar(self):
+        with self._lock:
+            self._callbacks = {}
+
+
+MEDIDOR = Medidor()
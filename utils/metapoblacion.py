@@ -0,0 +1,156 @@
+import numpy as np
+
+from utils.cache import CACHE, clave_simulacion
+from utils.instrumentacion import contar_evaluaciones, medir
+
+# --- SIR METAPOBLACIONAL ---
+# Muchos parches (ciudades) con su propio S, I, R, acoplados por la movilidad:
+# los residentes de i pasan una fracción C_ij de su tiempo en j y se contagian
+# con la prevalencia de allá. La fuerza de infección de i es
+#   lambda_i = beta * sum_j C_ij I_j / N_j
+# y en cada parche dS = -lambda S, dI = lambda S - gamma I, dR = gamma I. Las
+# poblaciones N_i no cambian (la gente viaja pero vuelve a casa).
+#
+# C = (1 - movilidad) Id + movilidad * (W normalizada por filas), con W la
+# matriz de gravedad P_i P_j / d_ij^exponente restringida a los `vecinos`
+# parches más cercanos de cada uno (cKDTree sobre la esfera). Así C es
+# dispersa, con O(m * vecinos) entradas: nunca se arma una matriz m x m densa.
+#
+# Se integran 2 m ecuaciones (S e I de cada parche) sin matrices densas: con
+# RK45, o con BDF y el jacobiano analítico disperso si el sistema es rígido
+# (ver metodo_integracion). Escala a miles de parches.
+# SciPy se importa dentro de las funciones (ver utils/perfil_arranque.py).
+
+RADIO_TIERRA_KM = 6371.0
+# Vecinos de cada parche en la matriz de movilidad
+VECINOS = 8
+# Distancia que se suma a d_ij para que dos parches casi en el mismo punto no
+# tengan peso infinito
+ESCALA_KM = 100.0
+EXPONENTE = 2.0
+# Un parche "recibe" la epidemia cuando I/N pasa de este umbral
+UMBRAL_LLEGADA = 1e-4
+
+RTOL = 1e-6
+# Tolerancia absoluta en personas
+ATOL = 1e-3
+# (beta + gamma) * t_max a partir del cual se integra con BDF
+RIGIDEZ = 1e4
+
+
+def _unitarios(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def movilidad_gravedad(lat, lon, poblacion, vecinos=VECINOS, exponente=EXPONENTE, escala_km=ESCALA_KM):
+    # Matriz CSR simétrica de pesos P_i P_j / (escala + d_ij)^exponente entre
+    # cada parche y sus vecinos más cercanos (distancia por la superficie)
+    from scipy.sparse import csr_matrix
+    from scipy.spatial import cKDTree
+
+    poblacion = np.asarray(poblacion, dtype=float)
+    m = poblacion.size
+    k = min(int(vecinos), m - 1)
+    if k < 1:
+        return csr_matrix((m, m))
+    xyz = _unitarios(lat, lon)
+    cuerda, j = cKDTree(xyz).query(xyz, k=k + 1)
+    # La primera columna es el propio parche
+    cuerda, j = cuerda[:, 1:], j[:, 1:]
+    d = 2 * RADIO_TIERRA_KM * np.arcsin(np.minimum(cuerda / 2, 1.0))
+    i = np.repeat(np.arange(m), k).reshape(m, k)
+    w = poblacion[i] * poblacion[j] / (escala_km + d) ** exponente
+    W = csr_matrix((w.ravel(), (i.ravel(), j.ravel())), shape=(m, m))
+    # Si j es vecino de i pero no al revés, el viaje igual existe en ambos sentidos
+    return W.maximum(W.T).tocsr()
+
+
+def acoplamiento(W, movilidad):
+    # C = (1 - movilidad) Id + movilidad * D^-1 W: cada fila suma 1
+    from scipy.sparse import diags
+
+    filas = np.asarray(W.sum(axis=1)).ravel()
+    # Un parche sin vecinos se queda en casa
+    inv = np.divide(1.0, filas, out=np.zeros_like(filas), where=filas > 0)
+    quedarse = 1.0 - movilidad * (filas > 0)
+    return (diags(quedarse) + movilidad * diags(inv) @ W).tocsr()
+
+
+def lado_derecho(t, y, beta, gamma, C, inv_N):
+    # y = [S, I]: R = N - S - I no influye en nada y no se integra
+    S, I = y.reshape(2, -1)
+    contagios = beta * (C @ (I * inv_N)) * S
+    return np.concatenate([-contagios, contagios - gamma * I])
+
+
+def jacobiano(t, y, beta, gamma, C, inv_N):
+    # Bloques 2 x 2 de m x m: dS/dI y dI/dI tienen el patrón de C, el resto
+    # son diagonales
+    from scipy.sparse import bmat, diags
+
+    S, I = y.reshape(2, -1)
+    fuerza = beta * (C @ (I * inv_N))
+    acople = beta * diags(S) @ C @ diags(inv_N)
+    return bmat([
+        [diags(-fuerza), -acople],
+        [diags(fuerza), acople - diags(np.full(S.size, gamma))],
+    ], format='csc')
+
+
+def metodo_integracion(beta, gamma, t_max):
+    # Las tasas del sistema son del orden de beta y gamma (la movilidad solo
+    # reparte), así que casi siempre NO es rígido: RK45 con 2 m ecuaciones
+    # solo hace productos con C dispersa (5000 parches, un año: 0.3 s contra
+    # 7 s de BDF, que factoriza con splu). Con tasas muy rápidas para el
+    # horizonte, los pasos explícitos se vuelven diminutos y conviene BDF con
+    # el jacobiano disperso.
+    return 'BDF' if (abs(beta) + abs(gamma)) * t_max > RIGIDEZ else 'RK45'
+
+
+def _integrar(y0, malla, beta, gamma, C, inv_N):
+    from scipy.integrate import solve_ivp
+
+    metodo = metodo_integracion(beta, gamma, malla[-1])
+    extra = {'jac': jacobiano} if metodo == 'BDF' else {}
+    sol = solve_ivp(lado_derecho, (malla[0], malla[-1]), y0, method=metodo, t_eval=malla,
+                    args=(beta, gamma, C, inv_N), rtol=RTOL, atol=ATOL, **extra)
+    contar_evaluaciones(sol.nfev)
+    Y = np.full((malla.size, y0.size), np.nan)
+    Y[:sol.y.shape[1]] = sol.y.T
+    return Y.reshape(malla.size, 2, -1)
+
+
+@medir('resolver')
+def simular_metapoblacion(lat, lon, poblacion, origen, I0, beta, gamma, movilidad, t_max,
+                          n_cuadros=61, vecinos=VECINOS, usar_cache=True):
+    # Epidemia que arranca con I0 infectados en el parche `origen`. Devuelve
+    # {'t', 'S', 'I', 'R' (n_cuadros, m), 'llegada' (día en que I/N pasa de
+    # UMBRAL_LLEGADA, inf si nunca)}
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    poblacion = np.asarray(poblacion, dtype=float)
+    if not t_max > 0 or np.any(poblacion <= 0) or not 0 <= movilidad <= 1:
+        raise ValueError("Se necesita t_max > 0, poblaciones positivas y 0 <= movilidad <= 1")
+    m = poblacion.size
+    I = np.zeros(m)
+    I[origen] = min(float(I0), poblacion[origen])
+    y0 = np.concatenate([poblacion - I, I])
+    malla = np.linspace(0.0, float(t_max), int(n_cuadros))
+
+    def calcular():
+        C = acoplamiento(movilidad_gravedad(lat, lon, poblacion, vecinos), movilidad)
+        return _integrar(y0, malla, float(beta), float(gamma), C, 1.0 / poblacion)
+
+    if usar_cache:
+        args = np.concatenate([[beta, gamma, movilidad, vecinos], lat, lon])
+        Y = CACHE.obtener_o_calcular(clave_simulacion('metapoblacion', y0, malla, args, RTOL, ATOL), calcular)
+    else:
+        Y = calcular()
+
+    S, I = Y[:, 0], Y[:, 1]
+    R = poblacion - S - I
+    llegada = np.full(m, np.inf)
+    paso = np.nan_to_num(I / poblacion) >= UMBRAL_LLEGADA
+    alcanzados = paso.any(axis=0)
+    llegada[alcanzados] = malla[paso.argmax(axis=0)[alcanzados]]
+    return {'t': malla, 'S': S, 'I': I, 'R': R, 'llegada': llegada}
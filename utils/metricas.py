@@ -0,0 +1,125 @@
+import numpy as np
+
+from utils.instrumentacion import medir
+
+# --- MÉTRICAS DEL MODELO SIR (acción de masas: dS/dt = -bSI, dI/dt = bSI - kI) ---
+# Antes el pico salía de np.argmax(I) sobre un linspace de 200 puntos y el
+# tamaño final de S[-1] en un t_max cualquiera. Aquí todo es exacto:
+#   * R0, umbral de inmunidad, pico y tamaño final: fórmulas cerradas.
+#   * Día del pico: cuadratura de dt = -dS / (b S I(S)), con I(S) de la
+#     cantidad conservada (sin integrar la EDO).
+# Todas aceptan escalares o arreglos de parámetros (broadcast de NumPy).
+# Sin infectados iniciales (I0 <= 0) no hay epidemia: S, I y R quedan fijos.
+# SciPy se importa al primer uso, igual que en utils/simulacion.py.
+
+
+def r0(b, k, S0):
+    # Número reproductivo básico R0 = b * S0 / k
+    b, k, S0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (b, k, S0)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(k > 0, b * S0 / k, np.inf)[()]
+
+
+def umbral_inmunidad(R0):
+    # Fracción que debe ser inmune para que no haya brote: 1 - 1/R0
+    R0 = np.asarray(R0, dtype=float)
+    with np.errstate(divide='ignore'):
+        return np.clip(1 - 1 / R0, 0.0, 1.0)[()]
+
+
+def susceptibles_finales(b, k, S0, I0):
+    # S(inf) exacto. De dS/dR = -(b/k) S y de que al final I = 0 sale
+    #   S_inf = S0 * exp(-(b/k) * (S0 + I0 - S_inf))
+    # cuya solución es S_inf = -W0(-q S0 e^{-q (S0 + I0)}) / q,  con q = b/k
+    from scipy.special import lambertw
+
+    b, k, S0, I0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (b, k, S0, I0)))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        q = b / k
+        z = -q * S0 * np.exp(-q * (S0 + I0))
+        # Por redondeo z puede quedar apenas por debajo de -1/e (donde W0 no es real)
+        z = np.maximum(z, -np.exp(-1.0))
+        s_inf = -np.real(lambertw(z, 0)) / q
+    s_inf = np.where(k > 0, s_inf, 0.0)   # sin recuperación todos se contagian
+    s_inf = np.where((b > 0) & (I0 > 0), s_inf, S0)   # sin contagio nadie se contagia
+    return np.clip(s_inf, 0.0, S0)[()]
+
+
+def tamano_final(b, k, S0, I0):
+    # Cuántos susceptibles se contagian en toda la epidemia: S0 - S(inf)
+    return (np.asarray(S0, dtype=float) - susceptibles_finales(b, k, S0, I0))[()]
+
+
+def pico_infectados(b, k, S0, I0):
+    # Altura del pico: I + S - (k/b) ln S se conserva, y el pico está en S = k/b
+    #   I_max = I0 + S0 - (k/b) * (1 + ln(b S0 / k))     si b S0 > k
+    # Si b S0 <= k la epidemia nunca crece y el máximo es el inicial.
+    b, k, S0, I0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (b, k, S0, I0)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        umbral = k / b
+        i_max = I0 + S0 - umbral * (1 + np.log(S0 / umbral))
+    crece = (b > 0) & (b * S0 > k) & (I0 > 0)
+    # k = 0: el pico es toda la población (se alcanza cuando S -> 0)
+    i_max = np.where(k > 0, i_max, I0 + S0)
+    return np.where(crece, i_max, I0)[()]
+
+
+# Nodos de Gauss-Legendre para el día del pico (ver dia_pico)
+NODOS_PICO = 48
+
+
+@medir('resolver')
+def dia_pico(b, k, S0, I0, R0=0.0, t_limite=np.inf):
+    # Día exacto del pico. Mientras I > 0, dt = -dS / (b S I(S)) con
+    #   I(S) = I0 + (S0 - S) + (k/b) ln(S / S0)    (cantidad conservada)
+    # y el pico está en S = k/b. El integrando es casi singular en los dos
+    # extremos (I0 chico al inicio, S chico si b S0 >> k), así que se
+    # integra en w = ln((S0 - S + c) / S), c = I0 / (1 - k / (b S0)), donde
+    # es suave, con una sola cuadratura para todos los escenarios a la vez.
+    # Sin brote (I0 <= 0 o b S0 <= k) el pico es el valor inicial, en el
+    # día 0; con k = 0 I crece hacia N sin pico finito y se devuelve inf
+    # (igual si el pico llega después de t_limite). R0 no interviene.
+    b, k, S0, I0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (b, k, S0, I0)))
+    brote = (b > 0) & (b * S0 > k) & (I0 > 0)
+    crece_siempre = brote & ~(k > 0)
+    ok = brote & (k > 0)
+    b_, k_, S0_, I0_ = (v[ok] for v in (b, k, S0, I0))
+
+    x_g, w_g = np.polynomial.legendre.leggauss(NODOS_PICO)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        umbral = k_ / b_
+        c = I0_ / (1 - umbral / S0_)
+        w0, w1 = np.log(c / S0_), np.log((S0_ - umbral + c) / umbral)
+        w = w0 + (x_g[:, None] + 1) / 2 * (w1 - w0)
+        e = np.exp(w)
+        x = (e * S0_ - c) / (1 + e)            # S0 - S
+        S = S0_ - x
+        I = I0_ + x + umbral * np.log1p(-x / S0_)
+        dias = w_g @ ((x + c) / (b_ * I * (S + x + c))) * (w1 - w0) / 2
+
+    dia = np.zeros(b.shape)
+    dia[ok] = dias
+    dia[crece_siempre] = np.inf
+    return np.where(dia > t_limite, np.inf, dia)[()]
+
+
+def formato_dia(dia, decimales=1):
+    # Para los textos de las páginas: "día 9.2", o "sin pico" si es inf
+    # (k = 0: I crece hacia N sin pico finito)
+    if not np.isfinite(dia):
+        return "sin pico (crece hasta el final)"
+    return f"día {dia:.{decimales}f}"
+
+
+def metricas_sir(b, k, S0, I0, R0=0.0):
+    # Todos los KPIs de las páginas de casos en un solo dict
+    R0_val = r0(b, k, S0)
+    s_inf = susceptibles_finales(b, k, S0, I0)
+    return {
+        'R0': R0_val,
+        'umbral_inmunidad': umbral_inmunidad(R0_val),
+        'pico': pico_infectados(b, k, S0, I0),
+        'dia_pico': dia_pico(b, k, S0, I0, R0),
+        'susceptibles_finales': s_inf,
+        'tamano_final': (np.asarray(S0, dtype=float) - s_inf)[()],
+    }
@@ -0,0 +1,150 @@
+import numpy as np
+
+# --- REGISTRO DE MODELOS ---
+# Cada página tenía su propia copia de las ecuaciones (sistema_sir,
+# sistema_rumor, ecuaciones_SEIR, modelo_allee, ...). Aquí se declaran una
+# sola vez: nombre, variables de estado, parámetros, lado derecho y jacobiano.
+#
+# Convención: rhs(t, y, *parametros) y jac(t, y, *parametros), con los
+# parámetros en el orden declarado. El lado derecho solo usa y[0], y[1], ...
+# así que también acepta estados apilados de forma (n_estados, m).
+# dpar(t, y, *parametros) es la derivada del lado derecho respecto de los
+# parámetros, (n_estados, n_parametros): la usan el ajuste a datos
+# (sensibilidades, utils/ajuste.py) y la continuación de equilibrios.
+
+MODELOS = {}
+
+
+class Modelo:
+    def __init__(self, nombre, estados, parametros, rhs, jac=None, dpar=None):
+        self.nombre = nombre
+        self.estados = tuple(estados)
+        self.parametros = tuple(parametros)
+        self.rhs = rhs
+        self.jac = jac
+        self.dpar = dpar
+
+    def argumentos(self, parametros):
+        # dict {nombre: valor} -> tupla en el orden que esperan rhs/jac
+        if isinstance(parametros, dict):
+            faltan = [p for p in self.parametros if p not in parametros]
+            if faltan:
+                raise ValueError(f"Faltan parámetros para '{self.nombre}': {', '.join(faltan)}")
+            return tuple(float(parametros[p]) for p in self.parametros)
+        return tuple(float(p) for p in parametros)
+
+    def __repr__(self):
+        return f"Modelo({self.nombre!r}, estados={self.estados}, parametros={self.parametros})"
+
+
+def registrar(nombre, estados, parametros, rhs, jac=None, dpar=None):
+    modelo = Modelo(nombre, estados, parametros, rhs, jac, dpar)
+    MODELOS[nombre] = modelo
+    return modelo
+
+
+def obtener_modelo(nombre):
+    if isinstance(nombre, Modelo):
+        return nombre
+    try:
+        return MODELOS[nombre]
+    except KeyError:
+        raise ValueError(f"Modelo desconocido: {nombre!r}") from None
+
+
+# --- SIR (acción de masas) ---
+# dS/dt = -bSI,  dI/dt = bSI - kI,  dR/dt = kI
+# Sirve para la epidemia, el rumor y la política. El SIR de pagina6 usa
+# beta*S*I/N, que es el mismo modelo con b = beta/N.
+def sir_rhs(t, y, b, k):
+    S, I = y[0], y[1]
+    contagios = b * S * I
+    return np.array([-contagios, contagios - k * I, k * I])
+
+
+def sir_jac(t, y, b, k):
+    S, I = y[0], y[1]
+    return np.array([
+        [-b * I, -b * S, 0.0],
+        [b * I, b * S - k, 0.0],
+        [0.0, k, 0.0],
+    ])
+
+
+def sir_dpar(t, y, b, k):
+    S, I = y[0], y[1]
+    return np.array([
+        [-S * I, 0.0],
+        [S * I, -I],
+        [0.0, I],
+    ])
+
+
+# --- SEIR (acción de masas, b = beta/N) ---
+def seir_rhs(t, y, b, sigma, gamma):
+    S, E, I = y[0], y[1], y[2]
+    contagios = b * S * I
+    return np.array([-contagios, contagios - sigma * E, sigma * E - gamma * I, gamma * I])
+
+
+def seir_jac(t, y, b, sigma, gamma):
+    S, I = y[0], y[2]
+    return np.array([
+        [-b * I, 0.0, -b * S, 0.0],
+        [b * I, -sigma, b * S, 0.0],
+        [0.0, sigma, -gamma, 0.0],
+        [0.0, 0.0, gamma, 0.0],
+    ])
+
+
+def seir_dpar(t, y, b, sigma, gamma):
+    S, E, I = y[0], y[1], y[2]
+    return np.array([
+        [-S * I, 0.0, 0.0],
+        [S * I, -E, 0.0],
+        [0.0, E, -I],
+        [0.0, 0.0, I],
+    ])
+
+
+# --- EFECTO ALLEE ---
+# dP/dt = r * P * (1 - P/K) * (P/A - 1)
+def allee_rhs(t, y, r, K, A):
+    P = y[0]
+    return np.array([r * P * (1 - P / K) * (P / A - 1)])
+
+
+def allee_jac(t, y, r, K, A):
+    P = y[0]
+    dfdP = r * ((1 - P / K) * (P / A - 1) - (P / K) * (P / A - 1) + (1 - P / K) * (P / A))
+    return np.array([[dfdP]])
+
+
+def allee_dpar(t, y, r, K, A):
+    P = y[0]
+    return np.array([[P * (1 - P / K) * (P / A - 1),
+                      r * P * (P / K ** 2) * (P / A - 1),
+                      -r * P * (1 - P / K) * P / A ** 2]])
+
+
+# --- LOGÍSTICO CON COSECHA ---
+# dP/dt = r * P * (1 - P/K) - h
+def cosecha_rhs(t, y, r, K, h):
+    P = y[0]
+    return np.array([r * P * (1 - P / K) - h])
+
+
+def cosecha_jac(t, y, r, K, h):
+    P = y[0]
+    return np.array([[r * (1 - 2 * P / K)]])
+
+
+def cosecha_dpar(t, y, r, K, h):
+    P = y[0]
+    return np.array([[P * (1 - P / K), r * P ** 2 / K ** 2, -1.0]])
+
+
+registrar('sir', ('S', 'I', 'R'), ('b', 'k'), sir_rhs, sir_jac, sir_dpar)
+registrar('seir', ('S', 'E', 'I', 'R'), ('b', 'sigma', 'gamma'), seir_rhs, seir_jac, seir_dpar)
+registrar('allee', ('P',), ('r', 'K', 'A'), allee_rhs, allee_jac, allee_dpar)
+registrar('cosecha', ('P',), ('r', 'K', 'h'), cosecha_rhs, cosecha_jac, cosecha_dpar)
@@ -0,0 +1,100 @@
+import plotly.graph_objs as go
+from dash import html, dcc, no_update
+
+from utils.config import LIMITE_DIAS
+from utils.figuras import parche_series, parche_vacio
+from utils.redes import MAX_ENLACES, MAX_NODOS, TIPOS, contagio_en_red, generar_red
+from utils.simulacion import simular_trayectoria
+
+# --- MODO RED DE LOS CASOS RUMOR Y POLÍTICA ---
+# El mismo SIR de la página, pero sobre un grafo de contactos (utils/redes.py)
+# de `nodos` personas en vez de mezcla homogénea entre N. Se grafica en
+# fracciones de la población, al lado de la curva de campo medio (las EDO con
+# b N como tasa por unidad de tiempo), que es a lo que tiende la red cuando
+# el grado medio crece.
+#
+# Cada página pone controles_red(prefijo, ...) en su layout y registra un
+# callback propio que llama a comparar_red con sus parámetros.
+
+NODOS = 100000
+GRADO = 10
+
+
+def figura_red_base(nombres, colores):
+    # Trazas 0-2: S, I, R en la red; 3-5: las mismas en campo medio (punteadas)
+    fig = go.Figure()
+    for nombre, color in zip(nombres, colores):
+        fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name=f'{nombre} red', line=dict(color=color, width=3)))
+    for nombre, color in zip(nombres, colores):
+        fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name=f'{nombre} campo medio',
+                                 line=dict(color=color, dash='dash')))
+    fig.update_layout(
+        title=dict(text="Red de contactos vs. campo medio", x=0.5, xanchor='center'),
+        xaxis_title="Días",
+        yaxis_title="Fracción de la población",
+        yaxis=dict(range=[0, 1]),
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=10, r=10, t=50, b=100),
+        legend=dict(orientation="h", yanchor="top", y=-0.2, xanchor="center", x=0.5)
+    )
+    return fig.to_dict()
+
+
+def controles_red(prefijo, nombres, colores):
+    # Tipo de red, tamaño y grado medio, botón, mensaje y gráfica
+    return html.Div([
+        html.H5("Modo red: contagio sobre un grafo de contactos"),
+        html.P("El modelo de arriba supone que todos se cruzan con todos. Aquí cada persona solo "
+               "contagia a sus vecinos en una red generada al azar.", style={'fontSize': '13px', 'color': 'gray'}),
+        html.Div([
+            html.Div([
+                html.Label("Tipo de red:"),
+                dcc.Dropdown(id=f'{prefijo}-red-tipo', value='er', clearable=False,
+                             options=[{'label': v, 'value': k} for k, v in TIPOS.items()]),
+            ], style={'flex': 2}),
+            html.Div([
+                html.Label("Nodos:"),
+                dcc.Input(id=f'{prefijo}-red-nodos', type='number', value=NODOS, min=2, max=MAX_NODOS,
+                          className='input-field'),
+            ], style={'flex': 1}),
+            html.Div([
+                html.Label("Grado medio:"),
+                dcc.Input(id=f'{prefijo}-red-grado', type='number', value=GRADO, min=1, step=1,
+                          className='input-field'),
+            ], style={'flex': 1}),
+        ], style={'display': 'flex', 'gap': '10px', 'alignItems': 'flex-end'}),
+        html.Button("Simular en la red", id=f'{prefijo}-red-btn', className='btn-generar'),
+        html.Div(id=f'{prefijo}-red-mensaje', style={'fontSize': '13px', 'marginTop': '8px'}),
+        dcc.Graph(id=f'{prefijo}-red-grafica', figure=figura_red_base(nombres, colores), style={'height': '350px'}),
+    ], style={'marginTop': '15px', 'padding': '15px', 'borderLeft': '4px solid #64748b', 'backgroundColor': '#f8fafc'})
+
+
+def comparar_red(tipo, nodos, grado, N, b, k, I0, R0, t_max, nombre_I='propagadores'):
+    # (Patch de la gráfica, mensaje). I0 y R0 se pasan a fracciones de N, así
+    # que la red puede ser mucho más grande que la población del caso.
+    if None in (tipo, nodos, grado, N, b, k, I0, R0, t_max):
+        return no_update, "Completa todos los parámetros."
+    nodos, grado = int(nodos), int(grado)
+    N, b, k = float(N), float(b), float(k)
+    I0, R0, t_max = float(I0), float(R0), float(t_max)
+    if not 0 < t_max <= LIMITE_DIAS:
+        return no_update, f"Los días a simular deben ser mayores que 0 y como máximo {LIMITE_DIAS:.0f}."
+    if not 2 <= nodos <= MAX_NODOS or not 1 <= grado < nodos or nodos * grado > MAX_ENLACES:
+        return parche_vacio(6), (f"Se necesita 2 <= nodos <= {MAX_NODOS}, 1 <= grado medio < nodos "
+                                 f"y nodos x grado <= {MAX_ENLACES:.0e}.")
+    if N <= 0 or b < 0 or k < 0 or I0 <= 0 or R0 < 0 or I0 + R0 > N:
+        return parche_vacio(6), "Se necesita N > 0, tasas no negativas, I0 > 0 e I0 + R0 <= N."
+
+    indptr, indices = generar_red(tipo, nodos, grado)
+    r = contagio_en_red(indptr, indices, b * N, k, I0 / N, R0 / N, t_max)
+    t, sol = simular_trayectoria('sir', [1 - (I0 + R0) / N, I0 / N, R0 / N], t_max, {'b': b * N, 'k': k})
+
+    fig = parche_series(r['t'], r['S'], r['I'], r['R'])
+    parche_series(t, *sol.T, parche=fig, desde=3)
+    mensaje = (f"{TIPOS[tipo]} con {nodos} nodos y grado medio {r['grado_medio']:.1f}: "
+               f"pico de {nombre_I} {100 * r['I'].max():.1f} % el día {r['t'][r['I'].argmax()]:.1f} "
+               f"(campo medio: {100 * sol[:, 1].max():.1f} % el día {t[sol[:, 1].argmax()]:.1f}); "
+               f"alcanzó al {100 * (1 - r['S'][-1] / r['S'][0]):.1f} % de los susceptibles "
+               f"(campo medio: {100 * (1 - sol[-1, 0] / sol[0, 0]):.1f} %).")
+    return fig, mensaje
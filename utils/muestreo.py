@@ -0,0 +1,58 @@
+import numpy as np
+
+# --- REDUCCIÓN DE PUNTOS PARA GRAFICAR (LTTB) ---
+# "Largest-Triangle-Three-Buckets": divide la serie en n-2 cubetas y en cada
+# una se queda con el punto que forma el triángulo más grande con el punto
+# elegido antes y el promedio de la cubeta siguiente. Así se conservan los
+# picos y los quiebres de la curva con un número fijo de puntos.
+
+# Presupuesto de puntos por figura: el mismo que la malla fija más chica que
+# usaban las páginas (200), así ninguna respuesta crece respecto a antes
+PUNTOS_POR_GRAFICA = 200
+
+
+def lttb_indices(x, y, n):
+    # y puede ser una serie o varias columnas (len(x), k) que comparten x: el
+    # área de cada candidato es la suma de sus áreas en todas las columnas,
+    # cada una escalada por su rango para que ninguna domine por magnitud.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float).reshape(len(x), -1)
+    total = len(x)
+    if n >= total or n < 3:
+        return np.arange(total)
+
+    with np.errstate(invalid='ignore'):
+        rango = np.nanmax(y, axis=0) - np.nanmin(y, axis=0)
+    y = y / np.where(rango > 0, rango, 1.0)
+
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, total - 1
+    bordes = (np.arange(n - 1) * (total - 2) / (n - 2)).astype(int) + 1
+    bordes[-1] = total - 1
+
+    a = 0
+    for i in range(n - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Promedio de la cubeta siguiente (la última es solo el punto final)
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else total
+        sig_inicio = fin if fin < sig_fin else total - 1
+        prom_x = x[sig_inicio:sig_fin].mean()
+        prom_y = y[sig_inicio:sig_fin].mean(axis=0)
+
+        area = np.abs((x[a] - prom_x) * (y[inicio:fin] - y[a])
+                      - (x[a] - x[inicio:fin])[:, None] * (prom_y - y[a])).sum(axis=1)
+        a = inicio + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[i + 1] = a
+    return indices
+
+
+def reducir(t, Y, n=PUNTOS_POR_GRAFICA):
+    # Reduce una o varias series que comparten el eje t (Y de forma (len(t), k))
+    # a exactamente n puntos elegidos en conjunto, así todas siguen compartiendo
+    # el mismo t y el presupuesto no se reparte (ni se pierde) entre series.
+    t = np.asarray(t)
+    Y = np.asarray(Y)
+    if len(t) <= n:
+        return t, Y
+    elegidos = lttb_indices(t, Y.reshape(len(t), -1), n)
+    return t[elegidos], Y[elegidos]
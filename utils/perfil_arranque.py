@@ -0,0 +1,102 @@
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import time
+
+# --- PERFIL DE ARRANQUE ---
+# Cuánto tarda en importarse la app y quién tiene la culpa:
+#   python -m utils.perfil_arranque [n]
+#
+# 1. Paquetes: en un proceso limpio se corre `python -X importtime -c "import app"`
+#    y se listan los n paquetes con más tiempo acumulado (los de utils/ y
+#    pages/ módulo por módulo).
+# 2. Páginas: Dash ejecuta cada archivo de pages/ con exec_module, así que no
+#    aparecen en -X importtime. Aquí se cronometra cada uno al importar app;
+#    el tiempo incluye las bibliotecas que esa página fue la primera en pedir.
+#
+# Regla de la casa: nada pesado (SciPy, pandas...) a nivel de módulo si el
+# layout no lo necesita; se importa dentro de la función que lo usa.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Paquetes propios: se reportan por módulo (utils.simulacion), no en bloque
+LOCALES = ('utils', 'pages')
+
+_FILA = re.compile(r'import time:\s+(?P<propio>\d+) \|\s+(?P<acumulado>\d+) \|(?P<sangria>\s*)(?P<modulo>\S+)')
+
+
+def _entorno():
+    # Sin precarga del clima: el perfil no debe depender de la red
+    return dict(os.environ, CLIMA_PRECARGA='0', PYTHONPATH=RAIZ)
+
+
+def perfil_paquetes(n=15):
+    # [(paquete, segundos acumulados)] de los n más caros, y el total
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=RAIZ, env=_entorno(), capture_output=True, text=True)
+    filas = []
+    for linea in salida.stderr.splitlines():
+        m = _FILA.match(linea)
+        if m:
+            filas.append((int(m['acumulado']) / 1e6, len(m['sangria']), m['modulo']))
+
+    total = sum(segundos for segundos, sangria, _ in filas if sangria == 1)
+    paquetes = {}
+    for segundos, _, modulo in filas:
+        partes = modulo.split('.')
+        paquete = '.'.join(partes[:2] if partes[0] in LOCALES else partes[:1])
+        paquetes[paquete] = max(paquetes.get(paquete, 0.0), segundos)
+    paquetes.pop('app', None)
+    elegidos = sorted(paquetes.items(), key=lambda p: -p[1])[:n]
+    return elegidos, total
+
+
+def perfil_paginas():
+    # {módulo de la página: segundos} y el total de `import app` (en este proceso)
+    os.environ.update(CLIMA_PRECARGA='0')
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+
+    tiempos = {}
+    original = importlib.util.spec_from_file_location
+
+    def cronometrada(nombre, *args, **kwargs):
+        spec = original(nombre, *args, **kwargs)
+        if nombre.startswith('pages.'):
+            ejecutar = spec.loader.exec_module
+
+            def exec_module(modulo):
+                inicio = time.perf_counter()
+                try:
+                    ejecutar(modulo)
+                finally:
+                    tiempos[nombre] = time.perf_counter() - inicio
+            spec.loader.exec_module = exec_module
+        return spec
+
+    importlib.util.spec_from_file_location = cronometrada
+    try:
+        inicio = time.perf_counter()
+        import app  # noqa: F401
+        total = time.perf_counter() - inicio
+    finally:
+        importlib.util.spec_from_file_location = original
+    return tiempos, total
+
+
+def reporte(n=15):
+    paquetes, total = perfil_paquetes(n)
+    print(f"import app (proceso limpio, -X importtime): {total:.2f} s")
+    for modulo, segundos in paquetes:
+        print(f"  {segundos * 1000:8.1f} ms  {modulo}")
+
+    paginas, total = perfil_paginas()
+    print(f"\nimport app (este proceso): {total:.2f} s, de ellos {sum(paginas.values()):.2f} s en pages/")
+    for nombre, segundos in sorted(paginas.items(), key=lambda p: -p[1]):
+        print(f"  {segundos * 1000:8.1f} ms  {nombre}")
+
+
+if __name__ == '__main__':
+    reporte(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
@@ -0,0 +1,208 @@
+import functools
+
+import numpy as np
+
+from utils.instrumentacion import contar_evaluaciones, medir
+
+# --- CONTAGIO SOBRE UNA RED DE CONTACTOS ---
+# El SIR de las páginas supone mezcla homogénea: todos con todos. Aquí el
+# mismo proceso corre sobre un grafo generado (Erdős–Rényi, Barabási–Albert
+# o mundo pequeño de Watts–Strogatz) guardado en CSR: los vecinos del nodo v
+# son indices[indptr[v]:indptr[v + 1]].
+#
+# Todo es vectorizado, sin bucles de Python por nodo:
+#   - generadores: pares aleatorios, punteros (BA) y anillos (WS) en arreglos
+#   - dinámica por eventos (SIR de Markov en tiempo continuo, sin paso dt):
+#     al contagiarse, el nodo u sortea cuánto propaga, D ~ Exp(k), y cada
+#     arista (u, v) un retardo d ~ Exp(tau); si d < D, v recibe un contagio
+#     candidato en t_u + d. El primer candidato de v que llega estando v
+#     susceptible lo contagia. Los candidatos esperan en casilleros de tiempo
+#     y se procesan casillero por casillero, todo el lote a la vez, así que
+#     cada arista se mira una sola vez: O(aristas) en toda la corrida.
+#     S, I, R en cualquier instante salen de los tiempos de contagio y de
+#     recuperación de cada nodo.
+#
+# Equivalencia con el campo medio: b S I (acción de masas con N nodos) es
+# tau <grado> S I / N, así que tau = b N / <grado>.
+
+TIPOS = {'er': 'Erdős–Rényi', 'ba': 'Barabási–Albert', 'ws': 'Mundo pequeño (Watts–Strogatz)'}
+# Probabilidad de reconectar cada arista del anillo (Watts–Strogatz)
+REENLACE = 0.1
+# Ancho de los casilleros: cada propagador contagia en promedio a lo sumo
+# FRACCION personas por casillero. Dentro de uno, un contagio encadenado a
+# otro del mismo casillero puede salir algo tarde (menos de un casillero);
+# con FRACCION chica eso casi no pasa
+FRACCION = 0.1
+# Como mucho tantos casilleros (con horizontes largos se ensanchan)
+MAX_CASILLEROS = 4000
+PUNTOS = 200
+MAX_NODOS = 10**6
+# nodos * grado medio (entradas del CSR): 10^6 nodos con grado 20 ocupan ~100 MB
+MAX_ENLACES = 2 * 10**7
+
+
+def _csr(n, u, v):
+    # Aristas no dirigidas (u, v) -> (indptr, indices) sin lazos ni repetidas
+    u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+    distintos = u != v
+    u, v = u[distintos], v[distintos]
+    # Ordenar las claves fila * n + columna deja el CSR armado (np.unique
+    # con hash es varias veces más lento en arreglos de 10^7)
+    claves = np.concatenate([u * n + v, v * n + u])
+    claves.sort()
+    claves = claves[np.concatenate([[True], claves[1:] != claves[:-1]])]
+    origen, indices = np.divmod(claves, n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(origen, minlength=n), out=indptr[1:])
+    return indptr, indices.astype(np.int32)
+
+
+def red_erdos_renyi(n, grado, rng):
+    # n * grado / 2 pares al azar (los repetidos se descartan: son pocos)
+    m = int(round(n * grado / 2))
+    return _csr(n, rng.integers(0, n, m), rng.integers(0, n, m))
+
+
+def red_barabasi_albert(n, grado, rng):
+    # Batagelj–Brandes: la arista e une al nodo e // m con el extremo de una
+    # posición anterior al azar de la lista de extremos, lo que da enlace
+    # preferencial. La cadena de posiciones se resuelve con saltos de
+    # punteros (unas pocas pasadas vectorizadas) en vez de un bucle por arista.
+    m = max(int(grado) // 2, 1)
+    e = np.arange(n * m, dtype=np.int64)
+    nuevo = e // m
+    # Posición 2e es el nodo nuevo, 2e + 1 apunta a una posición anterior
+    puntero = (rng.random(e.size) * (2 * e + 1)).astype(np.int64)
+    while True:
+        impares = np.flatnonzero(puntero % 2 == 1)
+        if not impares.size:
+            break
+        puntero[impares] = puntero[(puntero[impares] - 1) // 2]
+    return _csr(n, nuevo, nuevo[puntero // 2])
+
+
+def red_mundo_pequeno(n, grado, rng, reenlace=REENLACE):
+    # Anillo con grado / 2 vecinos a cada lado; cada arista cambia su extremo
+    # por uno al azar con probabilidad `reenlace`
+    mitad = max(int(grado) // 2, 1)
+    u = np.repeat(np.arange(n, dtype=np.int64), mitad)
+    v = (u + np.tile(np.arange(1, mitad + 1), n)) % n
+    cambia = rng.random(v.size) < reenlace
+    v[cambia] = rng.integers(0, n, int(cambia.sum()))
+    return _csr(n, u, v)
+
+
+GENERADORES = {'er': red_erdos_renyi, 'ba': red_barabasi_albert, 'ws': red_mundo_pequeno}
+
+
+def generar_red(tipo, n, grado, semilla=0):
+    # (indptr, indices) de solo lectura: se reutiliza al cambiar b, k o t_max
+    if tipo not in GENERADORES:
+        raise ValueError(f"Tipo de red desconocido: {tipo!r} (opciones: {', '.join(TIPOS)})")
+    if not 2 <= n <= MAX_NODOS or not 1 <= grado < n or n * grado > MAX_ENLACES:
+        raise ValueError(f"Se necesita 2 <= nodos <= {MAX_NODOS}, 1 <= grado < nodos "
+                         f"y nodos * grado <= {MAX_ENLACES}")
+    return _red_guardada(tipo, int(n), int(grado), semilla)
+
+
+@functools.lru_cache(maxsize=4)
+def _red_guardada(tipo, n, grado, semilla):
+    indptr, indices = GENERADORES[tipo](n, grado, np.random.default_rng(semilla))
+    indptr.setflags(write=False)
+    indices.setflags(write=False)
+    return indptr, indices
+
+
+def _vecinos(indptr, indices, nodos):
+    # Concatenación de las listas de vecinos de `nodos`
+    inicio, fin = indptr[nodos], indptr[nodos + 1]
+    cuantos = fin - inicio
+    total = int(cuantos.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+    return indices[np.repeat(inicio, cuantos) + desplazamiento]
+
+
+def _primeros(nodos, tiempos):
+    # El candidato más temprano de cada nodo (ordenados por tiempo)
+    orden = np.argsort(tiempos)
+    nodos, tiempos = nodos[orden], tiempos[orden]
+    _, primero = np.unique(nodos, return_index=True)
+    return nodos[primero], tiempos[primero]
+
+
+@medir('resolver')
+def contagio_en_red(indptr, indices, b_campo_medio, k, I0, R0, t_max, semilla=0, n_puntos=PUNTOS):
+    # Fracciones S, I, R en n_puntos tiempos de un SIR sobre la red.
+    # b_campo_medio es b N del modelo homogéneo (por unidad de tiempo); I0 y
+    # R0 son fracciones iniciales (al menos un propagador).
+    n = indptr.size - 1
+    rng = np.random.default_rng(semilla)
+    grado_medio = indices.size / n
+    tau = b_campo_medio / grado_medio if grado_medio > 0 else 0.0
+    ancho = max(FRACCION / max(b_campo_medio, k, 1e-12), t_max / MAX_CASILLEROS)
+    casilleros = int(np.ceil(t_max / ancho))
+    pendientes = [[] for _ in range(casilleros)]   # (nodos, tiempos) por casillero
+
+    # 0 = susceptible, 1 = contagiado alguna vez, 2 = racional desde el inicio
+    estado = np.zeros(n, dtype=np.int8)
+    orden = rng.permutation(n)
+    n_i = max(int(round(I0 * n)), 1)
+    n_r = min(int(round(R0 * n)), n - n_i)
+    estado[orden[n_i:n_i + n_r]] = 2
+    contagio = [np.zeros(n_i)]        # tiempos de contagio
+    recuperacion = []                 # y de recuperación, de los mismos nodos
+    evaluaciones = 0
+
+    def contagiar(nodos, tiempos):
+        # Marca a los nuevos propagadores y agenda sus contagios candidatos
+        nonlocal evaluaciones
+        estado[nodos] = 1
+        duracion = rng.exponential(1.0 / k, nodos.size) if k > 0 else np.full(nodos.size, np.inf)
+        recuperacion.append(tiempos + duracion)
+        vecinos = _vecinos(indptr, indices, nodos)
+        evaluaciones += vecinos.size
+        if tau <= 0 or not vecinos.size:
+            return
+        # Solo importan las aristas hacia susceptibles
+        cuantos = indptr[nodos + 1] - indptr[nodos]
+        libres = estado[vecinos] == 0
+        vecinos = vecinos[libres]
+        retardo = rng.exponential(1.0 / tau, vecinos.size)
+        llegada = np.repeat(tiempos, cuantos)[libres] + retardo
+        dentro = (retardo < np.repeat(duracion, cuantos)[libres]) & (llegada <= t_max)
+        vecinos, llegada = vecinos[dentro], llegada[dentro]
+        if not vecinos.size:
+            return
+        # Casilleros en int16 (son menos de 2^15): el orden estable es por radix
+        casillero = np.minimum(llegada / ancho, casilleros - 1).astype(np.int16)
+        orden = np.argsort(casillero, kind='stable')
+        vecinos, llegada, casillero = vecinos[orden], llegada[orden], casillero[orden]
+        cortes = np.flatnonzero(np.diff(casillero)) + 1
+        inicios, fines = np.r_[0, cortes].tolist(), np.r_[cortes, vecinos.size].tolist()
+        for a, z, c in zip(inicios, fines, casillero[inicios].tolist()):
+            pendientes[c].append((vecinos[a:z], llegada[a:z]))
+
+    contagiar(orden[:n_i], contagio[0])
+    for c in range(casilleros):
+        # Contagios de este casillero que caen en él mismo: se repite hasta vaciarlo
+        while pendientes[c]:
+            lote = pendientes[c]
+            pendientes[c] = []
+            nodos, tiempos = _primeros(np.concatenate([v for v, _ in lote]),
+                                       np.concatenate([tl for _, tl in lote]))
+            libres = estado[nodos] == 0
+            if libres.any():
+                contagio.append(tiempos[libres])
+                contagiar(nodos[libres], tiempos[libres])
+
+    contar_evaluaciones(evaluaciones)
+    contagio, recuperacion = np.sort(np.concatenate(contagio)), np.sort(np.concatenate(recuperacion))
+    t = np.linspace(0.0, float(t_max), int(n_puntos))
+    contagiados = np.searchsorted(contagio, t, side='right')
+    recuperados = np.searchsorted(recuperacion, t, side='right')
+    S = (n - n_r - contagiados) / n
+    I = (contagiados - recuperados) / n
+    R = (n_r + recuperados) / n
+    return {'t': t, 'S': S, 'I': I, 'R': R, 'grado_medio': grado_medio, 'tau': tau}
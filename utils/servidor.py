@@ -0,0 +1,151 @@
+import gc
+import os
+import time
+
+import flask
+
+from utils.cache import CACHE
+from utils.clima import CLIENTE
+from utils.coalescencia import COALESCEDOR
+from utils.config import TOKEN_PERFIL
+from utils.ejecucion import EJECUTOR, precargar
+from utils.instrumentacion import (MEDIDOR, PERFILADOR, RUTA_CALLBACKS, etapas, iniciar_peticion,
+                                   server_timing, terminar_peticion)
+from utils.trabajos import GESTOR
+
+# --- SERVIDOR DE PRODUCCIÓN ---
+# `python app.py` levanta el servidor de desarrollo de Flask (debug, recarga,
+# un proceso). En producción:
+#   gunicorn app:server            (configuración en gunicorn.conf.py)
+#
+# Con preload_app el maestro importa la app UNA vez. precalentar() deja listo
+# en el maestro lo que si no se haría en la primera petición de cada worker:
+# SciPy y los modelos, y las rutas /, /_dash-layout y /_dash-dependencies
+# (Dash arma ahí el layout de validación de todas las páginas). Después,
+# gc.freeze() saca esos objetos del recolector para que los workers los
+# compartan por copy-on-write en vez de copiarlos al tocarlos.
+#
+# despues_de_fork() corre en cada worker nuevo: hilos, locks y conexiones no
+# sobreviven bien al fork y se rehacen, y se arrancan los hilos de fondo
+# (iniciar_hilos), que el maestro no tiene. Con `python app.py` los arranca
+# app.py en el proceso que atiende.
+#
+# /salud responde el estado del worker que atiende (cada worker tiene sus
+# propios caches y contadores). /metrics lo mismo, más los tiempos por
+# callback de utils/instrumentacion.py, en formato de texto de Prometheus.
+# /perfil (solo con TOKEN_PERFIL, en la cabecera X-Token-Perfil):
+#   GET /perfil                 funciones más caras de lo perfilado
+#   GET /perfil?muestreo=0.1    perfila el 10 % de las llamadas desde ahora
+#   GET /perfil?limpiar=1       vacía lo acumulado
+
+RUTA_SALUD = '/salud'
+RUTA_METRICAS = '/metrics'
+RUTA_PERFIL = '/perfil'
+RUTAS_CALENTAR = ['/', '/_dash-layout', '/_dash-dependencies']
+
+INICIO = time.time()
+
+
+def estado():
+    return {
+        'estado': 'ok',
+        'pid': os.getpid(),
+        'segundos_activo': round(time.time() - INICIO, 1),
+        'cache': CACHE.estadisticas(),
+        'clima': CLIENTE.estadisticas(),
+        'coalescencia': COALESCEDOR.estadisticas(),
+        'ejecutor': EJECUTOR.estadisticas(),
+        'trabajos_en_fondo': GESTOR is not None,
+    }
+
+
+def instalar_salud(server):
+    @server.route(RUTA_SALUD)
+    def salud():
+        return flask.jsonify(estado())
+
+
+def metricas_de_estado(datos, prefijo='lab'):
+    # estado() -> líneas de Prometheus: cada número es un gauge y cada dict
+    # anidado (p.ej. promedios_ms del ejecutor) una etiqueta
+    lineas = []
+    for componente, valores in datos.items():
+        if not isinstance(valores, dict):
+            continue
+        for clave, valor in valores.items():
+            nombre = f'{prefijo}_{componente}_{clave}'
+            if isinstance(valor, dict):
+                lineas.append(f'# TYPE {nombre} gauge')
+                lineas += [f'{nombre}{{clave="{k}"}} {float(v)}' for k, v in valor.items()]
+            elif isinstance(valor, (bool, int, float)):
+                lineas.append(f'# TYPE {nombre} gauge')
+                lineas.append(f'{nombre} {float(valor)}')
+    return lineas
+
+
+def instalar_instrumentacion(server):
+    # Tiempos por etapa de cada callback (Server-Timing), /metrics y /perfil
+    @server.before_request
+    def empezar():
+        if flask.request.path.endswith(RUTA_CALLBACKS):
+            iniciar_peticion()
+
+    @server.after_request
+    def anotar(respuesta):
+        registro = terminar_peticion()
+        if registro is not None and registro['callback'] is not None:
+            duraciones = etapas(registro)
+            respuesta.headers['Server-Timing'] = server_timing(duraciones)
+            tamano = respuesta.content_length
+            if tamano is None and not respuesta.direct_passthrough:
+                tamano = len(respuesta.get_data())
+            MEDIDOR.anotar(registro['callback'], duraciones, registro['evaluaciones'], tamano or 0)
+        return respuesta
+
+    @server.teardown_request
+    def limpiar(_error=None):
+        terminar_peticion()
+
+    @server.route(RUTA_METRICAS)
+    def metricas():
+        lineas = MEDIDOR.prometheus() + metricas_de_estado(estado())
+        return flask.Response('\n'.join(lineas) + '\n', mimetype='text/plain; version=0.0.4')
+
+    @server.route(RUTA_PERFIL)
+    def perfil():
+        if TOKEN_PERFIL is None or flask.request.headers.get('X-Token-Perfil') != TOKEN_PERFIL:
+            flask.abort(404)
+        argumentos = flask.request.args
+        if 'muestreo' in argumentos:
+            try:
+                PERFILADOR.muestreo = min(max(float(argumentos['muestreo']), 0.0), 1.0)
+            except ValueError:
+                flask.abort(400)
+        if argumentos.get('limpiar'):
+            PERFILADOR.limpiar()
+        texto = f"muestreo = {PERFILADOR.muestreo}\n" + PERFILADOR.reporte(int(argumentos.get('n', 30)))
+        return flask.Response(texto, mimetype='text/plain')
+
+
+def precalentar(server):
+    # En el maestro, antes de crear los workers
+    precargar()
+    with server.test_client() as cliente:
+        for ruta in RUTAS_CALENTAR:
+            cliente.get(ruta)
+    gc.collect()
+    gc.freeze()
+
+
+def iniciar_hilos():
+    # Hilos de fondo del proceso que atiende peticiones. Nunca al importar: un
+    # import en el maestro de gunicorn, un script o las pruebas no abre la red.
+    CLIENTE.iniciar_precarga()
+
+
+def despues_de_fork():
+    # En cada worker, justo después del fork
+    CLIENTE.despues_de_fork()
+    EJECUTOR.despues_de_fork()
+    EJECUTOR.calentar()
+    iniciar_hilos()
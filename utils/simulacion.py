@@ -0,0 +1,157 @@
+import itertools
+
+import numpy as np
+
+from utils.cache import CACHE, clave_simulacion
+from utils.ejecucion import EJECUTOR
+from utils.instrumentacion import contar_evaluaciones, medir
+from utils.modelos import obtener_modelo
+from utils.muestreo import PUNTOS_POR_GRAFICA, reducir
+
+# scipy.integrate se importa dentro de _resolver: tarda ~1 s y ninguna página
+# lo necesita para armar su layout, solo al resolver (ver
+# utils/perfil_arranque.py). Los workers de utils/ejecucion.py lo precargan.
+#
+# Un solo integrador para todo (solve_ivp, LSODA con el jacobiano analítico):
+# simular() lo evalúa en una malla dada y simular_trayectoria() en los pasos
+# que elige el propio integrador.
+
+# Tolerancias por defecto de odeint (las que usaban todas las páginas)
+RTOL = 1.49012e-8
+ATOL = 1.49012e-8
+
+# Tope de evaluaciones del lado derecho por integración (odeint tenía mxstep,
+# solve_ivp no tiene ninguno). Los casos de las páginas usan menos de 2000;
+# una rigidez absurda (p.ej. Allee con A = 1e-300) agota el tope en < 1 s en
+# vez de dejar al worker achicando el paso para siempre.
+MAX_EVALUACIONES = 20000
+LIMITE_EXPLOSION = 1e12
+
+
+class _SinPresupuesto(Exception):
+    pass
+
+
+def _con_presupuesto(rhs, maximo=MAX_EVALUACIONES):
+    cuenta = itertools.count(1)
+
+    def acotada(t, y, *args):
+        if next(cuenta) > maximo:
+            raise _SinPresupuesto
+        return rhs(t, y, *args)
+    return acotada
+
+
+def _explota(t, y, *args):
+    # Evento terminal: la solución se va al infinito (p.ej. cosecha excesiva,
+    # P -> -inf en tiempo finito). Sin esto LSODA achica el paso sin terminar.
+    # Un estado inf/NaN también corta: con NaN la resta nunca cambiaría de signo.
+    if not np.all(np.isfinite(y)):
+        return -1.0
+    return LIMITE_EXPLOSION - np.max(np.abs(y))
+
+
+_explota.terminal = True
+
+
+def _resolver(modelo, y0, tramo, args, rtol, atol, t_eval=None):
+    # Resultado de solve_ivp, o None si no hay nada confiable que integrar:
+    # el lado derecho no es finito en y0 (p.ej. Allee con A = 0) o se agotó
+    # MAX_EVALUACIONES.
+    from scipy.integrate import solve_ivp
+
+    with np.errstate(all='ignore'):
+        derivada = modelo.rhs(tramo[0], y0, *args)
+    if not np.all(np.isfinite(derivada)):
+        return None
+    try:
+        sol = solve_ivp(_con_presupuesto(modelo.rhs), tramo, y0, method='LSODA',
+                        jac=modelo.jac, args=args, rtol=rtol, atol=atol, events=_explota,
+                        t_eval=t_eval, dense_output=t_eval is None)
+    except _SinPresupuesto:
+        contar_evaluaciones(MAX_EVALUACIONES)
+        return None
+    contar_evaluaciones(sol.nfev)
+    return sol
+
+
+def _integrar(modelo, y0, t, args, rtol, atol):
+    # Solución en los tiempos t; lo que no se alcanzó queda como NaN
+    Y = np.full((len(t), len(y0)), np.nan)
+    Y[0] = y0
+    if len(t) > 1:
+        sol = _resolver(modelo, y0, (t[0], t[-1]), args, rtol, atol, t_eval=t)
+        if sol is not None:
+            Y[:len(sol.t)] = sol.y.T
+    return Y
+
+
+def simular(modelo, y0, t, parametros, rtol=RTOL, atol=ATOL, usar_cache=True):
+    # Solución en una malla de tiempos dada (p.ej. las fechas de unos datos).
+    # Devuelve un arreglo (len(t), n_estados), igual que odeint, para hacer
+    #   S, I, R = sol.T
+    # Con usar_cache=True el resultado sale del cache compartido (utils/cache.py)
+    # y es de SOLO LECTURA: si hay que modificarlo, primero se copia.
+    modelo = obtener_modelo(modelo)
+    args = modelo.argumentos(parametros)
+    y0 = np.atleast_1d(np.asarray(y0, dtype=float))
+    t = np.asarray(t, dtype=float)
+
+    # La integración corre en línea o en un worker según EJECUTOR (utils/ejecucion.py)
+    def calcular():
+        with medir('resolver'):
+            return EJECUTOR.ejecutar(modelo.nombre, _integrar, modelo, y0, t, args, rtol, atol)
+
+    if not usar_cache:
+        return calcular()
+
+    clave = clave_simulacion(modelo.nombre, y0, t, args, rtol, atol)
+    return CACHE.obtener_o_calcular(clave, calcular)
+
+
+def _integrar_adaptativo(modelo, y0, t_max, args, rtol, atol, n_puntos):
+    # Sin t_eval: solve_ivp devuelve los pasos que eligió el propio integrador
+    # (muchos en la subida de la epidemia, pocos en las zonas planas)
+    sol = _resolver(modelo, y0, (0.0, t_max), args, rtol, atol)
+    if sol is None:
+        # Igual que en simular(): lo que no se alcanzó queda como NaN
+        return np.column_stack([[0.0, t_max], np.vstack([y0, np.full_like(y0, np.nan)])])
+    t, Y = sol.t, sol.y.T
+
+    # Si el integrador dio menos pasos que el presupuesto, cada paso se
+    # subdivide con la salida densa: sigue habiendo más puntos donde la
+    # curva cambia rápido, pero la línea no queda "quebrada".
+    if sol.status == 0 and 1 < len(t) < n_puntos:
+        por_paso = n_puntos // (len(t) - 1)
+        fracciones = np.arange(por_paso) / por_paso
+        t = np.append((t[:-1, None] + np.diff(t)[:, None] * fracciones).ravel(), t[-1])
+        Y = sol.sol(t).T
+
+    if sol.status != 0 or t[-1] < t_max:
+        t = np.append(t, t_max)
+        Y = np.vstack([Y, np.full((1, Y.shape[1]), np.nan)])
+    t, Y = reducir(t, Y, n_puntos)
+    return np.column_stack([t, Y])
+
+
+def simular_trayectoria(modelo, y0, t_max, parametros, n_puntos=PUNTOS_POR_GRAFICA,
+                        rtol=RTOL, atol=ATOL, usar_cache=True):
+    # Para graficar: pasos adaptativos del integrador reducidos con LTTB a un
+    # número fijo de puntos, sin importar si t_max es 50 o 5000 días.
+    # Devuelve (t, sol) con sol de forma (len(t), n_estados), como simular().
+    modelo = obtener_modelo(modelo)
+    args = modelo.argumentos(parametros)
+    y0 = np.atleast_1d(np.asarray(y0, dtype=float))
+    t_max = float(t_max)
+
+    def calcular():
+        with medir('resolver'):
+            return EJECUTOR.ejecutar(f"{modelo.nombre}:adaptativo", _integrar_adaptativo,
+                                     modelo, y0, t_max, args, rtol, atol, n_puntos)
+
+    if usar_cache:
+        clave = clave_simulacion(f"{modelo.nombre}:adaptativo:{n_puntos}", y0, [t_max], args, rtol, atol)
+        datos = CACHE.obtener_o_calcular(clave, calcular)
+    else:
+        datos = calcular()
+    return datos[:, 0], datos[:, 1:]
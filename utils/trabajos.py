@@ -0,0 +1,99 @@
+from dash import html, dcc, Input, Output, callback, no_update
+
+from utils.coalescencia import COALESCEDOR, PESTANA
+from utils.config import COSTO_EN_LINEA, COSTO_MAXIMO, DIR_TRABAJOS
+from utils.instrumentacion import instrumentar
+
+# --- SIMULACIONES PESADAS EN SEGUNDO PLANO ---
+# Un barrido con t_max enorme tarda segundos y bloquea el worker de Flask.
+# Cada página pesada queda en dos pasos:
+#   1. Un callback liviano valida las entradas y estima el costo (sin integrar)
+#      y llama a despachar(): hasta COSTO_EN_LINEA se calcula en el worker,
+#      hasta COSTO_MAXIMO va a la cola en segundo plano y más allá se rechaza.
+#   2. registrar_trabajo() conecta la función de cálculo a las dos rutas. La de
+#      fondo es un background callback de Dash: corre en otro proceso, con
+#      barra de progreso y botón de cancelar.
+#
+# La cola usa diskcache (con multiprocess y psutil, que pide Dash; están en
+# requirements.txt). Si no están instalados no hay segundo plano: lo que
+# supera COSTO_EN_LINEA se rechaza en vez de bloquear al worker.
+
+try:
+    import diskcache
+    from dash import DiskcacheManager
+    GESTOR = DiskcacheManager(diskcache.Cache(DIR_TRABAJOS), expire=600)
+except ImportError:
+    GESTOR = None
+
+OCULTO = {'display': 'none'}
+VISIBLE = {'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'marginTop': '10px'}
+
+
+def controles_trabajo(prefijo):
+    # Disparadores de las dos rutas, aviso de validación y progreso + cancelar
+    return html.Div([
+        dcc.Store(id=f'{prefijo}-en-linea'),
+        dcc.Store(id=f'{prefijo}-en-fondo'),
+        html.Div(id=f'{prefijo}-aviso', style={'fontSize': '13px', 'color': '#b45309', 'marginTop': '8px'}),
+        html.Div([
+            html.Progress(id=f'{prefijo}-progreso', value='0', max='100', style={'flex': 1}),
+            html.Button("Cancelar", id=f'{prefijo}-cancelar', className='btn-generar'),
+        ], id=f'{prefijo}-en-curso', style=OCULTO),
+    ])
+
+
+def salidas_despacho(prefijo):
+    # Salidas del callback de validación (el que llama a despachar)
+    return [Output(f'{prefijo}-en-linea', 'data'),
+            Output(f'{prefijo}-en-fondo', 'data'),
+            Output(f'{prefijo}-aviso', 'children')]
+
+
+def despachar(costo, datos):
+    # costo: segundos estimados; datos: dict con los argumentos de la función.
+    # Devuelve los valores de salidas_despacho(): a qué ruta va o por qué no.
+    if costo > COSTO_MAXIMO:
+        return no_update, no_update, (f"Simulación demasiado grande (~{costo:.0f} s estimados, "
+                                      f"máximo {COSTO_MAXIMO:.0f} s): reduce el horizonte.")
+    if costo <= COSTO_EN_LINEA:
+        return datos, no_update, ""
+    if GESTOR is None:
+        return no_update, no_update, (f"Simulación larga (~{costo:.0f} s estimados) y este servidor no "
+                                      f"tiene cola en segundo plano (falta diskcache): reduce el horizonte.")
+    return no_update, datos, f"Simulación larga (~{costo:.0f} s): se calcula en segundo plano."
+
+
+def registrar_trabajo(prefijo, salidas, funcion, boton, solo_el_ultimo=False):
+    # funcion(progreso, **datos) devuelve los valores de `salidas`;
+    # progreso(hecho, total) es None en la ruta en línea.
+    # solo_el_ultimo=True coalesce la ruta en línea (páginas con sliders).
+    duplicadas = [Output(s.component_id, s.component_property, allow_duplicate=True) for s in salidas]
+
+    @instrumentar(nombre=f'{prefijo}-en-linea')
+    def en_linea(datos):
+        return funcion(None, **datos)
+
+    if solo_el_ultimo:
+        callback(duplicadas, Input(f'{prefijo}-en-linea', 'data'), PESTANA,
+                 prevent_initial_call=True)(COALESCEDOR.envolver(en_linea, nombre=f'{prefijo}-en-linea'))
+    else:
+        callback(duplicadas, Input(f'{prefijo}-en-linea', 'data'), prevent_initial_call=True)(en_linea)
+
+    if GESTOR is None:
+        return
+
+    @callback(
+        duplicadas,
+        Input(f'{prefijo}-en-fondo', 'data'),
+        background=True,
+        manager=GESTOR,
+        progress=[Output(f'{prefijo}-progreso', 'value'), Output(f'{prefijo}-progreso', 'max')],
+        running=[(Output(boton, 'disabled'), True, False),
+                 (Output(f'{prefijo}-en-curso', 'style'), VISIBLE, OCULTO)],
+        cancel=[Input(f'{prefijo}-cancelar', 'n_clicks')],
+        prevent_initial_call=True
+    )
+    def en_fondo(set_progress, datos):
+        def progreso(hecho, total):
+            set_progress((str(hecho), str(total)))
+        return funcion(progreso, **datos)